@@ -3,7 +3,13 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
-import sqlite3
+import os
+
+from wbs_db import DB_PATH, DEFAULT_PAGE_SIZE, WbsDatabase
+from wbs_import import (
+    IMPORT_COLUMNS, OPTIONAL_COLUMNS, REQUIRED_COLUMNS, TaskImportError, excel_available, import_tasks,
+    missing_columns, read_task_file, validate_tasks
+)
 
 # --- Konfigurasi Halaman Streamlit ---
 st.set_page_config(layout="wide", page_title="WBS Interaktif: Pengembangan Platform Digital")
@@ -11,48 +17,10 @@ st.set_page_config(layout="wide", page_title="WBS Interaktif: Pengembangan Platf
 st.title("WBS Interaktif: Pengembangan Platform Digital Revolusioner")
 st.markdown("---")
 
-# --- Inisialisasi Database ---
-def init_db():
-    conn = sqlite3.connect('wbs_database.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS tasks
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  section TEXT,
-                  wbs_id TEXT,
-                  task_name TEXT,
-                  description TEXT,
-                  personnel_role TEXT,
-                  personnel_count INTEGER,
-                  start_date TEXT,
-                  end_date TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS milestones
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  wbs_id TEXT,
-                  milestone_name TEXT,
-                  milestone_date TEXT)''')
-    conn.commit()
-    conn.close()
-
-init_db()
-
-# --- Fungsi untuk Memuat Data dari Database ---
-def load_tasks():
-    conn = sqlite3.connect('wbs_database.db')
-    df = pd.read_sql_query("SELECT * FROM tasks", conn)
-    conn.close()
-    return df.to_dict('records') if not df.empty else []
-
-def load_milestones():
-    conn = sqlite3.connect('wbs_database.db')
-    df = pd.read_sql_query("SELECT * FROM milestones", conn)
-    conn.close()
-    return df.to_dict('records') if not df.empty else []
-
-# --- Inisialisasi Session State untuk Data Tugas dan Milestone ---
-if 'tasks' not in st.session_state:
-    st.session_state.tasks = load_tasks()
-if 'milestones' not in st.session_state:
-    st.session_state.milestones = load_milestones()
+# --- Koneksi Database (satu pool per proses, skema dibuat sekali) ---
+@st.cache_resource
+def get_db():
+    return WbsDatabase(os.environ.get("WBS_DB", DB_PATH))
 
 # --- Data WBS Awal Berdasarkan Dokumen ---
 initial_wbs_structure = {
@@ -218,28 +186,29 @@ initial_wbs_structure = {
     ]
 }
 
-# --- Fungsi untuk Menyimpan Data ke Database ---
-def save_task(task):
-    conn = sqlite3.connect('wbs_database.db')
-    c = conn.cursor()
-    c.execute("INSERT INTO tasks (section, wbs_id, task_name, description, personnel_role, personnel_count, start_date, end_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-              (task['section'], task['wbs_id'], task['task_name'], task['description'], task['personnel_role'], task['personnel_count'], task['start_date'].strftime('%Y-%m-%d'), task['end_date'].strftime('%Y-%m-%d')))
-    conn.commit()
-    conn.close()
-
-def save_milestone(wbs_id, milestone_name, milestone_date):
-    conn = sqlite3.connect('wbs_database.db')
-    c = conn.cursor()
-    c.execute("INSERT INTO milestones (wbs_id, milestone_name, milestone_date) VALUES (?, ?, ?)",
-              (wbs_id, milestone_name, milestone_date.strftime('%Y-%m-%d')))
-    conn.commit()
-    conn.close()
+# --- Peran Personil per Bagian Utama ---
+personnel_roles = {
+    "Manajemen Proyek (PMO)": ["Project Manager", "Coordinator", "Quality Assurance"],
+    "Bagian Umum": ["Manajer Umum", "Personalia", "Legal", "Humas", "Administrasi Umum", "Respsionis", "Help Desk", "Security", "Driver", "Office Boy"],
+    "Bagian Keuangan": ["Manajer Keuangan", "Akuntan", "Pajak", "Administrasi Keuangan"],
+    "Bagian Marketing": ["Penjualan dan Penagihan"],
+    "Bagian Data & Informasi": [
+        "Manajer Software", "Ahli Sistem Analis", "Ahli Security Sistem", "Creative Director", "Android Programmer",
+        "IOS Programmer", "Fullstack Programmer", "Ahli Database", "UI/UX Designer", "Devops", "Graphic Designer",
+        "Copywriter", "Videografer-Editor", "Technical Support", "Manajemen Resiko (DC)", "Devops (DC)",
+        "Sistem Analis (DC)", "Mechanical Electric (DC)", "Network Engineer (DC)", "Cloud Engineer (DC)",
+        "Technical Support (DC)", "CISO (CS)", "Security Architect Dan Analyzer (CS)",
+        "Incident Response - Forensic Team (CS)", "Penetration Tester (Pentester) (CS)", "DevSecOps Engineer (CS)",
+        "Ahli Data Platform", "Administrator", "Ahli Database", "Ahli Back End", "Ahli Data Analis",
+        "Ahli Data Scientist", "Ahli Data Visualisasi", "Ahli Front End"
+    ]
+}
 
 # --- Sidebar untuk Navigasi dan Input Form ---
 st.sidebar.header("Navigasi & Input")
 menu_selection = st.sidebar.radio(
     "Pilih Menu:",
-    ("Input Tugas Baru", "Lihat WBS & Analisis")
+    ("Input Tugas Baru", "Impor Massal", "Lihat WBS & Analisis")
 )
 
 # --- Fungsi untuk Menambah Tugas Baru ---
@@ -293,22 +262,6 @@ if menu_selection == "Input Tugas Baru":
 
         st.subheader("Detail Personil")
         # Combo box untuk peran personil berdasarkan bagian utama
-        personnel_roles = {
-            "Manajemen Proyek (PMO)": ["Project Manager", "Coordinator", "Quality Assurance"],
-            "Bagian Umum": ["Manajer Umum", "Personalia", "Legal", "Humas", "Administrasi Umum", "Respsionis", "Help Desk", "Security", "Driver", "Office Boy"],
-            "Bagian Keuangan": ["Manajer Keuangan", "Akuntan", "Pajak", "Administrasi Keuangan"],
-            "Bagian Marketing": ["Penjualan dan Penagihan"],
-            "Bagian Data & Informasi": [
-                "Manajer Software", "Ahli Sistem Analis", "Ahli Security Sistem", "Creative Director", "Android Programmer",
-                "IOS Programmer", "Fullstack Programmer", "Ahli Database", "UI/UX Designer", "Devops", "Graphic Designer",
-                "Copywriter", "Videografer-Editor", "Technical Support", "Manajemen Resiko (DC)", "Devops (DC)",
-                "Sistem Analis (DC)", "Mechanical Electric (DC)", "Network Engineer (DC)", "Cloud Engineer (DC)",
-                "Technical Support (DC)", "CISO (CS)", "Security Architect Dan Analyzer (CS)",
-                "Incident Response - Forensic Team (CS)", "Penetration Tester (Pentester) (CS)", "DevSecOps Engineer (CS)",
-                "Ahli Data Platform", "Administrator", "Ahli Database", "Ahli Back End", "Ahli Data Analis",
-                "Ahli Data Scientist", "Ahli Data Visualisasi", "Ahli Front End"
-            ]
-        }
         personnel_role = st.selectbox(
             "Peran Personil:",
             personnel_roles.get(selected_section_form, []),
@@ -343,63 +296,193 @@ if menu_selection == "Input Tugas Baru":
                 'start_date': start_date,
                 'end_date': end_date
             }
-            save_task(new_task)
-            st.session_state.tasks = load_tasks()  # Perbarui daftar tugas dari DB
-            st.success("Tugas berhasil ditambahkan ke database!")
+            task_id = get_db().save_task(new_task)  # Langsung ditambahkan ke data bersama, tanpa memuat ulang tabel
+            st.session_state.pop('task_page_filters', None)  # Hitung ulang jumlah tugas di tabel tugas
+            st.success(f"Tugas berhasil ditambahkan ke database! (ID {task_id})")
 
             if milestone_name and milestone_date:
-                save_milestone(wbs_id, milestone_name, milestone_date)
-                st.session_state.milestones = load_milestones()  # Perbarui daftar milestone dari DB
+                get_db().save_milestone(wbs_id, milestone_name, milestone_date)
                 st.success("Milestone berhasil ditambahkan ke database!")
 
             # Reset session state untuk form baru
             st.session_state.default_task_name = task_name_from_wbs
             st.session_state.default_description = description_from_wbs
 
+# --- Impor Massal dari CSV/Excel ---
+elif menu_selection == "Impor Massal":
+    st.header("Impor Massal Tugas dan Milestone")
+    st.markdown(
+        f"Kolom wajib: `{'`, `'.join(REQUIRED_COLUMNS)}`. Kolom opsional: `{'`, `'.join(OPTIONAL_COLUMNS)}` "
+        "(nama dan uraian tugas default dari WBS). Bagian, WBS ID dan peran harus sesuai struktur WBS. "
+        "Tanggal harus berformat `yyyy-mm-dd` (misal 2025-01-06)."
+    )
+    template = pd.DataFrame([{
+        'section': "Manajemen Proyek (PMO)", 'wbs_id': "1.1.1", 'task_name': "", 'description': "",
+        'personnel_role': "Project Manager", 'personnel_count': 1, 'start_date': "2025-01-06", 'end_date': "2025-01-10",
+        'milestone_name': "Piagam Disetujui", 'milestone_date': "2025-01-10"
+    }], columns=IMPORT_COLUMNS)
+    st.download_button("📥 Unduh Template CSV", template.to_csv(index=False), "template_impor_wbs.csv", "text/csv")
+
+    file_types = ["csv", "xlsx"] if excel_available() else ["csv"]
+    uploaded_file = st.file_uploader("Pilih file:", type=file_types, key="import_file")
+    if not excel_available():
+        st.caption("File Excel (.xlsx) membutuhkan paket openpyxl; simpan sebagai CSV bila belum terpasang.")
+
+    if uploaded_file is not None:
+        try:
+            df_import = read_task_file(uploaded_file, uploaded_file.name)
+        except (ValueError, ImportError, pd.errors.ParserError) as e:
+            st.error(f"File tidak bisa dibaca: {e}")
+            st.stop()
+
+        missing = missing_columns(df_import)
+        if missing:
+            st.error(f"Kolom wajib tidak ditemukan: {', '.join(missing)}")
+            st.stop()
+
+        st.write(f"{len(df_import)} baris ditemukan. Pratinjau:")
+        st.dataframe(df_import.head(20), hide_index=True)
+        skip_invalid = st.checkbox("Lewati baris yang tidak valid dan impor sisanya", key="import_skip_invalid")
+
+        if st.button("Validasi dan Impor", key="import_button"):
+            # Validasi per potongan baris dengan progres, sebelum apa pun ditulis
+            progress = st.progress(0.0, text="Memvalidasi...")
+            valid_chunks, error_chunks = [], []
+            for rows_done, valid, errors in validate_tasks(df_import, initial_wbs_structure, personnel_roles):
+                valid_chunks.append(valid)
+                error_chunks.append(errors)
+                progress.progress(rows_done / len(df_import), text=f"Memvalidasi... {rows_done}/{len(df_import)} baris")
+            df_valid = pd.concat(valid_chunks) if valid_chunks else pd.DataFrame(columns=IMPORT_COLUMNS)
+            df_errors = pd.concat(error_chunks, ignore_index=True) if error_chunks else pd.DataFrame()
+
+            if not df_errors.empty:
+                st.warning(f"{df_errors['row'].nunique()} baris tidak valid:")
+                st.dataframe(df_errors.rename(columns={'row': 'Baris', 'error': 'Kesalahan'}), hide_index=True)
+
+            if df_valid.empty:
+                progress.empty()
+                st.error("Tidak ada baris valid untuk diimpor.")
+            elif not df_errors.empty and not skip_invalid:
+                progress.empty()
+                st.error("Impor dibatalkan. Perbaiki file atau centang opsi untuk melewati baris tidak valid.")
+            else:
+                # Satu transaksi pendek per potongan agar kunci tulis tidak ditahan lama;
+                # bila gagal, potongan yang sudah tersimpan dihapus lagi
+                try:
+                    for imported in import_tasks(get_db(), df_valid):
+                        progress.progress(imported / len(df_valid), text=f"Mengimpor... {imported}/{len(df_valid)} tugas")
+                except TaskImportError as e:
+                    progress.empty()
+                    if e.committed:
+                        st.error(f"Impor gagal: {e}. {e.committed} tugas sudah tersimpan dan tidak bisa dihapus otomatis; "
+                                 "periksa data sebelum mengunggah ulang.")
+                    else:
+                        st.error(f"Impor gagal: {e}. Tidak ada tugas yang tersimpan, file bisa diunggah ulang.")
+                else:
+                    st.session_state.pop('task_page_filters', None)
+                    milestone_count = int(df_valid['milestone_name'].notna().sum())
+                    st.success(f"{imported} tugas dan {milestone_count} milestone berhasil diimpor ke database!")
+
 # --- Tampilan WBS & Analisis ---
 elif menu_selection == "Lihat WBS & Analisis":
     st.header("WBS, Timeline, dan Analisis Personil")
 
-    if not st.session_state.tasks:
+    # Urutan tabel dan agregasi grafik dihitung di SQLite memakai index; pandas hanya menerima
+    # satu halaman tabel atau baris yang sudah diagregasi, bukan seluruh tabel tugas.
+    df_milestones = get_db().milestones_by_date()
+
+    if get_db().task_count() == 0:
         st.info("Belum ada tugas yang diinputkan. Silakan ke menu 'Input Tugas Baru' untuk menambahkan.")
     else:
-        df_tasks = pd.DataFrame(st.session_state.tasks)
-        df_milestones = pd.DataFrame(st.session_state.milestones)
 
-        # --- Tampilan Tabel Tugas ---
+        # --- Tampilan Tabel Tugas (per halaman, difilter di SQLite) ---
         st.subheader("Daftar Tugas yang Diinput")
-        st.dataframe(df_tasks.sort_values(by=['section', 'wbs_id']))
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            filter_section = st.selectbox("Bagian:", ["Semua", *initial_wbs_structure], key="filter_section")
+        with col2:
+            role_options = personnel_roles.get(filter_section) or sorted({r for roles in personnel_roles.values() for r in roles})
+            filter_role = st.selectbox("Peran:", ["Semua", *dict.fromkeys(role_options)], key="filter_role")
+        with col3:
+            filter_dates = st.date_input("Rentang Tanggal:", value=(), key="filter_dates")
+        with col4:
+            filter_wbs = st.text_input("Prefix WBS (misal: 5.1.*):", key="filter_wbs")
+        task_filters = {
+            "section": None if filter_section == "Semua" else filter_section,
+            "role": None if filter_role == "Semua" else filter_role,
+            "start_date": filter_dates[0] if len(filter_dates) > 0 else None,
+            "end_date": filter_dates[1] if len(filter_dates) > 1 else None,
+            "wbs_prefix": filter_wbs or None
+        }
+        page_size = st.selectbox("Baris per halaman:", [25, DEFAULT_PAGE_SIZE, 100, 250], index=1, key="page_size")
+
+        # Kursor awal setiap halaman yang sudah dibuka; diulang dari awal bila filter berubah.
+        # Jumlah tugas dan rollup Gantt juga hanya dihitung saat itu, bukan di setiap klik halaman.
+        if st.session_state.get('task_page_filters') != (task_filters, page_size):
+            st.session_state.task_page_filters = (task_filters, page_size)
+            st.session_state.task_page_cursors = [None]
+            st.session_state.task_page_total = get_db().task_count(**task_filters)
+            st.session_state.task_timeline = get_db().task_timeline_by_wbs(**task_filters)
+
+        # Ambil satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+        task_page = get_db().task_page(st.session_state.task_page_cursors[-1], page_size + 1, **task_filters)
+        has_next = len(task_page) > page_size
+        task_page = task_page.iloc[:page_size]
+        total_tasks = st.session_state.task_page_total
+        page_number = len(st.session_state.task_page_cursors)
+
+        st.dataframe(task_page, hide_index=True)
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("⬅️ Sebelumnya", disabled=page_number == 1, key="task_page_prev"):
+                st.session_state.task_page_cursors.pop()
+                st.rerun()
+        with col2:
+            st.caption(f"Halaman {page_number} dari {max(1, -(-total_tasks // page_size))} · {total_tasks} tugas")
+        with col3:
+            if st.button("Berikutnya ➡️", disabled=not has_next, key="task_page_next"):
+                last = task_page.iloc[-1]
+                st.session_state.task_page_cursors.append((last['section'], last['wbs_id'], int(last['id'])))
+                st.rerun()
 
         st.markdown("---")
 
         # --- Tampilan Tabel Milestone ---
         st.subheader("Daftar Milestone")
-        st.dataframe(df_milestones.sort_values(by='milestone_date'))
+        st.dataframe(df_milestones)
 
         st.markdown("---")
 
-        # --- Gantt Chart ---
+        # --- Gantt Chart (satu batang per WBS ID, mengikuti filter tabel di atas) ---
         st.subheader("Gantt Chart Proyek")
-        df_tasks['start_date'] = pd.to_datetime(df_tasks['start_date'])
-        df_tasks['end_date'] = pd.to_datetime(df_tasks['end_date'])
-        df_tasks['Gantt Task Name'] = df_tasks['wbs_id'] + ' - ' + df_tasks['task_name']
+        df_timeline = st.session_state.task_timeline
+        wbs_names = {
+            (section, entry["id"]): entry["name"] for section, entries in initial_wbs_structure.items() for entry in entries
+        }
+        df_timeline = df_timeline.assign(
+            start_date=pd.to_datetime(df_timeline['start_date']),
+            end_date=pd.to_datetime(df_timeline['end_date']),
+            wbs_name=[wbs_names.get(key, "") for key in zip(df_timeline['section'], df_timeline['wbs_id'])]
+        )
+        df_timeline['Gantt Task Name'] = df_timeline['wbs_id'] + ' - ' + df_timeline['wbs_name']
 
-        if not df_tasks.empty:
+        if not df_timeline.empty:
             # Buat Gantt Chart dengan px.timeline
             fig_gantt = px.timeline(
-                df_tasks,
+                df_timeline,
                 x_start="start_date",
                 x_end="end_date",
                 y="Gantt Task Name",
                 color="section",
-                hover_name="task_name",
-                hover_data={"wbs_id": True, "description": True, "personnel_role": True, "personnel_count": True, "start_date": "|%Y-%m-%d", "end_date": "|%Y-%m-%d"},
-                title="Timeline Tugas Proyek (Gantt Chart)"
+                hover_name="wbs_name",
+                hover_data={"wbs_id": True, "task_count": True, "personnel_count": True, "start_date": "|%Y-%m-%d", "end_date": "|%Y-%m-%d"},
+                labels={"task_count": "Jumlah Tugas", "personnel_count": "Jumlah Personil"},
+                title="Timeline Tugas Proyek per WBS (Gantt Chart)"
             )
 
             # Tambahkan milestone sebagai garis vertikal dan teks
             if not df_milestones.empty:
-                df_milestones['milestone_date'] = pd.to_datetime(df_milestones['milestone_date'])
+                df_milestones = df_milestones.assign(milestone_date=pd.to_datetime(df_milestones['milestone_date']))
                 for _, milestone in df_milestones.iterrows():
                     fig_gantt.add_vline(
                         x=milestone['milestone_date'].timestamp() * 1000,  # Konversi ke milidetik
@@ -419,30 +502,26 @@ elif menu_selection == "Lihat WBS & Analisis":
 
         # --- Grafik Distribusi Personil ---
         st.subheader("Distribusi Personil Berdasarkan Peran")
-        if 'personnel_role' in df_tasks.columns and not df_tasks.empty:
-            personnel_distribution = df_tasks.groupby('personnel_role')['personnel_count'].sum().reset_index()
-            
-            if not personnel_distribution.empty:
-                fig_personnel = go.Figure(data=[
-                    go.Bar(x=personnel_distribution['personnel_role'], y=personnel_distribution['personnel_count'], marker_color='skyblue')
-                ])
-                fig_personnel.update_layout(
-                    title="Total Jumlah Personil per Peran",
-                    xaxis_title="Peran Personil",
-                    yaxis_title="Jumlah Orang"
-                )
-                st.plotly_chart(fig_personnel, use_container_width=True)
-            else:
-                st.info("Tidak ada data personil untuk divisualisasikan.")
+        personnel_distribution = get_db().personnel_by_role()
+        
+        if not personnel_distribution.empty:
+            fig_personnel = go.Figure(data=[
+                go.Bar(x=personnel_distribution['personnel_role'], y=personnel_distribution['personnel_count'], marker_color='skyblue')
+            ])
+            fig_personnel.update_layout(
+                title="Total Jumlah Personil per Peran",
+                xaxis_title="Peran Personil",
+                yaxis_title="Jumlah Orang"
+            )
+            st.plotly_chart(fig_personnel, use_container_width=True)
         else:
-            st.info("Kolom 'personnel_role' tidak ditemukan atau data kosong.")
+            st.info("Tidak ada data personil untuk divisualisasikan.")
 
         st.markdown("---")
 
         # --- Grafik Tugas per Bagian ---
         st.subheader("Jumlah Tugas per Bagian Utama")
-        tasks_per_section = df_tasks['section'].value_counts().reset_index()
-        tasks_per_section.columns = ['Section', 'Number of Tasks']
+        tasks_per_section = get_db().task_count_by_section()
 
         if not tasks_per_section.empty:
             fig_tasks_section = go.Figure(data=[
@@ -457,13 +536,8 @@ elif menu_selection == "Lihat WBS & Analisis":
 
         # Optional: Clear all tasks and milestones
         if st.button("Hapus Semua Tugas dan Milestone"):
-            conn = sqlite3.connect('wbs_database.db')
-            c = conn.cursor()
-            c.execute("DELETE FROM tasks")
-            c.execute("DELETE FROM milestones")
-            conn.commit()
-            conn.close()
-            st.session_state.tasks = []
-            st.session_state.milestones = []
+            get_db().delete_all()
+            st.session_state.pop('task_page_cursors', None)
+            st.session_state.pop('task_page_filters', None)
             st.success("Semua tugas dan milestone telah dihapus dari database!")
             st.rerun()
\ No newline at end of file
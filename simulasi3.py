@@ -5,17 +5,38 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import datetime
+import os
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import math
 
-# Configuration
-st.set_page_config(
-    page_title="Simulasi Proyek Digital - Dinamis",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
+from simulasi_batch import (
+    CUSTOM_COST_LABEL, DEFAULT_COST_LABEL, MONTE_CARLO_MODE, PATH_MODE, build_grid, run_grid
 )
+from simulasi_cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_DISK_BYTES, DEFAULT_MAX_ENTRIES, SimulationCache, input_hash
+from simulasi_charts import band_trace, bar_trace, line_trace, trace_point_budget, use_webgl
+from simulasi_dcf import cash_flows_from_frame, dcf_metrics, first_positive_year, npv
+from simulasi_distributions import DISTRIBUTION_FIELDS, DISTRIBUTION_PARAMS, Distribution, empirical_from_csv
+from simulasi_engine import (
+    COST_COLUMNS, DEFAULT_RAMP_UP_MONTHS, MODEL_VERSION, draw_risk_factors, monthly_cash_summary, project_params,
+    simulate_monthly_arrays, simulate_project
+)
+from simulasi_goalseek import GOAL_SEEK_FIELDS, RATE_BOUNDS, RISK_MODES, goal_seek
+from simulasi_montecarlo import (
+    ABSOLUTE_TOLERANCE_METRICS, CONVERGENCE_METRICS, DEFAULT_TOLERANCE, DEFAULT_TRIALS, MonteCarloResult
+)
+from simulasi_optimizer import OBJECTIVES, optimize_portfolio, simulate_outcomes
+from simulasi_portfolio_risk import (
+    DEFAULT_MACRO_LOADING, DEFAULT_PROJECT_CORRELATION, correlation_matrix, run_portfolio_risk
+)
+from simulasi_runs import RUN_DB_PATH, RunStore, StoredBands, diff_bands, diff_runs
+from simulasi_sampling import available_samplers
+from simulasi_scenarios import (
+    DEFAULT_SATURATION_FLOOR, DEFAULT_SATURATION_RATE, Scenario, get_scenario, scenario_curves, scenario_from_dict,
+    scenario_names
+)
+from simulasi_sensitivity import run_sensitivity, tornado_table
+from simulasi_sketch import DEFAULT_SKETCH_K, MonteCarloSketch, rank_error
 
 @dataclass
 class OperationalCosts:
@@ -154,11 +175,12 @@ PROJECTS = {
 }
 
 class ProjectSimulator:
-    def __init__(self, project_data: ProjectData, scenario: str = "optimistic", custom_op_costs: OperationalCosts = None, years: int = 10):
+    def __init__(self, project_data: ProjectData, scenario: str = "optimistic", custom_op_costs: OperationalCosts = None, years: int = 10, seed: Optional[int] = None):
         self.project = project_data
         self.scenario = scenario
         self.years = years
         self.custom_op_costs = custom_op_costs
+        self.seed = seed
         
     def get_operational_costs(self) -> OperationalCosts:
         """Get operational costs (custom or default)"""
@@ -189,113 +211,78 @@ class ProjectSimulator:
         
     def apply_scenario_adjustments(self, base_value: float, year: int) -> float:
         """Apply scenario-based adjustments"""
-        scenario_multipliers = {
-            "pessimistic": {
-                "growth": 0.7,
-                "risk": 1.5,
-                "competition": 1.3
-            },
-            "realistic": {
-                "growth": 0.85,
-                "risk": 1.2,
-                "competition": 1.1
-            },
-            "optimistic": {
-                "growth": 1.0,
-                "risk": 0.8,
-                "competition": 0.9
-            }
-        }
-        
-        multiplier = scenario_multipliers[self.scenario]
+        multiplier = get_scenario(self.scenario)
+        saturation, time_fraction = scenario_curves(multiplier, self.years)
         
-        # Apply market saturation effect (diminishing returns)
-        saturation_factor = 1 - (year * 0.05)  # 5% reduction per year
-        saturation_factor = max(saturation_factor, 0.6)  # Minimum 60% of original
-        
-        # Apply competition impact (increases over time)
-        competition_factor = 1 - (self.project.competition_impact * multiplier["competition"] * (year / self.years))
+        # Market saturation (diminishing returns) and competition impact (increases over time)
+        saturation_factor = saturation[year - 1]
+        competition_factor = 1 - (self.project.competition_impact * multiplier.competition * time_fraction[year - 1])
         
         # Apply market risk
-        risk_factor = 1 - (self.project.market_risk_factor * multiplier["risk"] * np.random.uniform(0.5, 1.5))
+        risk_factor = 1 - (self.project.market_risk_factor * multiplier.risk * np.random.uniform(0.5, 1.5))
         
-        adjusted_value = base_value * multiplier["growth"] * saturation_factor * competition_factor * max(risk_factor, 0.3)
+        adjusted_value = base_value * multiplier.growth * saturation_factor * competition_factor * max(risk_factor, 0.3)
         
         return max(adjusted_value, base_value * 0.3)  # Minimum 30% of base value
     
     def calculate_yearly_metrics(self) -> pd.DataFrame:
-        """Calculate financial metrics for each year"""
-        results = []
-        
-        for year in range(1, self.years + 1):
-            # Revenue calculation with growth
-            base_revenue = self.project.annual_revenue_year1 * ((1 + self.project.annual_growth_rate) ** (year - 1))
-            adjusted_revenue = self.apply_scenario_adjustments(base_revenue, year)
-            
-            # Detailed operational costs
-            total_operational_cost = self.calculate_total_operational_cost(year)
-            op_costs = self.get_operational_costs()
-            inflation_factor = (1.035 ** year)
-            growth_factor = (1 + (self.project.annual_growth_rate * 0.3)) ** year
-            
-            # Breakdown of operational costs
-            personnel_cost = op_costs.personnel_cost * growth_factor * inflation_factor
-            infrastructure_cost = op_costs.infrastructure_cost * growth_factor * inflation_factor
-            marketing_cost = op_costs.marketing_cost * inflation_factor
-            maintenance_cost = op_costs.maintenance_cost * inflation_factor
-            licensing_cost = op_costs.licensing_cost * inflation_factor
-            legal_compliance_cost = op_costs.legal_compliance_cost * inflation_factor
-            office_utilities_cost = op_costs.office_utilities_cost * inflation_factor
-            rd_cost = op_costs.rd_cost * inflation_factor
-            
-            # Additional yearly investments (maintenance, upgrades)
-            yearly_investment = self.project.initial_investment * 0.05 if year > 1 else 0
-            
-            # Net profit
-            net_profit = adjusted_revenue - total_operational_cost - yearly_investment
-            
-            # Cumulative metrics
-            if year == 1:
-                cumulative_investment = self.project.initial_investment + yearly_investment
-                cumulative_revenue = adjusted_revenue
-                cumulative_profit = net_profit - self.project.initial_investment
-                cumulative_op_cost = total_operational_cost
-            else:
-                prev_row = results[-1]
-                cumulative_investment = prev_row["cumulative_investment"] + yearly_investment
-                cumulative_revenue = prev_row["cumulative_revenue"] + adjusted_revenue
-                cumulative_profit = prev_row["cumulative_profit"] + net_profit
-                cumulative_op_cost = prev_row["cumulative_op_cost"] + total_operational_cost
-            
-            # ROI calculation
-            roi = (cumulative_profit / cumulative_investment) * 100 if cumulative_investment > 0 else 0
-            
-            # Payback period
-            payback_achieved = cumulative_profit > 0
-            
-            results.append({
-                "year": year,
-                "revenue": adjusted_revenue,
-                "operational_cost": total_operational_cost,
-                "personnel_cost": personnel_cost,
-                "infrastructure_cost": infrastructure_cost,
-                "marketing_cost": marketing_cost,
-                "maintenance_cost": maintenance_cost,
-                "licensing_cost": licensing_cost,
-                "legal_compliance_cost": legal_compliance_cost,
-                "office_utilities_cost": office_utilities_cost,
-                "rd_cost": rd_cost,
-                "yearly_investment": yearly_investment,
-                "net_profit": net_profit,
-                "cumulative_investment": cumulative_investment,
-                "cumulative_revenue": cumulative_revenue,
-                "cumulative_profit": cumulative_profit,
-                "cumulative_op_cost": cumulative_op_cost,
-                "roi": roi,
-                "payback_achieved": payback_achieved
-            })
-        
-        return pd.DataFrame(results)
+        """Calculate financial metrics for each year (vectorized over all years)"""
+        # With a seed the draws are reproducible and equal to np.random.seed(seed)
+        rng = np.random.RandomState(self.seed) if self.seed is not None else None
+        risk_draws = draw_risk_factors(self.years, rng=rng)
+        return simulate_project(self.project, self.scenario, self.years, self.get_operational_costs(), risk_draws)
+
+# Figures kept in memory for unchanged inputs (each one is a few hundred KB at most)
+CHART_CACHE_SIZE = 64
+
+@st.cache_resource
+def get_simulation_cache() -> SimulationCache:
+    """Process-wide result cache shared by all sessions and reruns.
+
+    Set SIMULASI_CACHE_DIR to also keep results on disk across restarts.
+    SIMULASI_CACHE_MEMORY_MB and SIMULASI_CACHE_DISK_MB bound the two tiers;
+    SIMULASI_CACHE_MAX_AGE_DAYS also drops disk entries unused for that long.
+    """
+    megabyte = 1024 ** 2
+    memory_mb = float(os.environ.get("SIMULASI_CACHE_MEMORY_MB", DEFAULT_MAX_BYTES / megabyte))
+    disk_mb = float(os.environ.get("SIMULASI_CACHE_DISK_MB", DEFAULT_MAX_DISK_BYTES / megabyte))
+    max_age_days = os.environ.get("SIMULASI_CACHE_MAX_AGE_DAYS")
+    return SimulationCache(
+        max_entries=int(os.environ.get("SIMULASI_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+        disk_dir=os.environ.get("SIMULASI_CACHE_DIR"),
+        max_bytes=int(memory_mb * megabyte),
+        max_disk_bytes=int(disk_mb * megabyte),
+        max_age_seconds=float(max_age_days) * 86400 if max_age_days else None
+    )
+
+@st.cache_resource
+def get_chart_cache() -> SimulationCache:
+    """Process-wide cache of built Plotly figures (memory only)"""
+    return SimulationCache(max_entries=CHART_CACHE_SIZE)
+
+def cached_chart(build, *key_parts):
+    """Reuse a figure while the inputs it was built from are unchanged"""
+    return get_chart_cache().get_or_compute(input_hash(*key_parts), build)
+
+@st.cache_resource
+def get_run_store() -> RunStore:
+    """Saved runs on disk (SIMULASI_RUN_DB, default simulasi_runs.db)"""
+    return RunStore(os.environ.get("SIMULASI_RUN_DB", RUN_DB_PATH))
+
+def format_year(year):
+    """Format a payback year, N/A when it is never reached"""
+    return "N/A" if np.isnan(year) else str(int(year))
+
+# Sidebar icons of the built-in scenarios; user-defined scenarios get a neutral one
+SCENARIO_ICONS = {"optimistic": "🟢", "realistic": "🟡", "pessimistic": "🔴"}
+
+def session_scenarios() -> Dict[str, Scenario]:
+    """Configured scenarios plus the ones this browser session defined (those never reach scenarios.json)"""
+    return {**{name: get_scenario(name) for name in scenario_names()}, **st.session_state.get("custom_scenarios", {})}
+
+def format_scenario(name, scenarios: Dict[str, Scenario]):
+    """Scenario label from ``scenarios``, prefixed with its icon"""
+    return f"{SCENARIO_ICONS.get(name, '⚪')} {scenarios[name].label}"
 
 def format_currency(value):
     """Format currency in Indonesian Rupiah"""
@@ -308,6 +295,35 @@ def format_currency(value):
     else:
         return f"Rp {value:,.0f}"
 
+def create_monthly_cash_flow_chart(monthly, project_name, launch_month):
+    """Create monthly revenue vs burn bars with the cumulative cash position"""
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    max_points = trace_point_budget(3)
+    webgl = use_webgl(len(monthly["month"]))
+    
+    fig.add_trace(
+        bar_trace(monthly["month"], monthly["revenue"]/1e9, max_points, name="Revenue", marker_color="green", opacity=0.7),
+        secondary_y=False
+    )
+    fig.add_trace(
+        bar_trace(monthly["month"], monthly["burn"]/1e9, max_points, name="Burn (Biaya - Revenue)", marker_color="red", opacity=0.7),
+        secondary_y=False
+    )
+    fig.add_trace(
+        line_trace(monthly["month"], monthly["cumulative_cash_flow"]/1e9, webgl, max_points,
+                   name="Posisi Kas Kumulatif", mode='lines', line=dict(color="blue")),
+        secondary_y=True
+    )
+    if not np.isnan(launch_month):
+        fig.add_vline(x=launch_month, line_dash="dash", line_color="gray", annotation_text="Launch")
+    
+    fig.update_layout(barmode="overlay", height=450, title_text=f"Arus Kas Bulanan: {project_name}")
+    fig.update_xaxes(title_text="Bulan")
+    fig.update_yaxes(title_text="Per Bulan (Miliar Rp)", secondary_y=False)
+    fig.update_yaxes(title_text="Kumulatif (Miliar Rp)", secondary_y=True)
+    
+    return fig
+
 def create_operational_cost_breakdown_chart(project_df, project_name, years):
     """Create operational cost breakdown chart"""
     fig = make_subplots(
@@ -334,26 +350,27 @@ def create_operational_cost_breakdown_chart(project_df, project_name, years):
         row=1, col=1
     )
     
-    # Cost trend over years (Line chart)
-    for category, column in zip(cost_categories, 
-                               ["personnel_cost", "infrastructure_cost", "marketing_cost", 
-                                "maintenance_cost", "licensing_cost", "legal_compliance_cost",
-                                "office_utilities_cost", "rd_cost"]):
+    # Cost trend over years (Line chart), WebGL and downsampled for long horizons
+    cost_columns = ["personnel_cost", "infrastructure_cost", "marketing_cost", "maintenance_cost",
+                    "licensing_cost", "legal_compliance_cost", "office_utilities_cost", "rd_cost"]
+    max_points = trace_point_budget(len(cost_columns) + 2)
+    webgl = use_webgl(len(project_df) * len(cost_columns))
+    for category, column in zip(cost_categories, cost_columns):
         fig.add_trace(
-            go.Scatter(x=project_df["year"], y=project_df[column]/1e9, 
-                      name=category, mode='lines'),
+            line_trace(project_df["year"], project_df[column]/1e9, webgl, max_points,
+                       name=category, mode='lines'),
             row=1, col=2
         )
     
     # Cost vs Revenue comparison
     fig.add_trace(
-        go.Bar(x=project_df["year"], y=project_df["revenue"]/1e9, name="Revenue", 
-               marker_color="green", opacity=0.7),
+        bar_trace(project_df["year"], project_df["revenue"]/1e9, max_points, name="Revenue", 
+                  marker_color="green", opacity=0.7),
         row=2, col=1
     )
     fig.add_trace(
-        go.Bar(x=project_df["year"], y=project_df["operational_cost"]/1e9, name="Total Op Cost", 
-               marker_color="red", opacity=0.7),
+        bar_trace(project_df["year"], project_df["operational_cost"]/1e9, max_points, name="Total Op Cost", 
+                  marker_color="red", opacity=0.7),
         row=2, col=1
     )
     
@@ -375,6 +392,19 @@ def create_operational_cost_breakdown_chart(project_df, project_name, years):
     
     return fig
 
+def create_cost_pie_chart(cost_breakdown, project_name):
+    """Create the year-1 cost breakdown donut of the input form"""
+    fig = go.Figure(data=[go.Pie(
+        labels=list(cost_breakdown.keys()),
+        values=list(cost_breakdown.values()),
+        hole=0.4
+    )])
+    fig.update_layout(
+        title=f"Breakdown Biaya Operasional - {project_name}",
+        height=400
+    )
+    return fig
+
 def create_operational_cost_input_form(project_key: str, project_name: str) -> Tuple[OperationalCosts, float]:
     """Create input form for operational costs and initial investment"""
     st.subheader(f"💰 Konfigurasi Biaya: {project_name}")
@@ -495,14 +525,9 @@ def create_operational_cost_input_form(project_key: str, project_name: str) -> T
         "R&D": rd_cost
     }
     
-    fig_breakdown = go.Figure(data=[go.Pie(
-        labels=list(cost_breakdown.keys()),
-        values=list(cost_breakdown.values()),
-        hole=0.4
-    )])
-    fig_breakdown.update_layout(
-        title=f"Breakdown Biaya Operasional - {project_name}",
-        height=400
+    fig_breakdown = cached_chart(
+        lambda: create_cost_pie_chart(cost_breakdown, project_name),
+        "cost_pie", project_name, cost_breakdown
     )
     st.plotly_chart(fig_breakdown, use_container_width=True)
     
@@ -517,8 +542,98 @@ def create_operational_cost_input_form(project_key: str, project_name: str) -> T
         rd_cost=rd_cost
     ), initial_investment
 
-def create_revenue_chart(data_dict, years):
-    """Create revenue comparison chart"""
+# Monte Carlo trial limits; beyond MAX_IN_MEMORY_TRIALS only streaming summaries stay small
+MAX_IN_MEMORY_TRIALS = 100_000
+MAX_STREAMING_TRIALS = 1_000_000
+
+# The correlated portfolio risk keeps every trial's path, so it runs on at most this many
+MAX_RISK_TRIALS = 100_000
+
+SAMPLER_LABELS = {
+    "random": "Pseudo-random",
+    "latin_hypercube": "Latin Hypercube",
+    "sobol": "Sobol",
+    "halton": "Halton"
+}
+
+CONVERGENCE_METRIC_LABELS = {
+    "p50_profit": "Profit Kumulatif P50",
+    "p5_profit": "Profit Kumulatif P5",
+    "p95_profit": "Profit Kumulatif P95",
+    "payback_probability": "Probabilitas Payback"
+}
+
+DISTRIBUTION_LABELS = {
+    "normal": "Normal",
+    "lognormal": "Lognormal",
+    "triangular": "Triangular",
+    "pert": "PERT",
+    "empirical": "Empiris (CSV)"
+}
+
+def create_distribution_input_form(project_keys: List[str]) -> Dict[str, Dict[str, Distribution]]:
+    """Sidebar editor for Monte Carlo input distributions, kept in session state"""
+    distributions = st.session_state.setdefault("input_distributions", {})
+    if not project_keys:
+        return {}
+    
+    with st.sidebar.expander("🎲 Distribusi Input (Monte Carlo)"):
+        project_key = st.selectbox(
+            "Proyek:", project_keys, format_func=lambda x: PROJECTS[x].name, key="distribution_project"
+        )
+        field = st.selectbox(
+            "Input:", DISTRIBUTION_FIELDS, format_func=lambda x: INPUT_FIELD_LABELS.get(x, x), key="distribution_field"
+        )
+        kind = st.selectbox(
+            "Distribusi:", list(DISTRIBUTION_PARAMS), format_func=lambda x: DISTRIBUTION_LABELS[x], key="distribution_kind"
+        )
+        
+        # Defaults around the project's current value
+        base_value = float(project_params(PROJECTS[project_key])[field])
+        defaults = {
+            "mean": base_value, "std": abs(base_value) * 0.1,
+            "low": base_value * 0.8, "mode": base_value, "high": base_value * 1.2
+        }
+        value_format = "%.4f" if abs(base_value) < 10 else "%.0f"
+        
+        params = {}
+        uploaded_csv = None
+        if kind == "empirical":
+            uploaded_csv = st.file_uploader("CSV Data Historis", type="csv", key=f"distribution_csv_{project_key}_{field}")
+            csv_column = st.text_input("Kolom (kosong = kolom numerik pertama)", key="distribution_csv_column")
+        for name in DISTRIBUTION_PARAMS[kind]:
+            params[name] = st.number_input(
+                name, value=defaults[name], format=value_format, key=f"distribution_{project_key}_{field}_{name}"
+            )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Terapkan", key="distribution_apply"):
+                # Cost lines cannot go negative
+                lower = 0.0 if field in COST_COLUMNS else None
+                try:
+                    if kind == "empirical":
+                        if uploaded_csv is None:
+                            raise ValueError("upload a CSV file first")
+                        distribution = empirical_from_csv(uploaded_csv, csv_column or None, lower=lower)
+                    else:
+                        distribution = Distribution(kind, params, lower=lower)
+                except (ValueError, KeyError) as e:
+                    st.error(f"Distribusi tidak valid: {e}")
+                else:
+                    distributions.setdefault(project_key, {})[field] = distribution
+        with col2:
+            if st.button("Hapus", key="distribution_remove"):
+                distributions.get(project_key, {}).pop(field, None)
+        
+        for key in project_keys:
+            for name, distribution in distributions.get(key, {}).items():
+                st.caption(f"{PROJECTS[key].name} · {INPUT_FIELD_LABELS.get(name, name)}: {DISTRIBUTION_LABELS[distribution.kind]} (mean {distribution.mean():,.4g})")
+    
+    return {key: dict(distributions[key]) for key in project_keys if distributions.get(key)}
+
+def create_revenue_chart(data_dict, years, projects=PROJECTS):
+    """Create revenue comparison chart (``projects`` maps the keys of ``data_dict`` to their ProjectData)"""
     fig = make_subplots(
         rows=2, cols=2,
         subplot_titles=(f"Revenue Growth Over {years} Years", f"Cumulative Profit Over {years} Years", 
@@ -529,39 +644,43 @@ def create_revenue_chart(data_dict, years):
     
     colors = px.colors.qualitative.Set1
     
+    # One payload budget for the whole figure; WebGL once the SVG would get heavy
+    max_points = trace_point_budget(4 * len(data_dict))
+    webgl = use_webgl(4 * sum(len(df) for df in data_dict.values()))
+    
     for i, (project_key, df) in enumerate(data_dict.items()):
-        project_name = PROJECTS[project_key].name
+        project_name = projects[project_key].name
         color = colors[i % len(colors)]
         
         # Revenue Growth
         fig.add_trace(
-            go.Scatter(x=df["year"], y=df["revenue"]/1e9, name=f"{project_name} - Revenue",
-                      line=dict(color=color), legendgroup=project_name),
+            line_trace(df["year"], df["revenue"]/1e9, webgl, max_points, name=f"{project_name} - Revenue",
+                       line=dict(color=color), legendgroup=project_name),
             row=1, col=1
         )
         
         # Cumulative Profit
         fig.add_trace(
-            go.Scatter(x=df["year"], y=df["cumulative_profit"]/1e9, name=f"{project_name} - Profit",
-                      line=dict(color=color, dash="dash"), legendgroup=project_name,
-                      showlegend=False),
+            line_trace(df["year"], df["cumulative_profit"]/1e9, webgl, max_points, name=f"{project_name} - Profit",
+                       line=dict(color=color, dash="dash"), legendgroup=project_name,
+                       showlegend=False),
             row=1, col=2
         )
         
         # ROI Progression
         fig.add_trace(
-            go.Scatter(x=df["year"], y=df["roi"], name=f"{project_name} - ROI",
-                      line=dict(color=color, dash="dot"), legendgroup=project_name,
-                      showlegend=False),
+            line_trace(df["year"], df["roi"], webgl, max_points, name=f"{project_name} - ROI",
+                       line=dict(color=color, dash="dot"), legendgroup=project_name,
+                       showlegend=False),
             row=2, col=1
         )
         
         # Investment vs Revenue (Cumulative)
         fig.add_trace(
-            go.Scatter(x=df["cumulative_investment"]/1e9, y=df["cumulative_revenue"]/1e9,
-                      mode='markers+lines', name=f"{project_name} - Inv vs Rev",
-                      marker=dict(color=color), legendgroup=project_name,
-                      showlegend=False),
+            line_trace(df["cumulative_investment"]/1e9, df["cumulative_revenue"]/1e9, webgl, max_points,
+                       mode='markers+lines', name=f"{project_name} - Inv vs Rev",
+                       marker=dict(color=color), legendgroup=project_name,
+                       showlegend=False),
             row=2, col=2
         )
     
@@ -580,21 +699,78 @@ def create_revenue_chart(data_dict, years):
     
     return fig
 
-def create_portfolio_summary(data_dict, years):
-    """Create portfolio summary metrics"""
+INPUT_FIELD_LABELS = {
+    "initial_investment": "Investasi Awal",
+    "annual_revenue_year1": "Revenue Tahun 1",
+    "annual_growth_rate": "Growth Rate",
+    "operational_cost_rate": "Operational Cost Rate",
+    "development_months": "Periode Development",
+    "market_risk_factor": "Market Risk",
+    "competition_impact": "Dampak Kompetisi",
+    "personnel_cost": "Biaya SDM",
+    "infrastructure_cost": "Infrastruktur IT",
+    "marketing_cost": "Marketing & Sales",
+    "maintenance_cost": "Maintenance & Support",
+    "licensing_cost": "Lisensi Software",
+    "legal_compliance_cost": "Legal & Compliance",
+    "office_utilities_cost": "Kantor & Utilitas",
+    "rd_cost": "Research & Development"
+}
+
+SENSITIVITY_METRIC_LABELS = {
+    "cumulative_profit": lambda years: f"{years}-Year Profit",
+    "npv": lambda years: "NPV",
+    "roi": lambda years: "Final ROI (%)"
+}
+
+GOAL_METRIC_LABELS = {
+    "payback_year": "Payback Year",
+    "roi": "Final ROI (%)",
+    "npv": "NPV",
+    "cumulative_profit": "Cumulative Profit"
+}
+
+RISK_MODE_LABELS = {
+    "seed": "Seed tetap (sama dengan path di atas)",
+    "median": "Median atas trial"
+}
+
+def create_tornado_chart(tornado_df, project_name, metric_label, change):
+    """Create tornado chart of metric swings for a ±change perturbation of every input"""
+    labels = [INPUT_FIELD_LABELS.get(field, field) for field in tornado_df["field"]]
+    baseline = tornado_df["baseline"].iloc[0] if not tornado_df.empty else 0
+    scale = 1 if metric_label.startswith("Final ROI") else 1e9
+    
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=labels, x=(tornado_df["low"] - baseline)/scale, base=baseline/scale, orientation="h",
+        name=f"Input -{change*100:.0f}%", marker_color="indianred"
+    ))
+    fig.add_trace(go.Bar(
+        y=labels, x=(tornado_df["high"] - baseline)/scale, base=baseline/scale, orientation="h",
+        name=f"Input +{change*100:.0f}%", marker_color="seagreen"
+    ))
+    
+    fig.update_layout(
+        barmode="overlay",
+        height=max(400, 30 * len(labels)),
+        title_text=f"Tornado Chart: {project_name}",
+        xaxis_title=metric_label if scale == 1 else f"{metric_label} (Miliar Rp)"
+    )
+    
+    return fig
+
+def create_portfolio_summary(data_dict, years, discount_rate=0.08, projects=PROJECTS):
+    """Create portfolio summary metrics (``projects`` maps the keys of ``data_dict`` to their ProjectData)"""
     portfolio_summary = []
     
     for project_key, df in data_dict.items():
-        project = PROJECTS[project_key]
+        project = projects[project_key]
         final_year = df.iloc[-1]
         
-        # Calculate payback period
-        payback_year = None
-        for _, row in df.iterrows():
-            if row["cumulative_profit"] > 0:
-                payback_year = str(row["year"])
-                break
-        payback_year = payback_year if payback_year else "N/A"
+        # Calculate payback period and discounted cash-flow metrics
+        payback_year = first_positive_year(df["cumulative_profit"].to_numpy(), df["year"].to_numpy())
+        dcf = dcf_metrics(cash_flows_from_frame(df), discount_rate)
         
         portfolio_summary.append({
             "Project": project.name,
@@ -602,13 +778,203 @@ def create_portfolio_summary(data_dict, years):
             f"{years}-Year Revenue": final_year["cumulative_revenue"],
             f"{years}-Year Profit": final_year["cumulative_profit"],
             f"Final ROI (%)": final_year["roi"],
-            "Payback Period (Years)": payback_year,
-            "Average Annual Revenue": final_year["cumulative_revenue"] / years
+            "Payback Period (Years)": format_year(payback_year),
+            "Average Annual Revenue": final_year["cumulative_revenue"] / years,
+            "NPV": float(dcf["npv"]),
+            "IRR (%)": float(dcf["irr"]) * 100,
+            "Discounted Payback (Years)": format_year(dcf["discounted_payback_year"]),
+            "Profitability Index": float(dcf["profitability_index"])
         })
     
     return pd.DataFrame(portfolio_summary)
 
+def format_portfolio_summary(portfolio_df, years):
+    """Format the portfolio summary for display"""
+    display_df = portfolio_df.copy()
+    for col in ["Initial Investment", f"{years}-Year Revenue", f"{years}-Year Profit", "Average Annual Revenue", "NPV"]:
+        display_df[col] = display_df[col].apply(format_currency)
+    display_df["IRR (%)"] = display_df["IRR (%)"].apply(lambda x: "N/A" if np.isnan(x) else f"{x:.1f}%")
+    display_df["Profitability Index"] = display_df["Profitability Index"].apply(lambda x: "N/A" if np.isnan(x) else f"{x:.2f}")
+    return display_df
+
+def create_scenario_comparison(grid_results, years, scenarios: Dict[str, Scenario]):
+    """Create final-year comparison table for every project x scenario x cost variant"""
+    comparison = []
+    
+    for (project_key, scenario, cost_label, mode), df in grid_results.items():
+        if mode != PATH_MODE:
+            continue
+        final_year = df.iloc[-1]
+        comparison.append({
+            "Project": PROJECTS[project_key].name,
+            "Skenario": scenarios[scenario].label,
+            "Biaya": "Kustom" if cost_label == CUSTOM_COST_LABEL else "Default",
+            f"{years}-Year Revenue": final_year["cumulative_revenue"],
+            f"{years}-Year Profit": final_year["cumulative_profit"],
+            "Final ROI (%)": final_year["roi"]
+        })
+    
+    return pd.DataFrame(comparison).sort_values(["Project", "Biaya", "Skenario"], ignore_index=True)
+
+def create_monte_carlo_summary(monte_carlo_data: Dict[str, Union[MonteCarloResult, MonteCarloSketch]], years, discount_rate=0.08):
+    """Create P5/P50/P95 summary table of the final year for every project (full trials or sketches)"""
+    summary = []
+    
+    for project_key, result in monte_carlo_data.items():
+        final_bands = result.percentile_bands().iloc[-1]
+        payback_probability = result.payback_probability()
+        dcf = result.dcf_summary(discount_rate)
+        
+        summary.append({
+            "Project": PROJECTS[project_key].name,
+            f"Revenue Tahun {years} (P5 / P50 / P95)": " / ".join(
+                format_currency(final_bands[f"revenue_p{p}"]) for p in (5, 50, 95)
+            ),
+            f"{years}-Year Profit (P5 / P50 / P95)": " / ".join(
+                format_currency(final_bands[f"cumulative_profit_p{p}"]) for p in (5, 50, 95)
+            ),
+            "ROI (P5 / P50 / P95)": " / ".join(
+                f"{final_bands[f'roi_p{p}']:.1f}%" for p in (5, 50, 95)
+            ),
+            f"Probabilitas Payback Tahun {years}": f"{payback_probability.iloc[-1]*100:.1f}%",
+            "NPV (P5 / P50 / P95)": " / ".join(format_currency(value) for value in dcf["npv_percentiles"]),
+            "Probabilitas NPV > 0": f"{dcf['npv_positive_probability']*100:.1f}%",
+            "IRR P50": f"{dcf['irr_median']*100:.1f}%" if np.isfinite(dcf["irr_median"]) else "N/A"
+        })
+    
+    return pd.DataFrame(summary)
+
+def create_monte_carlo_chart(monte_carlo_data: Dict[str, MonteCarloResult], years):
+    """Create P5-P95 band chart for cumulative profit and payback probability"""
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=(f"Cumulative Profit P5-P95 ({years} Tahun)", "Probabilitas Payback per Tahun")
+    )
+    
+    colors = px.colors.qualitative.Set1
+    
+    # Bands are one filled polygon per project, so the payload does not grow with the trials
+    max_points = trace_point_budget(3 * len(monte_carlo_data))
+    webgl = use_webgl(4 * len(monte_carlo_data) * years)
+    
+    for i, (project_key, result) in enumerate(monte_carlo_data.items()):
+        project_name = PROJECTS[project_key].name
+        color = colors[i % len(colors)]
+        bands = result.percentile_bands()
+        
+        fig.add_trace(
+            band_trace(bands["year"], bands["cumulative_profit_p5"]/1e9, bands["cumulative_profit_p95"]/1e9,
+                       webgl, max_points, fillcolor=color, opacity=0.2, legendgroup=project_name,
+                       showlegend=False),
+            row=1, col=1
+        )
+        fig.add_trace(
+            line_trace(bands["year"], bands["cumulative_profit_p50"]/1e9, webgl, max_points,
+                       name=f"{project_name} - P50", line=dict(color=color), legendgroup=project_name),
+            row=1, col=1
+        )
+        
+        payback_probability = result.payback_probability()
+        fig.add_trace(
+            line_trace(payback_probability.index, payback_probability.values*100, webgl, max_points,
+                       name=f"{project_name} - Payback", line=dict(color=color, dash="dot"),
+                       legendgroup=project_name, showlegend=False),
+            row=1, col=2
+        )
+    
+    fig.update_xaxes(title_text="Tahun")
+    fig.update_yaxes(title_text="Cumulative Profit (Miliar Rp)", row=1, col=1)
+    fig.update_yaxes(title_text="Probabilitas (%)", range=[0, 100], row=1, col=2)
+    fig.update_layout(height=450, title_text="Distribusi Hasil Monte Carlo")
+    
+    return fig
+
+def render_run_history(discount_rate):
+    """Reopen or compare saved runs from the run store without resimulating"""
+    store = get_run_store()
+    runs = store.list_runs()
+    if runs.empty:
+        return
+    
+    st.header("📚 Riwayat Run Tersimpan")
+    labels = {row.run_id: f"{row.name} ({row.created_at})" for row in runs.itertuples()}
+    col1, col2 = st.columns(2)
+    with col1:
+        run_a = st.selectbox("Buka Run:", list(labels), format_func=labels.get, key="history_run_a")
+    with col2:
+        run_b = st.selectbox(
+            "Bandingkan dengan:", [None, *labels], format_func=lambda x: "-" if x is None else labels[x],
+            key="history_run_b"
+        )
+    
+    _, settings = store.load_inputs(run_a)
+    years = settings["years"]
+    
+    def shown_cells(results):
+        """Project entries of the scenario and cost set the run was displayed with"""
+        return {
+            project_key: value for (project_key, run_scenario, cost_label), value in results.items()
+            if run_scenario == settings["scenario"] and cost_label == settings["cost_label"] and project_key in PROJECTS
+        }
+    
+    data = shown_cells(store.load_results(run_a))
+    bands_a = store.load_bands(run_a)
+    monte_carlo_data = {project_key: StoredBands(bands) for project_key, bands in shown_cells(bands_a).items()}
+    st.subheader(f"Run {labels[run_a]}")
+    st.plotly_chart(
+        cached_chart(lambda: create_revenue_chart(data, years), "run_revenue", run_a),
+        use_container_width=True
+    )
+    st.dataframe(
+        format_portfolio_summary(create_portfolio_summary(data, years, discount_rate), years),
+        use_container_width=True
+    )
+    if monte_carlo_data:
+        st.plotly_chart(
+            cached_chart(lambda: create_monte_carlo_chart(monte_carlo_data, years), "run_monte_carlo", run_a),
+            use_container_width=True,
+            key="history_monte_carlo_chart"
+        )
+    
+    if run_b is None or run_b == run_a:
+        return
+    
+    inputs_diff, results_diff = diff_runs(store, run_a, run_b)
+    st.subheader("⚖️ Perbandingan Run")
+    results_diff.insert(0, "Project", results_diff["project_key"].map(lambda key: PROJECTS[key].name if key in PROJECTS else key))
+    display_diff = results_diff.drop(columns="project_key")
+    for col in display_diff.columns:
+        if col.startswith(("cumulative_revenue", "cumulative_profit")):
+            display_diff[col] = display_diff[col].apply(lambda x: "N/A" if np.isnan(x) else format_currency(x))
+    st.dataframe(display_diff, use_container_width=True)
+    
+    bands_diff = diff_bands(bands_a, store.load_bands(run_b))
+    if not bands_diff.empty:
+        st.write("**Monte Carlo (tahun terakhir):**")
+        bands_diff.insert(0, "Project", bands_diff["project_key"].map(lambda key: PROJECTS[key].name if key in PROJECTS else key))
+        display_bands = bands_diff.drop(columns="project_key")
+        for col in display_bands.columns:
+            if col.startswith("cumulative_profit"):
+                display_bands[col] = display_bands[col].apply(lambda x: "N/A" if np.isnan(x) else format_currency(x))
+            elif col.startswith("payback_probability"):
+                display_bands[col] = display_bands[col].apply(lambda x: "N/A" if np.isnan(x) else f"{x:.1%}")
+        st.dataframe(display_bands, use_container_width=True)
+    
+    st.write("**Perbedaan Input:**")
+    if inputs_diff.empty:
+        st.write("Input kedua run identik.")
+    else:
+        st.dataframe(inputs_diff.astype(str), use_container_width=True)
+
 def main():
+    # Configuration (inside main so the simulation core can be imported headless)
+    st.set_page_config(
+        page_title="Simulasi Proyek Digital - Dinamis",
+        page_icon="📊",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    
     st.title("🚀 Simulasi Proyek Digital Portfolio - Dinamis")
     st.markdown("**Analisis Finansial Komprehensif untuk 5 Proyek Digital Strategis**")
     
@@ -626,18 +992,59 @@ def main():
         help="Jumlah tahun untuk menjalankan simulasi proyek"
     )
     
+    # User-defined scenarios, kept for this session only (scenarios.json is edited through the CLI)
+    with st.sidebar.expander("🧩 Skenario Kustom"):
+        st.dataframe(
+            pd.DataFrame([
+                {"Skenario": spec.label, "Growth": spec.growth, "Risk": spec.risk, "Kompetisi": spec.competition}
+                for spec in session_scenarios().values()
+            ]),
+            hide_index=True
+        )
+        custom_scenario_name = st.text_input("ID Skenario", key="custom_scenario_name", help="Contoh: resesi")
+        custom_scenario_label = st.text_input("Nama Tampilan", key="custom_scenario_label")
+        custom_growth = st.number_input("Multiplier Growth", 0.0, 3.0, 0.85, 0.05, key="custom_scenario_growth")
+        custom_risk = st.number_input("Multiplier Risiko", 0.0, 5.0, 1.2, 0.05, key="custom_scenario_risk")
+        custom_competition = st.number_input("Multiplier Kompetisi", 0.0, 5.0, 1.1, 0.05, key="custom_scenario_competition")
+        custom_saturation_rate = st.number_input(
+            "Saturasi per Tahun (%)", 0.0, 20.0, DEFAULT_SATURATION_RATE * 100, 0.5, key="custom_scenario_saturation"
+        ) / 100
+        custom_saturation_floor = st.number_input(
+            "Batas Bawah Saturasi (%)", 0.0, 100.0, DEFAULT_SATURATION_FLOOR * 100, 5.0, key="custom_scenario_floor"
+        ) / 100
+        if st.button("➕ Tambah Skenario", key="custom_scenario_button"):
+            custom_name = custom_scenario_name.strip()
+            if not custom_name:
+                st.error("ID skenario wajib diisi")
+            elif custom_name in scenario_names():
+                st.error(f"ID '{custom_name}' sudah dipakai skenario bawaan; pilih ID lain")
+            else:
+                try:
+                    custom_spec = scenario_from_dict(custom_name, {
+                        "label": custom_scenario_label.strip() or custom_name,
+                        "growth": custom_growth,
+                        "risk": custom_risk,
+                        "competition": custom_competition,
+                        "saturation_rate": custom_saturation_rate,
+                        "saturation_floor": custom_saturation_floor
+                    })
+                except ValueError as e:
+                    st.error(f"Skenario tidak valid: {e}")
+                else:
+                    st.session_state.setdefault("custom_scenarios", {})[custom_name] = custom_spec
+                    st.success(f"Skenario '{custom_name}' ditambahkan untuk sesi ini")
+    
     # Scenario selection
+    available_scenarios = session_scenarios()
+    scenario_options = list(available_scenarios)
     scenario = st.sidebar.selectbox(
         "Pilih Skenario:",
-        ["optimistic", "realistic", "pessimistic"],
-        index=1,
-        format_func=lambda x: {
-            "optimistic": "🟢 Optimis",
-            "realistic": "🟡 Realistis",
-            "pessimistic": "🔴 Pesimis"
-        }[x],
+        scenario_options,
+        index=scenario_options.index("realistic") if "realistic" in scenario_options else 0,
+        format_func=lambda name: format_scenario(name, available_scenarios),
         key="scenario_select"
     )
+    scenario_model = available_scenarios[scenario]
     
     # Project selection
     st.sidebar.subheader("Pilih Proyek untuk Analisis:")
@@ -654,6 +1061,102 @@ def main():
         inflation_rate = st.slider("Tingkat Inflasi (%)", 0.0, 10.0, 3.5, key="inflation_slider") / 100
         tax_rate = st.slider("Tingkat Pajak (%)", 0.0, 30.0, 22.0, key="tax_slider") / 100
         discount_rate = st.slider("Discount Rate (%)", 0.0, 15.0, 8.0, key="discount_slider") / 100
+        random_seed = st.number_input(
+            "Random Seed",
+            min_value=0,
+            value=42,
+            step=1,
+            key="random_seed",
+            help="Seed untuk faktor risiko pasar agar hasil simulasi bisa direproduksi"
+        )
+        monthly_enabled = st.checkbox(
+            "Mode Bulanan (Periode Development)",
+            value=False,
+            key="monthly_checkbox",
+            help="Revenue baru mulai setelah periode development proyek, lalu naik bertahap selama masa ramp-up"
+        )
+        ramp_up_input = st.number_input(
+            "Masa Ramp-up (bulan)",
+            min_value=0,
+            max_value=36,
+            value=DEFAULT_RAMP_UP_MONTHS,
+            step=1,
+            key="ramp_up_months",
+            disabled=not monthly_enabled
+        )
+        ramp_up_months = int(ramp_up_input) if monthly_enabled else None
+        monte_carlo_enabled = st.checkbox("Mode Monte Carlo", value=False, key="monte_carlo_checkbox")
+        monte_carlo_trials = st.number_input(
+            "Jumlah Trial Monte Carlo",
+            min_value=100,
+            max_value=MAX_STREAMING_TRIALS,
+            value=DEFAULT_TRIALS,
+            step=1_000,
+            key="monte_carlo_trials",
+            disabled=not monte_carlo_enabled,
+            help="Pada mode adaptif, ini adalah batas maksimum trial"
+        )
+        monte_carlo_sampler = st.selectbox(
+            "Metode Sampling",
+            available_samplers(),
+            format_func=lambda x: SAMPLER_LABELS[x],
+            key="monte_carlo_sampler",
+            disabled=not monte_carlo_enabled
+        )
+        adaptive_enabled = st.checkbox(
+            "Berhenti Otomatis saat Konvergen",
+            value=False,
+            key="adaptive_checkbox",
+            disabled=not monte_carlo_enabled,
+            help="Tambah trial per batch sampai interval kepercayaan 95% metrik target cukup sempit"
+        )
+        adaptive_metric = st.selectbox(
+            "Metrik Konvergensi",
+            list(CONVERGENCE_METRICS),
+            format_func=lambda x: CONVERGENCE_METRIC_LABELS[x],
+            key="adaptive_metric",
+            disabled=not (monte_carlo_enabled and adaptive_enabled)
+        )
+        adaptive_tolerance = st.number_input(
+            "Toleransi (%)",
+            min_value=0.01,
+            max_value=20.0,
+            value=DEFAULT_TOLERANCE * 100,
+            step=0.1,
+            key="adaptive_tolerance",
+            disabled=not (monte_carlo_enabled and adaptive_enabled),
+            help="Lebar setengah interval kepercayaan, relatif terhadap estimasi (absolut untuk probabilitas)"
+        ) / 100
+        streaming_enabled = st.checkbox(
+            "Ringkasan Streaming (Hemat Memori)",
+            value=monte_carlo_trials > MAX_IN_MEMORY_TRIALS,
+            key="streaming_checkbox",
+            disabled=not monte_carlo_enabled or adaptive_enabled,
+            help=(
+                "Trial diringkas per chunk dengan sketch kuantil KLL tanpa menyimpan semua trial; "
+                f"P5/P50/P95 meleset paling banyak ~{rank_error() * 100:.1f} poin persentil"
+            )
+        ) and not adaptive_enabled
+        if monte_carlo_enabled and not streaming_enabled and monte_carlo_trials > MAX_IN_MEMORY_TRIALS:
+            st.warning(f"Lebih dari {MAX_IN_MEMORY_TRIALS:,} trial tanpa ringkasan streaming butuh banyak memori")
+        compare_all_scenarios = st.checkbox(
+            "Bandingkan Semua Skenario",
+            value=False,
+            key="compare_all_checkbox",
+            help="Jalankan grid proyek x skenario x biaya (default/kustom) secara paralel"
+        )
+        parallel_workers = st.number_input(
+            "Jumlah Proses Paralel",
+            min_value=1,
+            max_value=os.cpu_count() or 1,
+            value=os.cpu_count() or 1,
+            step=1,
+            key="parallel_workers"
+        )
+    
+    input_distributions = {}
+    if monte_carlo_enabled:
+        input_distributions = create_distribution_input_form([key for key, selected in selected_projects.items() if selected])
     
     # Operational Cost Configuration
     st.sidebar.subheader("💰 Konfigurasi Biaya")
@@ -689,8 +1192,6 @@ def main():
     
     if st.session_state.simulation_run:
         # Run simulations
-        simulation_data = {}
-        
         progress_bar = st.progress(0.0)
         status_text = st.empty()
         
@@ -700,47 +1201,60 @@ def main():
             st.error("Pilih setidaknya satu proyek untuk menjalankan simulasi.")
             return
         
-        current_selected = 0
-        
-        for project_key, selected in selected_projects.items():
+        # Parameter sets per cost variant; each project gets its own reproducible risk stream
+        project_seeds = {}
+        params_by_cost = {DEFAULT_COST_LABEL: {}}
+        for project_index, (project_key, selected) in enumerate(selected_projects.items()):
             if selected:
-                current_selected += 1
-                status_text.text(f"Memproses {PROJECTS[project_key].name}...")
-                
-                # Create a copy of the project data with custom values if provided
-                project_data = PROJECTS[project_key]
-                custom_costs = None
-                custom_investment = project_data.initial_investment
-                
-                if use_custom_costs and project_key in st.session_state.simulation_custom_costs:
-                    custom_costs, custom_investment = st.session_state.simulation_custom_costs[project_key]
-                
-                # Create modified project data with custom investment
-                modified_project = ProjectData(
-                    name=project_data.name,
-                    initial_investment=custom_investment,
-                    annual_revenue_year1=project_data.annual_revenue_year1,
-                    annual_growth_rate=project_data.annual_growth_rate,
-                    operational_cost_rate=project_data.operational_cost_rate,
-                    development_months=project_data.development_months,
-                    market_risk_factor=project_data.market_risk_factor,
-                    competition_impact=project_data.competition_impact,
-                    operational_costs=project_data.operational_costs
-                )
-                
-                simulator = ProjectSimulator(modified_project, scenario, custom_costs, years=simulation_years)
-                df = simulator.calculate_yearly_metrics()
+                project_seeds[project_key] = int(random_seed) + project_index
+                params_by_cost[DEFAULT_COST_LABEL][project_key] = project_params(PROJECTS[project_key])
                 
-                # Apply inflation and tax adjustments
-                df["revenue"] = df["revenue"] / ((1 + inflation_rate) ** df["year"])
-                df["net_profit"] = df["net_profit"] * (1 - tax_rate)
-                df["cumulative_profit"] = df["cumulative_profit"] * (1 - tax_rate)
-                
-                simulation_data[project_key] = df
-                
-                # Update progress bar
-                progress_value = min(current_selected / total_selected, 1.0)
-                progress_bar.progress(progress_value)
+                if use_custom_costs:
+                    params = dict(params_by_cost[DEFAULT_COST_LABEL][project_key])
+                    if project_key in st.session_state.simulation_custom_costs:
+                        custom_costs, custom_investment = st.session_state.simulation_custom_costs[project_key]
+                        params = project_params(PROJECTS[project_key], custom_costs)
+                        params["initial_investment"] = custom_investment
+                    params_by_cost.setdefault(CUSTOM_COST_LABEL, {})[project_key] = params
+        
+        active_cost_label = CUSTOM_COST_LABEL if use_custom_costs else DEFAULT_COST_LABEL
+        grid_params = params_by_cost if compare_all_scenarios else {active_cost_label: params_by_cost[active_cost_label]}
+        
+        tasks = build_grid(
+            grid_params, list(available_scenarios.values()) if compare_all_scenarios else [scenario_model],
+            simulation_years, project_seeds, inflation_rate, tax_rate, ramp_up_months=ramp_up_months
+        )
+        if monte_carlo_enabled:
+            tasks += build_grid(
+                {active_cost_label: params_by_cost[active_cost_label]}, [scenario_model], simulation_years,
+                project_seeds, inflation_rate, tax_rate, trials=int(monte_carlo_trials),
+                distributions=input_distributions, sampler=monte_carlo_sampler,
+                stop_metric=adaptive_metric if adaptive_enabled else None, stop_tolerance=adaptive_tolerance,
+                sketch_discount_rate=discount_rate if streaming_enabled else None, ramp_up_months=ramp_up_months
+            )
+        
+        def update_progress(done, total, task):
+            status_text.text(f"Memproses {PROJECTS[task.project_key].name} ({task.scenario})...")
+            progress_bar.progress(min(done / total, 1.0))
+        
+        grid_results = run_grid(
+            tasks, max_workers=int(parallel_workers), progress_callback=update_progress,
+            cache=get_simulation_cache()
+        )
+        
+        simulation_data = {
+            project_key: grid_results[(project_key, scenario, active_cost_label, PATH_MODE)]
+            for project_key in project_seeds
+        }
+        # Input hashes of the displayed paths, used to reuse charts of unchanged projects
+        path_cache_keys = {
+            task.project_key: task.cache_key() for task in tasks
+            if task.key == (task.project_key, scenario, active_cost_label, PATH_MODE)
+        }
+        monte_carlo_data = {
+            project_key: grid_results[(project_key, scenario, active_cost_label, MONTE_CARLO_MODE)]
+            for project_key in project_seeds if monte_carlo_enabled
+        }
         
         status_text.text("Simulasi selesai!")
         
@@ -764,18 +1278,16 @@ def main():
                 st.metric("Portfolio ROI", f"{portfolio_roi:.1f}%")
             
             # Charts
-            st.plotly_chart(create_revenue_chart(simulation_data, simulation_years), use_container_width=True)
+            st.plotly_chart(
+                cached_chart(lambda: create_revenue_chart(simulation_data, simulation_years), "revenue", path_cache_keys),
+                use_container_width=True
+            )
             
             # Portfolio Summary Table
             st.subheader("📊 Ringkasan Portfolio")
-            portfolio_df = create_portfolio_summary(simulation_data, simulation_years)
-            
-            # Format the dataframe for display
-            display_df = portfolio_df.copy()
-            for col in ["Initial Investment", f"{simulation_years}-Year Revenue", f"{simulation_years}-Year Profit", "Average Annual Revenue"]:
-                display_df[col] = display_df[col].apply(format_currency)
+            portfolio_df = create_portfolio_summary(simulation_data, simulation_years, discount_rate)
             
-            st.dataframe(display_df, use_container_width=True)
+            st.dataframe(format_portfolio_summary(portfolio_df, simulation_years), use_container_width=True)
             
             # Detailed project analysis
             st.subheader("🔍 Analisis Detail per Proyek")
@@ -805,6 +1317,7 @@ def main():
                     st.write(f"Revenue Tahun {simulation_years}: {format_currency(final_metrics['revenue'])}")
                     st.write(f"Total Profit: {format_currency(final_metrics['cumulative_profit'])}")
                     st.write(f"ROI Final: {final_metrics['roi']:.1f}%")
+                    st.write(f"NPV ({discount_rate*100:.1f}%): {format_currency(float(npv(cash_flows_from_frame(project_df), discount_rate)))}")
                 
                 # Yearly breakdown chart
                 fig_detail = make_subplots(
@@ -848,7 +1361,311 @@ def main():
                     st.dataframe(display_project_df, use_container_width=True)
                 
                 # Operational cost breakdown chart
-                st.plotly_chart(create_operational_cost_breakdown_chart(project_df, project.name, simulation_years), use_container_width=True)
+                st.plotly_chart(
+                    cached_chart(
+                        lambda: create_operational_cost_breakdown_chart(project_df, project.name, simulation_years),
+                        "cost_breakdown", selected_project_key, path_cache_keys[selected_project_key]
+                    ),
+                    use_container_width=True
+                )
+                
+                # Monthly cash flow of the selected project (same risk draws as its path)
+                if monthly_enabled:
+                    st.subheader("📅 Arus Kas Bulanan")
+                    selected_params = params_by_cost[active_cost_label][selected_project_key]
+                    monthly = simulate_monthly_arrays(
+                        selected_params, scenario_model, simulation_years,
+                        draw_risk_factors(simulation_years, rng=np.random.RandomState(project_seeds[selected_project_key])),
+                        ramp_up_months
+                    )
+                    cash_summary = monthly_cash_summary(monthly, selected_params["development_months"])
+                    
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Bulan Launch", format_year(float(cash_summary["launch_month"])))
+                    with col2:
+                        st.metric(
+                            "Kebutuhan Dana Puncak", format_currency(float(cash_summary["peak_funding"])),
+                            help=f"Posisi kas terendah, di bulan {int(cash_summary['peak_funding_month'])}"
+                        )
+                    with col3:
+                        st.metric("Break-even Operasional", f"Bulan {format_year(float(cash_summary['break_even_month']))}")
+                    with col4:
+                        st.metric("Payback", f"Bulan {format_year(float(cash_summary['payback_month']))}")
+                    st.caption(
+                        f"Burn rata-rata selama development: {format_currency(float(cash_summary['development_burn']))}/bulan. "
+                        "Arus kas nominal sebelum pajak; analisis sensitivitas, goal seek, risiko portfolio "
+                        "dan optimasi tetap memakai model tahunan."
+                    )
+                    st.plotly_chart(
+                        create_monthly_cash_flow_chart(monthly, project.name, float(cash_summary["launch_month"])),
+                        use_container_width=True
+                    )
+                
+                # Sensitivity analysis
+                st.subheader("🌪️ Analisis Sensitivitas")
+                col1, col2 = st.columns(2)
+                with col1:
+                    sensitivity_change = st.slider(
+                        "Perubahan Input (±%)", 5, 50, 20, step=5, key="sensitivity_change"
+                    ) / 100
+                with col2:
+                    sensitivity_metric = st.selectbox(
+                        "Metrik Target:",
+                        list(SENSITIVITY_METRIC_LABELS.keys()),
+                        format_func=lambda x: SENSITIVITY_METRIC_LABELS[x](simulation_years),
+                        key="sensitivity_metric"
+                    )
+                
+                sensitivity_df = run_sensitivity(
+                    params_by_cost[active_cost_label], scenario_model, simulation_years, project_seeds,
+                    steps=(-sensitivity_change, -sensitivity_change / 2, sensitivity_change / 2, sensitivity_change),
+                    metric=sensitivity_metric, inflation_rate=inflation_rate, tax_rate=tax_rate,
+                    discount_rate=discount_rate
+                )
+                tornado_df = tornado_table(sensitivity_df, selected_project_key)
+                
+                st.plotly_chart(
+                    create_tornado_chart(tornado_df, project.name, SENSITIVITY_METRIC_LABELS[sensitivity_metric](simulation_years), sensitivity_change),
+                    use_container_width=True
+                )
+                
+                with st.expander("📋 Tabel Elastisitas"):
+                    elasticity_df = tornado_df.sort_values("swing", ascending=False)[["field", "low", "baseline", "high", "elasticity"]].copy()
+                    elasticity_df["field"] = elasticity_df["field"].map(lambda x: INPUT_FIELD_LABELS.get(x, x))
+                    if sensitivity_metric != "roi":
+                        for col in ["low", "baseline", "high"]:
+                            elasticity_df[col] = elasticity_df[col].apply(format_currency)
+                    elasticity_df["elasticity"] = elasticity_df["elasticity"].apply(lambda x: f"{x:.3f}")
+                    st.dataframe(elasticity_df, use_container_width=True)
+                
+                # Goal seek on the same inputs and risk draws as the path above
+                st.subheader("🎯 Goal Seek")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    goal_field = st.selectbox(
+                        "Input yang Dicari:", GOAL_SEEK_FIELDS, format_func=lambda x: INPUT_FIELD_LABELS.get(x, x),
+                        index=GOAL_SEEK_FIELDS.index("annual_revenue_year1"), key="goal_field"
+                    )
+                with col2:
+                    goal_metric = st.selectbox(
+                        "Metrik Target:", list(GOAL_METRIC_LABELS), format_func=GOAL_METRIC_LABELS.get, key="goal_metric"
+                    )
+                with col3:
+                    if goal_metric == "payback_year":
+                        goal_target = st.number_input(
+                            "Payback Paling Lambat Tahun:", min_value=1, max_value=simulation_years,
+                            value=min(4, simulation_years), step=1, key="goal_target_year"
+                        )
+                    elif goal_metric == "roi":
+                        goal_target = st.number_input("Target ROI (%):", value=0.0, step=10.0, key="goal_target_roi")
+                    else:
+                        goal_target = st.number_input(
+                            "Target (Miliar Rp):", value=0.0, step=1.0, key="goal_target_amount"
+                        ) * 1e9
+                goal_risk_mode = st.radio(
+                    "Risiko Pasar:", RISK_MODES, format_func=RISK_MODE_LABELS.get, horizontal=True, key="goal_risk_mode"
+                )
+                
+                goal = goal_seek(
+                    params_by_cost[active_cost_label][selected_project_key], goal_field, goal_metric, goal_target,
+                    scenario_model, simulation_years, seed=project_seeds[selected_project_key], risk_mode=goal_risk_mode,
+                    discount_rate=discount_rate, inflation_rate=inflation_rate, tax_rate=tax_rate
+                )
+                format_input = (lambda x: f"{x*100:.2f}%") if goal_field in RATE_BOUNDS else format_currency
+                format_metric = {
+                    "payback_year": lambda x: f"Tahun {format_year(x)}",
+                    "roi": lambda x: f"{x:.1f}%"
+                }.get(goal_metric, format_currency)
+                if goal.converged:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric(
+                            f"{INPUT_FIELD_LABELS.get(goal_field, goal_field)} yang Dibutuhkan", format_input(goal.value),
+                            delta=f"{(goal.value / goal.base_value - 1) * 100:+.1f}% dari saat ini" if goal.base_value else None
+                        )
+                    with col2:
+                        st.metric("Hasil dengan Nilai Ini", format_metric(goal.achieved))
+                    with col3:
+                        st.metric("Hasil Saat Ini", format_metric(goal.base_achieved))
+                    st.caption(f"{goal.iterations} iterasi, {goal.evaluations} evaluasi kandidat")
+                else:
+                    st.warning(
+                        f"Target tidak tercapai dalam rentang pencarian; nilai terdekat {format_input(goal.value)} "
+                        f"menghasilkan {format_metric(goal.achieved)}"
+                    )
+            
+            if compare_all_scenarios:
+                st.subheader("📦 Perbandingan Skenario & Biaya")
+                comparison_df = create_scenario_comparison(grid_results, simulation_years, available_scenarios)
+                for col in [f"{simulation_years}-Year Revenue", f"{simulation_years}-Year Profit"]:
+                    comparison_df[col] = comparison_df[col].apply(format_currency)
+                st.dataframe(comparison_df, use_container_width=True)
+            
+            if monte_carlo_data:
+                trial_label = "adaptif" if adaptive_enabled else f"{int(monte_carlo_trials):,} trial"
+                st.subheader(f"🎲 Analisis Monte Carlo ({trial_label}, {SAMPLER_LABELS[monte_carlo_sampler]})")
+                st.plotly_chart(create_monte_carlo_chart(monte_carlo_data, simulation_years), use_container_width=True)
+                
+                st.dataframe(create_monte_carlo_summary(monte_carlo_data, simulation_years, discount_rate), use_container_width=True)
+                if streaming_enabled:
+                    st.caption(
+                        f"Persentil dihitung dari sketch kuantil KLL (k={DEFAULT_SKETCH_K}): setiap P-n meleset paling banyak "
+                        f"~{rank_error() * 100:.2f} poin persentil (keyakinan 99%); probabilitas payback dan NPV > 0 eksak."
+                    )
+                for project_key, result in monte_carlo_data.items():
+                    report = result.convergence
+                    if report is None:
+                        continue
+                    status = "konvergen" if report.converged else "batas trial tercapai"
+                    if report.metric in ABSOLUTE_TOLERANCE_METRICS:
+                        interval = f"{report.estimate*100:.1f}% ± {report.half_width*100:.2f}%"
+                    else:
+                        interval = f"{format_currency(report.estimate)} ± {format_currency(report.half_width)}"
+                    st.caption(
+                        f"{PROJECTS[project_key].name}: {CONVERGENCE_METRIC_LABELS[report.metric]} {interval} "
+                        f"setelah {result.trials:,} trial ({status})"
+                    )
+                
+                # Portfolio tail risk with a shared macro shock
+                st.subheader("🔗 Risiko Portfolio Terkorelasi")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    project_correlation = st.slider(
+                        "Korelasi Antar Proyek (%)", -20, 100, int(DEFAULT_PROJECT_CORRELATION * 100), key="risk_correlation"
+                    ) / 100
+                with col2:
+                    macro_loading = st.slider(
+                        "Loading Faktor Makro (%)", 0, 100, int(DEFAULT_MACRO_LOADING * 100), key="risk_macro_loading",
+                        help="Seberapa kuat semua proyek terkena guncangan makro yang sama"
+                    ) / 100
+                with col3:
+                    risk_confidence = st.selectbox(
+                        "Tingkat Keyakinan VaR:", [0.90, 0.95, 0.99], index=1,
+                        format_func=lambda x: f"{x*100:.0f}%", key="risk_confidence"
+                    )
+                
+                risk_keys = list(monte_carlo_data)
+                with st.expander("📐 Matriks Korelasi Antar Proyek"):
+                    names = [PROJECTS[key].name for key in risk_keys]
+                    edited = st.data_editor(
+                        pd.DataFrame(correlation_matrix(risk_keys, project_correlation), index=names, columns=names),
+                        use_container_width=True, key=f"risk_matrix_{project_correlation}"
+                    )
+                # Keep the edited matrix symmetric with a unit diagonal
+                matrix = edited.to_numpy(dtype=float)
+                matrix = (matrix + matrix.T) / 2
+                np.fill_diagonal(matrix, 1.0)
+                
+                risk_params = {key: params_by_cost[active_cost_label][key] for key in risk_keys}
+                risk_args = dict(
+                    trials=min(int(monte_carlo_trials), MAX_RISK_TRIALS), seed=int(random_seed),
+                    inflation_rate=inflation_rate, tax_rate=tax_rate
+                )
+                
+                def portfolio_risk(correlation, loading):
+                    """Cached joint simulation, so a rerun from an unrelated widget does not repeat it"""
+                    risk_key = input_hash(
+                        "portfolio_risk", MODEL_VERSION, risk_params, scenario_model, simulation_years,
+                        correlation, loading, risk_args
+                    )
+                    return get_simulation_cache().get_or_compute(
+                        risk_key,
+                        lambda: run_portfolio_risk(risk_params, scenario_model, simulation_years, correlation, loading, **risk_args)
+                    )
+                
+                try:
+                    correlated = portfolio_risk(matrix, macro_loading)
+                except ValueError as e:
+                    st.error(f"Matriks korelasi tidak valid: {e}")
+                else:
+                    independent = portfolio_risk(np.eye(len(risk_keys)), 0.0)
+                    risk_rows = []
+                    for label, result in [("Terkorelasi", correlated), ("Independen", independent)]:
+                        summary = result.summary(risk_confidence)
+                        risk_rows.append({
+                            "Model": label,
+                            f"Mean Profit {simulation_years}Y": format_currency(summary["mean"]),
+                            f"P50 Profit {simulation_years}Y": format_currency(summary["p50"]),
+                            f"VaR {risk_confidence*100:.0f}%": format_currency(summary["var"]),
+                            f"CVaR {risk_confidence*100:.0f}%": format_currency(summary["cvar"]),
+                            "Probabilitas Rugi": f"{summary['loss_probability']*100:.1f}%"
+                        })
+                    st.dataframe(pd.DataFrame(risk_rows), use_container_width=True)
+                    st.caption(
+                        f"VaR/CVaR atas profit kumulatif portfolio dari {risk_args['trials']:,} trial; "
+                        "nilai positif berarti rugi."
+                    )
+            
+            # Portfolio optimization under a budget
+            st.subheader("🧮 Optimasi Portfolio")
+            total_investment = sum(params["initial_investment"] for params in params_by_cost[active_cost_label].values())
+            col1, col2 = st.columns(2)
+            with col1:
+                optimizer_budget = st.number_input(
+                    "Anggaran Investasi Awal (Rp)",
+                    min_value=0.0,
+                    value=float(total_investment) * 0.6,
+                    step=100_000_000.0,
+                    format="%.0f",
+                    key="optimizer_budget"
+                )
+                optimizer_objective = st.radio(
+                    "Objektif:",
+                    OBJECTIVES,
+                    format_func=lambda x: {
+                        "expected_npv": f"Maksimalkan Expected NPV ({discount_rate*100:.1f}%)",
+                        "p5_profit": f"Maksimalkan Profit Kumulatif P5 ({simulation_years} tahun)"
+                    }[x],
+                    key="optimizer_objective"
+                )
+            with col2:
+                optimizer_risk = st.slider(
+                    "Toleransi Risiko: Maks. Probabilitas Rugi (%)", 0, 100, 20, key="optimizer_risk",
+                    help="Probabilitas maksimum profit kumulatif portfolio negatif di akhir periode"
+                ) / 100
+                optimizer_min_funding = st.slider(
+                    "Pendanaan Minimum per Proyek (%)", 10, 100, 50, step=10, key="optimizer_min_funding",
+                    help="Proyek yang didanai menerima minimal persentase ini dari investasi awalnya"
+                ) / 100
+            
+            if st.button("🧮 Jalankan Optimasi", key="optimizer_button"):
+                outcomes_key = input_hash(
+                    "optimizer", MODEL_VERSION, params_by_cost[active_cost_label], scenario_model, simulation_years,
+                    project_seeds, discount_rate, inflation_rate, tax_rate
+                )
+                outcomes = get_simulation_cache().get_or_compute(
+                    outcomes_key,
+                    lambda: simulate_outcomes(
+                        params_by_cost[active_cost_label], scenario_model, simulation_years, project_seeds,
+                        discount_rate=discount_rate, inflation_rate=inflation_rate, tax_rate=tax_rate
+                    )
+                )
+                plan = optimize_portfolio(
+                    outcomes, optimizer_budget, risk_tolerance=optimizer_risk,
+                    objective=optimizer_objective, min_funding=optimizer_min_funding, seed=int(random_seed)
+                )
+                
+                if plan is None:
+                    st.warning("Tidak ada kombinasi proyek yang memenuhi anggaran dan toleransi risiko.")
+                else:
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Investasi Terpakai", format_currency(plan.investment))
+                    with col2:
+                        st.metric("Expected NPV", format_currency(plan.expected_npv))
+                    with col3:
+                        st.metric("Profit Kumulatif P5", format_currency(plan.p5_profit))
+                    with col4:
+                        st.metric("Probabilitas Rugi", f"{plan.loss_probability*100:.1f}%")
+                    
+                    plan_df = plan.to_frame(outcomes)
+                    plan_df["project_key"] = plan_df["project_key"].map(lambda x: PROJECTS[x].name)
+                    plan_df["funding"] = plan_df["funding"].apply(lambda x: f"{x*100:.0f}%")
+                    for col in ["investment", "expected_npv"]:
+                        plan_df[col] = plan_df[col].apply(format_currency)
+                    plan_df.columns = ["Proyek", "Level Pendanaan", "Investasi", "Expected NPV"]
+                    st.dataframe(plan_df, use_container_width=True)
             
             # Risk Analysis
             st.subheader("⚠️ Analisis Risiko")
@@ -903,6 +1720,20 @@ def main():
                     mime="text/csv",
                     key="download_summary_csv"
                 )
+            
+            # Persist inputs and results under the run's content hash
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                run_name = st.text_input("Nama Run", value="", key="run_name", placeholder="mis. Baseline Q3")
+            with col2:
+                st.write("")
+                save_clicked = st.button("💾 Simpan Run", key="save_run_button")
+            if save_clicked:
+                run_id = get_run_store().save_run(
+                    tasks, grid_results, name=run_name,
+                    settings={"scenario": scenario, "cost_label": active_cost_label, "years": simulation_years}
+                )
+                st.success(f"Run tersimpan dengan ID {run_id[:12]}")
     
     else:
         # Initial state - show project overview
@@ -923,6 +1754,8 @@ def main():
         st.dataframe(overview_df, use_container_width=True)
         
         st.info("👆 Atur parameter di sidebar dan klik 'Jalankan Simulasi' untuk memulai analisis")
+    
+    render_run_history(discount_rate)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
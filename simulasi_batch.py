@@ -0,0 +1,250 @@
+"""Batch runner untuk grid simulasi (proyek x skenario x override biaya).
+
+Setiap sel grid adalah SimulationTask berisi parameter numerik saja, sehingga
+bisa dikirim ke process pool tanpa mengimpor aplikasi Streamlit di worker.
+Hasil dikembalikan segera setelah selesai agar progress bar bisa diperbarui.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from simulasi_cache import SimulationCache, input_hash
+from simulasi_distributions import Distribution
+from simulasi_engine import (
+    COST_INPUTS, MODEL_VERSION, MONTHLY_REVENUE_INPUTS, REVENUE_INPUTS, apply_macro_adjustments,
+    calculate_cost_arrays, calculate_yearly_revenue, combine_metrics, draw_risk_factors, metrics_to_frame,
+    simulate_arrays
+)
+from simulasi_montecarlo import DEFAULT_TOLERANCE, run_adaptive_monte_carlo, run_monte_carlo_params
+from simulasi_sampling import RANDOM_SAMPLER
+from simulasi_scenarios import Scenario, get_scenario
+from simulasi_sketch import run_monte_carlo_sketch
+
+DEFAULT_COST_LABEL = "default"
+CUSTOM_COST_LABEL = "custom"
+
+PATH_MODE = "path"
+MONTE_CARLO_MODE = "monte_carlo"
+
+# (project_key, scenario, cost_label, mode)
+TaskKey = Tuple[str, str, str, str]
+
+
+@dataclass
+class SimulationTask:
+    project_key: str
+    scenario: str
+    cost_label: str
+    params: Dict[str, float]
+    years: int
+    seed: int
+    inflation_rate: float = 0.0
+    tax_rate: float = 0.0
+    trials: Optional[int] = None
+    distributions: Optional[Dict[str, Distribution]] = None
+    sampler: str = RANDOM_SAMPLER
+    # Adaptive Monte Carlo: stop once this metric's CI is within tolerance (trials is then the maximum)
+    stop_metric: Optional[str] = None
+    stop_tolerance: float = DEFAULT_TOLERANCE
+    # Stream the trials into quantile sketches (NPV at this discount rate) instead of keeping them
+    sketch_discount_rate: Optional[float] = None
+    # Definition of ``scenario`` (multipliers and curves), so workers and cache keys follow user-defined scenarios
+    scenario_spec: Optional[Scenario] = None
+    # Monthly engine (development period, then this many months of ramp-up); None keeps the yearly model
+    ramp_up_months: Optional[int] = None
+
+    @property
+    def scenario_model(self) -> Scenario:
+        return self.scenario_spec or get_scenario(self.scenario)
+
+    @property
+    def key(self) -> TaskKey:
+        return (self.project_key, self.scenario, self.cost_label, MONTE_CARLO_MODE if self.trials else PATH_MODE)
+
+    def cache_key(self) -> str:
+        """Hash of everything that determines the result (labels are not part of it)"""
+        return input_hash(
+            MODEL_VERSION, self.params, self.scenario_model, self.years, self.seed,
+            self.inflation_rate, self.tax_rate, self.trials, self.distributions,
+            self.sampler, self.stop_metric, self.stop_tolerance, self.sketch_discount_rate, self.ramp_up_months
+        )
+
+    def revenue_cache_key(self) -> str:
+        """Hash of the inputs of the revenue stage of a single path"""
+        fields = REVENUE_INPUTS if self.ramp_up_months is None else MONTHLY_REVENUE_INPUTS
+        revenue_params = {field: self.params[field] for field in fields}
+        return input_hash(
+            MODEL_VERSION, "revenue", revenue_params, self.scenario_model, self.years, self.seed, self.ramp_up_months
+        )
+
+    def cost_cache_key(self) -> str:
+        """Hash of the inputs of the cost stage (shared by every scenario and seed)"""
+        cost_params = {field: self.params[field] for field in COST_INPUTS}
+        return input_hash(MODEL_VERSION, "costs", cost_params, self.years)
+
+
+def run_task(task: SimulationTask):
+    """Run one grid cell: a seeded single path, or a Monte Carlo batch when ``trials`` is set.
+
+    Sketched Monte Carlo cells return a MonteCarloSketch and always run all
+    ``trials`` (adaptive stopping needs the pooled trial arrays).
+    """
+    if task.trials and task.sketch_discount_rate is not None:
+        return run_monte_carlo_sketch(
+            task.params, task.scenario_model, task.years, task.trials, seed=task.seed,
+            discount_rate=task.sketch_discount_rate, inflation_rate=task.inflation_rate,
+            tax_rate=task.tax_rate, distributions=task.distributions, sampler=task.sampler,
+            ramp_up_months=task.ramp_up_months
+        )
+    if task.trials and task.stop_metric:
+        return run_adaptive_monte_carlo(
+            task.params, task.scenario_model, task.years, metric=task.stop_metric, tolerance=task.stop_tolerance,
+            max_trials=task.trials, seed=task.seed, inflation_rate=task.inflation_rate, tax_rate=task.tax_rate,
+            distributions=task.distributions, sampler=task.sampler, ramp_up_months=task.ramp_up_months
+        )
+    if task.trials:
+        return run_monte_carlo_params(
+            task.params, task.scenario_model, task.years, trials=task.trials, seed=task.seed,
+            inflation_rate=task.inflation_rate, tax_rate=task.tax_rate, distributions=task.distributions,
+            sampler=task.sampler, ramp_up_months=task.ramp_up_months
+        )
+
+    # RandomState keeps single paths identical to ProjectSimulator(seed=...)
+    risk_draws = draw_risk_factors(task.years, rng=np.random.RandomState(task.seed))
+    df = metrics_to_frame(simulate_arrays(task.params, task.scenario_model, task.years, risk_draws, task.ramp_up_months))
+    return apply_macro_adjustments(df, task.inflation_rate, task.tax_rate)
+
+
+def _read_only(value):
+    """Mark cached arrays read-only, they are shared between reruns"""
+    for array in value.values() if isinstance(value, dict) else [value]:
+        array.flags.writeable = False
+    return value
+
+
+def run_path_incremental(task: SimulationTask, cache: SimulationCache):
+    """Single path rebuilt from cached revenue and cost stages.
+
+    Editing one cost line only recomputes that project's cost stage; the
+    revenue path is reused and the profit, cumulative and ROI columns are
+    recombined. The result is identical to ``run_task``.
+    """
+    def compute_revenue():
+        risk_draws = draw_risk_factors(task.years, rng=np.random.RandomState(task.seed))
+        return _read_only(calculate_yearly_revenue(
+            task.params, task.scenario_model, task.years, risk_draws, task.ramp_up_months
+        ))
+
+    revenue = cache.get_or_compute(task.revenue_cache_key(), compute_revenue)
+    costs = cache.get_or_compute(
+        task.cost_cache_key(), lambda: _read_only(calculate_cost_arrays(task.params, task.years))
+    )
+    df = metrics_to_frame(combine_metrics(task.params, revenue, costs, task.years))
+    return apply_macro_adjustments(df, task.inflation_rate, task.tax_rate)
+
+
+def build_grid(params_by_cost: Dict[str, Dict[str, Dict[str, float]]], scenarios: Iterable[Union[str, Scenario]],
+               years: int,
+               seeds: Dict[str, int], inflation_rate: float = 0.0, tax_rate: float = 0.0,
+               trials: Optional[int] = None,
+               distributions: Optional[Dict[str, Dict[str, Distribution]]] = None,
+               sampler: str = RANDOM_SAMPLER, stop_metric: Optional[str] = None,
+               stop_tolerance: float = DEFAULT_TOLERANCE,
+               sketch_discount_rate: Optional[float] = None,
+               ramp_up_months: Optional[int] = None) -> List[SimulationTask]:
+    """Expand ``{cost_label: {project_key: params}}`` x scenarios into tasks.
+
+    A project keeps the same seed across scenarios and cost overrides, so the
+    cells of the grid are compared on common random numbers.
+    ``distributions`` ({project_key: {field: Distribution}}), ``sampler``, the
+    adaptive ``stop_metric`` and ``sketch_discount_rate`` only apply to Monte
+    Carlo tasks; single paths stay deterministic apart from the risk draws.
+    ``ramp_up_months`` switches every task to the monthly engine. A scenario
+    is a name from the scenario table or a Scenario definition (e.g. one a
+    dashboard user defined for their session); tasks are keyed by its name.
+    """
+    scenario_specs = [get_scenario(scenario) for scenario in scenarios]
+    tasks = []
+    for cost_label, params_by_project in params_by_cost.items():
+        for project_key, params in params_by_project.items():
+            for scenario_spec in scenario_specs:
+                tasks.append(SimulationTask(
+                    project_key=project_key,
+                    scenario=scenario_spec.name,
+                    cost_label=cost_label,
+                    params=params,
+                    years=years,
+                    seed=seeds[project_key],
+                    inflation_rate=inflation_rate,
+                    tax_rate=tax_rate,
+                    trials=trials,
+                    distributions=(distributions or {}).get(project_key) if trials else None,
+                    sampler=sampler if trials else RANDOM_SAMPLER,
+                    stop_metric=stop_metric if trials else None,
+                    stop_tolerance=stop_tolerance if trials else DEFAULT_TOLERANCE,
+                    sketch_discount_rate=sketch_discount_rate if trials else None,
+                    scenario_spec=scenario_spec,
+                    ramp_up_months=ramp_up_months
+                ))
+    return tasks
+
+
+def run_grid(tasks: List[SimulationTask], max_workers: Optional[int] = None,
+             progress_callback: Optional[Callable[[int, int, SimulationTask], None]] = None,
+             cache: Optional[SimulationCache] = None,
+             runner: Callable[[SimulationTask], object] = run_task) -> Dict[TaskKey, object]:
+    """Run all tasks on a process pool, reporting each one as it finishes.
+
+    Tasks found in ``cache`` are reported first and never recomputed, and the
+    remaining single paths are rebuilt from cached stages in-process (see
+    run_path_incremental). With a single worker (or a single pending task)
+    everything runs in-process, which avoids the pool start-up cost for small
+    interactive runs. ``runner`` replaces run_task (it must be picklable, e.g.
+    a module-level function or a functools.partial of one).
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    total = len(tasks)
+    results = {}
+    done = 0
+
+    pending = []
+    for task in tasks:
+        cached = cache.get(task.cache_key()) if cache is not None else None
+        if cached is None:
+            pending.append(task)
+            continue
+        results[task.key] = cached
+        done += 1
+        if progress_callback:
+            progress_callback(done, total, task)
+
+    def finish(task, result):
+        nonlocal done
+        results[task.key] = result
+        if cache is not None:
+            cache.put(task.cache_key(), result)
+        done += 1
+        if progress_callback:
+            progress_callback(done, total, task)
+
+    if cache is not None:
+        # Single paths are cheap once split into cached stages; recombine them in-process
+        for task in pending:
+            if not task.trials:
+                finish(task, run_path_incremental(task, cache))
+        pending = [task for task in pending if task.trials]
+
+    if max_workers <= 1 or len(pending) <= 1:
+        for task in pending:
+            finish(task, runner(task))
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+        futures = {executor.submit(runner, task): task for task in pending}
+        for future in as_completed(futures):
+            finish(futures[future], future.result())
+
+    return results
@@ -0,0 +1,243 @@
+"""Benchmark inti simulasi (engine, Monte Carlo, ringkasan portfolio, chart).
+
+Berjalan headless tanpa server Streamlit:
+
+    python simulasi_benchmark.py --save-baseline bench_baseline.json
+    python simulasi_benchmark.py --baseline bench_baseline.json --threshold 0.2
+
+Setiap kasus diukur dua kali: waktu (minimum dari beberapa pengulangan,
+tanpa tracing) lalu memori dengan tracemalloc (peak bytes selama kasus
+berjalan dan jumlah blok memori yang masih tertahan setelah kasus
+selesai). Dengan --baseline, proses keluar dengan kode 1 jika ada kasus
+yang lebih lambat atau lebih boros memori dari baseline melebihi threshold. Baseline bergantung pada mesin,
+jadi simpan dan bandingkan di mesin yang sama.
+"""
+import argparse
+import dataclasses
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from simulasi3 import (
+    PROJECTS, ProjectData, ProjectSimulator, create_operational_cost_breakdown_chart, create_portfolio_summary,
+    create_revenue_chart
+)
+from simulasi_batch import DEFAULT_COST_LABEL, PATH_MODE, build_grid, run_grid
+from simulasi_engine import MODEL_VERSION, project_params
+
+BENCHMARK_YEARS = (1, 10, 50)
+BENCHMARK_PROJECTS = (1, 10, 100)
+BENCHMARK_TRIALS = (None, 1_000, 10_000)
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.2
+
+# Cases faster than this are dominated by timer noise and never fail on time
+DEFAULT_MIN_SECONDS = 0.005
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    params: Dict[str, object]
+    run: Callable[[], object]
+
+    @property
+    def case_id(self) -> str:
+        return f"{self.name}[{','.join(f'{key}={value}' for key, value in self.params.items())}]"
+
+
+def benchmark_projects(count: int) -> Dict[str, ProjectData]:
+    """``count`` projects: the real ones, then jittered copies of them (PROJECTS itself is left untouched)"""
+    base_keys = list(PROJECTS)
+    rng = np.random.default_rng(count)
+    projects = {}
+    for index in range(count):
+        if index < len(base_keys):
+            projects[base_keys[index]] = PROJECTS[base_keys[index]]
+            continue
+        base = PROJECTS[base_keys[index % len(base_keys)]]
+        projects[f"benchmark_{index}"] = dataclasses.replace(
+            base,
+            name=f"{base.name} #{index}",
+            annual_revenue_year1=base.annual_revenue_year1 * rng.uniform(0.8, 1.2),
+            annual_growth_rate=base.annual_growth_rate * rng.uniform(0.8, 1.2)
+        )
+    return projects
+
+
+def path_results(projects: Dict[str, ProjectData], years: int) -> Dict:
+    """Single-path results for the summary and chart cases"""
+    params = {key: project_params(project) for key, project in projects.items()}
+    seeds = {key: 42 + index for index, key in enumerate(projects)}
+    results = run_grid(build_grid({DEFAULT_COST_LABEL: params}, ["realistic"], years, seeds), max_workers=1)
+    return {key: results[(key, "realistic", DEFAULT_COST_LABEL, PATH_MODE)] for key in projects}
+
+
+def build_cases(quick: bool = False) -> List[BenchmarkCase]:
+    years_grid = (1, 50) if quick else BENCHMARK_YEARS
+    projects_grid = (1, 10) if quick else BENCHMARK_PROJECTS
+    trials_grid = (None, 1_000) if quick else BENCHMARK_TRIALS
+
+    cases = []
+    for years in years_grid:
+        cases.append(BenchmarkCase(
+            "project_simulator", {"years": years},
+            lambda years=years: ProjectSimulator(PROJECTS["big_data"], "realistic", years=years, seed=42).calculate_yearly_metrics()
+        ))
+
+    for projects in projects_grid:
+        project_configs = benchmark_projects(projects)
+        params = {key: project_params(project) for key, project in project_configs.items()}
+        seeds = {key: 42 + index for index, key in enumerate(project_configs)}
+        for years in years_grid:
+            for trials in trials_grid:
+                tasks = build_grid({DEFAULT_COST_LABEL: params}, ["realistic"], years, seeds, 0.035, 0.22, trials=trials)
+                cases.append(BenchmarkCase(
+                    "run_grid", {"projects": projects, "years": years, "trials": trials or 0},
+                    lambda tasks=tasks: run_grid(tasks, max_workers=1)
+                ))
+
+    for projects in projects_grid:
+        project_configs = benchmark_projects(projects)
+        for years in years_grid:
+            data = path_results(project_configs, years)
+            cases.append(BenchmarkCase(
+                "create_portfolio_summary", {"projects": projects, "years": years},
+                lambda data=data, years=years, configs=project_configs: create_portfolio_summary(
+                    data, years, projects=configs
+                )
+            ))
+            cases.append(BenchmarkCase(
+                "create_revenue_chart", {"projects": projects, "years": years},
+                lambda data=data, years=years, configs=project_configs: create_revenue_chart(
+                    data, years, projects=configs
+                )
+            ))
+
+    for years in years_grid:
+        df = path_results({"big_data": PROJECTS["big_data"]}, years)["big_data"]
+        cases.append(BenchmarkCase(
+            "create_operational_cost_breakdown_chart", {"years": years},
+            lambda df=df, years=years: create_operational_cost_breakdown_chart(df, "Big Data Analytics", years)
+        ))
+    return cases
+
+
+def measure(case: BenchmarkCase, repeat: int = DEFAULT_REPEAT) -> Dict[str, float]:
+    """Wall time (min/median over ``repeat`` runs), tracemalloc peak of one run and the blocks it left allocated"""
+    case.run()  # Warm-up (imports, caches inside NumPy/Plotly)
+
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        case.run()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    case.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    # Blocks still alive after the run (not everything it allocated; the peak covers transient memory)
+    retained_blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno"))
+
+    return {
+        "seconds_min": min(timings),
+        "seconds_median": float(np.median(timings)),
+        "peak_bytes": peak,
+        "retained_blocks": retained_blocks
+    }
+
+
+def run_benchmarks(cases: List[BenchmarkCase], repeat: int = DEFAULT_REPEAT,
+                   progress: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+    results = {}
+    for case in cases:
+        results[case.case_id] = measure(case, repeat)
+        if progress:
+            progress(case.case_id, results[case.case_id])
+    return {
+        "model_version": MODEL_VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD,
+            memory_threshold: Optional[float] = None,
+            min_seconds: float = DEFAULT_MIN_SECONDS) -> List[str]:
+    """Regressions of ``current`` against ``baseline`` beyond the relative threshold"""
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    regressions = []
+    for case_id, result in current["results"].items():
+        base = baseline["results"].get(case_id)
+        if base is None:
+            continue
+        if base["seconds_min"] >= min_seconds and result["seconds_min"] > base["seconds_min"] * (1 + threshold):
+            regressions.append(
+                f"{case_id}: {base['seconds_min'] * 1000:.2f} ms -> {result['seconds_min'] * 1000:.2f} ms"
+            )
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + memory_threshold):
+            regressions.append(
+                f"{case_id}: peak {base['peak_bytes'] / 1e6:.2f} MB -> {result['peak_bytes'] / 1e6:.2f} MB"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark inti simulasi dengan pelacakan regresi")
+    parser.add_argument("--baseline", help="File JSON baseline untuk dibandingkan")
+    parser.add_argument("--save-baseline", help="Simpan hasil run ini sebagai baseline JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Batas regresi waktu relatif (0.2 = 20%%)")
+    parser.add_argument("--memory-threshold", type=float, help="Batas regresi peak memory relatif (default: --threshold)")
+    parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS, help="Kasus lebih cepat dari ini tidak dinilai waktunya")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Pengulangan pengukuran waktu per kasus")
+    parser.add_argument("--quick", action="store_true", help="Grid kecil untuk pemeriksaan cepat")
+    parser.add_argument("--filter", help="Hanya jalankan kasus yang id-nya mengandung teks ini")
+    args = parser.parse_args(argv)
+
+    cases = build_cases(quick=args.quick)
+    if args.filter:
+        cases = [case for case in cases if args.filter in case.case_id]
+
+    def report(case_id, result):
+        print(
+            f"{case_id:<70} {result['seconds_min'] * 1000:10.2f} ms {result['peak_bytes'] / 1e6:10.2f} MB "
+            f"{result['retained_blocks']:8d} retained blocks",
+            file=sys.stderr
+        )
+
+    current = run_benchmarks(cases, args.repeat, progress=report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline -> {args.save_baseline}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold, args.memory_threshold, args.min_seconds)
+        if regressions:
+            print(f"{len(regressions)} regresi melebihi threshold:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print("Tidak ada regresi terhadap baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
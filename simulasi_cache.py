@@ -0,0 +1,196 @@
+"""Cache hasil simulasi berdasarkan hash input.
+
+Key dibentuk dari hash SHA-256 atas representasi JSON kanonik dari semua
+input (parameter proyek dan biaya, skenario, tahun, inflasi, pajak, seed),
+sehingga rerun Streamlit yang hanya mengubah widget tampilan tidak perlu
+menghitung ulang. Tier memori memakai LRU yang dibatasi jumlah entri dan
+total ukuran array (satu hasil Monte Carlo bisa ratusan MB); tier disk
+(opsional) menyimpan hasil sebagai file pickle dan menghapus file yang
+paling lama tidak dipakai bila total ukurannya atau umurnya melewati batas.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+DEFAULT_MAX_DISK_BYTES = 2 * 1024 ** 3
+
+
+def to_jsonable(value):
+    """Plain JSON structure of simulation inputs (dataclasses, dicts, arrays, numbers)"""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {field.name: to_jsonable(getattr(value, field.name)) for field in dataclasses.fields(value)}
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        value = value.item()
+    # Ints and equal floats must hash the same (number_input returns ints)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def value_nbytes(value) -> int:
+    """Approximate memory held by a cached value, dominated by its arrays and frames"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, dict):
+        return sum(value_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(value_nbytes(item) for item in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return sum(value_nbytes(getattr(value, field.name)) for field in dataclasses.fields(value))
+    return sys.getsizeof(value)
+
+
+def input_hash(*parts) -> str:
+    """Stable hash of simulation inputs (dataclasses, dicts, numbers, strings)"""
+    canonical = json.dumps(to_jsonable(parts), sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SimulationCache:
+    """LRU cache bounded by entry count and total bytes, with an optional on-disk tier.
+
+    A value larger than ``max_bytes`` is not kept in memory at all. The disk
+    tier drops the least recently used files beyond ``max_disk_bytes`` and
+    files unused for longer than ``max_age_seconds`` (None = no age limit).
+    Cached results are shared between reruns and sessions and must be treated
+    as read-only by callers.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, disk_dir: Optional[str] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+                 max_age_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age_seconds = max_age_seconds
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.prune_disk()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _forget(self, key: str):
+        del self._entries[key]
+        self.nbytes -= self._sizes.pop(key)
+
+    def _remember(self, key: str, value):
+        if key in self._entries:
+            self._forget(key)
+        size = value_nbytes(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._sizes[key] = size
+        self.nbytes += size
+        while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+            self._forget(next(iter(self._entries)))
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    value = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                value = None
+            if value is not None:
+                try:
+                    # The modification time doubles as the disk tier's last-used time
+                    os.utime(self._disk_path(key))
+                except OSError:
+                    pass
+                with self._lock:
+                    self._remember(key, value)
+                    self.hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._remember(key, value)
+
+        if self.disk_dir:
+            # Write to a temp file first so a crash never leaves a truncated entry
+            tmp_path = f"{self._disk_path(key)}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+            self.prune_disk()
+
+    def prune_disk(self):
+        """Delete disk entries past the age limit, then the least recently used ones beyond the size limit"""
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        oldest_allowed = time.time() - self.max_age_seconds if self.max_age_seconds is not None else -np.inf
+        for mtime, size, path in files:
+            if total <= self.max_disk_bytes and mtime >= oldest_allowed:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def get_or_compute(self, key: str, compute: Callable[[], object]):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self, disk: bool = False):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+        if disk and self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.disk_dir, name))
@@ -0,0 +1,88 @@
+"""Lapisan trace Plotly untuk chart dengan banyak proyek, tahun atau trial.
+
+Setiap chart punya anggaran titik (MAX_CHART_POINTS) yang dibagi rata ke
+semua trace-nya; trace yang lebih panjang diperkecil dengan downsampling
+min/max per bucket sehingga puncak dan lembah tetap terlihat. Begitu jumlah
+titik melewati WEBGL_MIN_POINTS, trace garis memakai Scattergl (WebGL)
+alih-alih SVG. Nilai dikirim sebagai float32 (array biner base64 di JSON
+Plotly), dan band persentil digambar sebagai satu area tertutup per proyek,
+bukan satu garis per trial.
+"""
+from typing import Optional
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Above this many points per chart, line traces switch to WebGL
+WEBGL_MIN_POINTS = 2_000
+
+# Points sent to the browser per chart, shared by all of its traces
+MAX_CHART_POINTS = 40_000
+
+# Never downsample a trace below this many points
+MIN_TRACE_POINTS = 32
+
+
+def trace_point_budget(traces: int, max_points: int = MAX_CHART_POINTS) -> int:
+    """Points each of ``traces`` traces may keep under the chart cap"""
+    return max(max_points // max(traces, 1), MIN_TRACE_POINTS)
+
+
+def use_webgl(total_points: int) -> bool:
+    return total_points > WEBGL_MIN_POINTS
+
+
+def downsample_indices(length: int, max_points: int, y: Optional[np.ndarray] = None) -> np.ndarray:
+    """Sorted indices of at most ~``max_points`` samples, always keeping the first and last point.
+
+    With ``y`` every bucket keeps its minimum and maximum (so spikes survive),
+    otherwise the indices are evenly spaced.
+    """
+    if length <= max_points:
+        return np.arange(length)
+    if y is None:
+        return np.unique(np.linspace(0, length - 1, max_points).round().astype(int))
+
+    inner = np.asarray(y, dtype=float)[1:-1]
+    buckets = max((max_points - 2) // 2, 1)
+    width = int(np.ceil(len(inner) / buckets))
+    rows = int(np.ceil(len(inner) / width))
+    padded = np.full(rows * width, np.nan)
+    padded[:len(inner)] = inner
+    padded = padded.reshape(rows, width)
+    offsets = np.arange(rows) * width + 1
+    lowest = offsets + np.nanargmin(padded, axis=1)
+    highest = offsets + np.nanargmax(padded, axis=1)
+    return np.unique(np.concatenate([[0], lowest, highest, [length - 1]]))
+
+
+def _compact(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float32)
+
+
+def line_trace(x, y, webgl: bool = False, max_points: int = MAX_CHART_POINTS, **kwargs):
+    """Scatter (or Scattergl) trace of ``y`` over ``x``, downsampled to ``max_points``"""
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    keep = downsample_indices(len(y), max_points, y)
+    trace = go.Scattergl if webgl else go.Scatter
+    return trace(x=_compact(x[keep]), y=_compact(y[keep]), **kwargs)
+
+
+def bar_trace(x, y, max_points: int = MAX_CHART_POINTS, **kwargs) -> go.Bar:
+    """Bar trace with evenly spaced bars kept beyond ``max_points``"""
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    keep = downsample_indices(len(y), max_points)
+    return go.Bar(x=_compact(x[keep]), y=_compact(y[keep]), **kwargs)
+
+
+def band_trace(x, low, high, webgl: bool = False, max_points: int = MAX_CHART_POINTS, **kwargs):
+    """Filled area between ``low`` and ``high`` as one closed polygon trace"""
+    x = np.asarray(x)
+    keep = downsample_indices(len(x), max(max_points // 2, MIN_TRACE_POINTS))
+    x, low, high = x[keep], np.asarray(low, dtype=float)[keep], np.asarray(high, dtype=float)[keep]
+    trace = go.Scattergl if webgl else go.Scatter
+    return trace(
+        x=_compact(np.concatenate([x, x[::-1]])),
+        y=_compact(np.concatenate([high, low[::-1]])),
+        fill="toself", mode="lines", line=dict(width=0), hoverinfo="skip", **kwargs
+    )
@@ -0,0 +1,291 @@
+"""Command-line batch runner untuk simulasi portfolio (tanpa Streamlit/browser).
+
+Contoh:
+
+    python simulasi_cli.py spec.json --output hasil/portfolio.parquet --workers 8
+
+Spec adalah file JSON, semua key opsional:
+
+    {
+        "years": 10,
+        "projects": ["super_apps_bali", "big_data"],
+        "scenarios": ["optimistic", "realistic", "pessimistic", "resesi"],
+        "scenario_definitions": {
+            "resesi": {"label": "Resesi", "growth": 0.6, "risk": 1.8, "competition": 1.4, "saturation_floor": 0.5}
+        },
+        "seed": 42,
+        "inflation_rate": 0.035,
+        "tax_rate": 0.22,
+        "discount_rate": 0.08,
+        "ramp_up_months": 6,
+        "trials": 10000,
+        "sampler": "latin_hypercube",
+        "stop_metric": "p50_profit",
+        "stop_tolerance": 0.01,
+        "cost_overrides": {
+            "hemat": {"big_data": {"personnel_cost": 1500000000, "initial_investment": 3000000000}}
+        },
+        "distributions": {
+            "*": {"market_risk_factor": {"kind": "triangular", "low": 0.1, "mode": 0.15, "high": 0.3}},
+            "big_data": {
+                "annual_growth_rate": {"kind": "pert", "low": 0.15, "mode": 0.3, "high": 0.4},
+                "personnel_cost": {"kind": "empirical", "csv": "histori_sdm.csv", "column": "biaya"}
+            }
+        }
+    }
+
+Selain biaya default, setiap entry di "cost_overrides" menjadi satu varian
+biaya di grid. Jika "trials" diisi, setiap sel juga dijalankan dalam mode
+Monte Carlo dan band persentilnya ditulis ke file terpisah. "distributions"
+(hanya untuk Monte Carlo) memberi distribusi input per proyek; "*" berlaku
+untuk semua proyek, path CSV relatif terhadap file spec. Dengan "stop_metric",
+Monte Carlo berhenti begitu interval kepercayaan metrik itu di bawah
+"stop_tolerance" dan "trials" menjadi batas maksimum. "scenario_definitions"
+menambah (atau mengganti) skenario dari scenarios.json dengan format yang sama.
+Dengan "ramp_up_months" revenue dihitung per bulan: nol selama
+development_months, lalu naik selama masa ramp-up; hasil tetap ditulis per tahun.
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from simulasi3 import PROJECTS, create_portfolio_summary
+from simulasi_batch import DEFAULT_COST_LABEL, PATH_MODE, build_grid, run_grid
+from simulasi_cache import DEFAULT_MAX_DISK_BYTES, SimulationCache
+from simulasi_distributions import distribution_from_spec
+from simulasi_engine import MAX_YEARS, project_params
+from simulasi_montecarlo import DEFAULT_TOLERANCE
+from simulasi_sampling import RANDOM_SAMPLER
+from simulasi_scenarios import register_scenario, scenario_from_dict, scenario_names
+from simulasi_store import SPILL_FORMATS, CompactResultStore, run_task_to_store
+
+OUTPUT_FORMATS = ("parquet", "arrow", "csv")
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+def load_spec(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+
+    unknown_projects = set(spec.get("projects", [])) - set(PROJECTS)
+    if unknown_projects:
+        raise ValueError(f"Unknown projects in spec: {sorted(unknown_projects)}")
+    for name, scenario_spec in spec.get("scenario_definitions", {}).items():
+        register_scenario(scenario_from_dict(name, scenario_spec))
+    unknown_scenarios = set(spec.get("scenarios", [])) - set(scenario_names())
+    if unknown_scenarios:
+        raise ValueError(f"Unknown scenarios in spec: {sorted(unknown_scenarios)}")
+    if not 1 <= spec.get("years", 10) <= MAX_YEARS:
+        raise ValueError(f"years must be between 1 and {MAX_YEARS}")
+    return spec
+
+
+def build_distributions(spec: Dict, project_keys: List[str], base_dir: str = "."):
+    """{project_key: {field: Distribution}} from the spec, "*" entries apply to every project"""
+    entries = spec.get("distributions", {})
+    unknown_projects = set(entries) - set(PROJECTS) - {"*"}
+    if unknown_projects:
+        raise ValueError(f"Unknown projects in distributions: {sorted(unknown_projects)}")
+
+    distributions = {}
+    for key in project_keys:
+        fields = {**entries.get("*", {}), **entries.get(key, {})}
+        if fields:
+            distributions[key] = {name: distribution_from_spec(field_spec, base_dir) for name, field_spec in fields.items()}
+    return distributions
+
+
+def build_tasks_from_spec(spec: Dict, base_dir: str = "."):
+    """Turn a spec into grid tasks (single paths, plus Monte Carlo when trials is set)"""
+    project_keys = spec.get("projects") or list(PROJECTS)
+    years = int(spec.get("years", 10))
+    seed = int(spec.get("seed", 42))
+
+    # Same per-project seeds as the dashboard (seed + position in PROJECTS)
+    seeds = {key: seed + index for index, key in enumerate(PROJECTS) if key in project_keys}
+
+    params_by_cost = {DEFAULT_COST_LABEL: {key: project_params(PROJECTS[key]) for key in project_keys}}
+    for cost_label, overrides in spec.get("cost_overrides", {}).items():
+        params_by_cost[cost_label] = {}
+        for key in project_keys:
+            params = dict(params_by_cost[DEFAULT_COST_LABEL][key])
+            unknown_fields = set(overrides.get(key, {})) - set(params)
+            if unknown_fields:
+                raise ValueError(f"Unknown fields for {key} in '{cost_label}': {sorted(unknown_fields)}")
+            params.update(overrides.get(key, {}))
+            params_by_cost[cost_label][key] = params
+
+    grid_args = dict(
+        scenarios=spec.get("scenarios") or scenario_names(), years=years, seeds=seeds,
+        inflation_rate=float(spec.get("inflation_rate", 0.0)), tax_rate=float(spec.get("tax_rate", 0.0)),
+        ramp_up_months=int(spec["ramp_up_months"]) if "ramp_up_months" in spec else None
+    )
+    tasks = build_grid(params_by_cost, **grid_args)
+    if spec.get("trials"):
+        distributions = build_distributions(spec, project_keys, base_dir)
+        tasks += build_grid(
+            params_by_cost, trials=int(spec["trials"]), distributions=distributions,
+            sampler=spec.get("sampler", RANDOM_SAMPLER), stop_metric=spec.get("stop_metric"),
+            stop_tolerance=float(spec.get("stop_tolerance", DEFAULT_TOLERANCE)), **grid_args
+        )
+    return tasks
+
+
+def iter_result_frames(results: Dict, monte_carlo: bool,
+                       store: Optional[CompactResultStore] = None) -> Iterator[pd.DataFrame]:
+    """Yield one long-format frame per grid cell, tagged with project/scenario/cost.
+
+    With a ``store``, Monte Carlo results are store keys and their bands are
+    computed from the spill files in chunks.
+    """
+    for (project_key, scenario, cost_label, mode), result in results.items():
+        if monte_carlo == (mode == PATH_MODE):
+            continue
+        if monte_carlo and store is not None:
+            df = store.year_summary(result)
+            df["trials"] = store.manifest[result]["trials"]
+        elif monte_carlo:
+            df = result.percentile_bands()
+            df["payback_probability"] = result.payback_probability().to_numpy()
+            df["trials"] = result.trials
+        else:
+            df = result.copy()
+        df.insert(0, "cost_label", cost_label)
+        df.insert(0, "scenario", scenario)
+        df.insert(0, "project", project_key)
+        yield df
+
+
+def write_frames(frames: Iterator[pd.DataFrame], path: str, output_format: str,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    """Stream frames to Parquet/Arrow (one row group per chunk) or chunked CSV"""
+    rows_written = 0
+    writer = None
+    buffer: List[pd.DataFrame] = []
+    buffered_rows = 0
+
+    if output_format in ("parquet", "arrow"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("pyarrow is required for Parquet/Arrow output (pip install pyarrow), or use --format csv")
+
+    def flush():
+        nonlocal writer, buffer, buffered_rows, rows_written
+        if not buffer:
+            return
+        chunk = pd.concat(buffer, ignore_index=True)
+        if output_format == "csv":
+            first_chunk = rows_written == 0
+            chunk.to_csv(path, mode="w" if first_chunk else "a", header=first_chunk, index=False)
+        else:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema) if output_format == "parquet" else pa.ipc.new_file(path, table.schema)
+            writer.write_table(table)
+        rows_written += len(chunk)
+        buffer, buffered_rows = [], 0
+
+    try:
+        for frame in frames:
+            buffer.append(frame)
+            buffered_rows += len(frame)
+            if buffered_rows >= chunk_rows:
+                flush()
+        flush()
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return rows_written
+
+
+def sibling_path(path: str, suffix: str, extension: Optional[str] = None) -> str:
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_{suffix}{extension or ext}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Jalankan grid simulasi portfolio tanpa UI Streamlit")
+    parser.add_argument("spec", help="File spec JSON (proyek, skenario, override biaya, ...)")
+    parser.add_argument("--output", "-o", required=True, help="File output hasil tahunan")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="Format output (default: dari ekstensi file)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Jumlah proses paralel")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Baris per chunk/row group")
+    parser.add_argument("--cache-dir", help="Direktori cache hasil di disk (dipakai ulang antar run)")
+    parser.add_argument("--cache-disk-mb", type=int, default=DEFAULT_MAX_DISK_BYTES // 1024 ** 2,
+                        help="Batas ukuran cache disk (MB); file terlama dihapus")
+    parser.add_argument("--store", help="Direktori spill Monte Carlo (hemat memori, tanpa berhenti adaptif)")
+    parser.add_argument("--store-format", choices=SPILL_FORMATS, default="npy", help="Format file spill")
+    parser.add_argument("--dtype", choices=("float32", "float64"), default="float32", help="Presisi file spill")
+    parser.add_argument("--ram-budget", type=int, default=256, help="Anggaran RAM per proses untuk --store (MB)")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if output_format == "feather":
+        output_format = "arrow"
+    if output_format not in OUTPUT_FORMATS:
+        parser.error(f"Cannot infer output format from '{args.output}', use --format")
+
+    spec = load_spec(args.spec)
+    tasks = build_tasks_from_spec(spec, os.path.dirname(os.path.abspath(args.spec)))
+    cache = (
+        SimulationCache(disk_dir=args.cache_dir, max_disk_bytes=args.cache_disk_mb * 1024 ** 2)
+        if args.cache_dir else None
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    started = time.time()
+
+    def report(done, total, task):
+        print(f"[{done}/{total}] {task.project_key} {task.scenario} {task.cost_label}", file=sys.stderr)
+
+    store = None
+    if args.store and spec.get("trials"):
+        # Monte Carlo cells stream into spill files; results then hold store keys
+        store = CompactResultStore(args.store, args.dtype, args.store_format, args.ram_budget * 1024 ** 2)
+        runner = functools.partial(
+            run_task_to_store, directory=args.store, dtype=args.dtype, spill_format=args.store_format,
+            ram_budget=args.ram_budget * 1024 ** 2
+        )
+        results = run_grid([task for task in tasks if not task.trials], args.workers, report, cache)
+        results.update(run_grid([task for task in tasks if task.trials], args.workers, report, runner=runner))
+        store.refresh()
+    else:
+        results = run_grid(tasks, max_workers=args.workers, progress_callback=report, cache=cache)
+
+    rows = write_frames(iter_result_frames(results, monte_carlo=False), args.output, output_format, args.chunk_rows)
+    print(f"{rows} baris hasil tahunan -> {args.output}", file=sys.stderr)
+
+    if spec.get("trials"):
+        monte_carlo_path = sibling_path(args.output, "montecarlo")
+        rows = write_frames(iter_result_frames(results, monte_carlo=True, store=store), monte_carlo_path, output_format, args.chunk_rows)
+        print(f"{rows} baris band Monte Carlo -> {monte_carlo_path}", file=sys.stderr)
+
+    # Portfolio summary per scenario x cost variant
+    summaries = []
+    years = int(spec.get("years", 10))
+    for scenario in spec.get("scenarios") or scenario_names():
+        for cost_label in sorted({task.cost_label for task in tasks}):
+            data = {
+                project_key: result for (project_key, s, c, mode), result in results.items()
+                if s == scenario and c == cost_label and mode == PATH_MODE
+            }
+            summary = create_portfolio_summary(data, years, float(spec.get("discount_rate", 0.08)))
+            summary.insert(0, "Biaya", cost_label)
+            summary.insert(0, "Skenario", scenario)
+            summaries.append(summary)
+    summary_path = sibling_path(args.output, "summary", ".csv")
+    pd.concat(summaries, ignore_index=True).to_csv(summary_path, index=False)
+    print(f"Ringkasan -> {summary_path} ({time.time() - started:.1f} detik)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Metrik discounted cash flow (NPV, IRR, discounted payback, profitability index).
+
+Semua fungsi bekerja pada array arus kas dengan bentuk (..., years + 1), di
+mana kolom 0 adalah investasi awal (tahun 0). Satu proyek, banyak proyek atau
+matriks trial Monte Carlo dihitung dalam satu kali jalan tanpa loop per trial.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+IRR_LOWER_BOUND = -0.99
+IRR_UPPER_BOUND = 10.0
+IRR_TOLERANCE = 1e-10
+IRR_MAX_ITERATIONS = 100
+
+
+def cash_flow_matrix(initial_investment, net_profit) -> np.ndarray:
+    """Prepend the year-0 investment outflow to the yearly net profit"""
+    net_profit = np.asarray(net_profit, dtype=float)
+    outflow = np.broadcast_to(-np.asarray(initial_investment, dtype=float), net_profit.shape[:-1])
+    return np.concatenate([outflow[..., None], net_profit], axis=-1)
+
+
+def cash_flows_from_frame(df: pd.DataFrame) -> np.ndarray:
+    """Cash flows of a yearly metrics DataFrame from ProjectSimulator"""
+    initial_investment = df["cumulative_investment"].iloc[0] - df["yearly_investment"].iloc[0]
+    return cash_flow_matrix(initial_investment, df["net_profit"].to_numpy())
+
+
+def discount_factors(rate, periods: int) -> np.ndarray:
+    """(1 + rate) ** -t for t = 0..periods-1; ``rate`` may be an array"""
+    t = np.arange(periods)
+    return (1 + np.asarray(rate, dtype=float)[..., None]) ** -t
+
+
+def npv(cash_flows, rate) -> np.ndarray:
+    """Net present value at ``rate`` along the last axis"""
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    return np.sum(cash_flows * discount_factors(rate, cash_flows.shape[-1]), axis=-1)
+
+
+def irr(cash_flows, lower: float = IRR_LOWER_BOUND, upper: float = IRR_UPPER_BOUND,
+        tol: float = IRR_TOLERANCE, max_iter: int = IRR_MAX_ITERATIONS) -> np.ndarray:
+    """Internal rate of return for every row of ``cash_flows`` at once.
+
+    Safeguarded Newton iteration: every row keeps a sign-changing bracket and
+    falls back to bisection whenever the Newton step leaves it. Rows without a
+    sign change of NPV inside [lower, upper] get NaN.
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    batch_shape = cash_flows.shape[:-1]
+    t = np.arange(cash_flows.shape[-1])
+
+    lo = np.full(batch_shape, lower)
+    hi = np.full(batch_shape, upper)
+    f_lo = npv(cash_flows, lo)
+    f_hi = npv(cash_flows, hi)
+    solvable = np.sign(f_lo) != np.sign(f_hi)
+
+    rate = np.full(batch_shape, 0.1)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(max_iter):
+            factors = discount_factors(rate, cash_flows.shape[-1])
+            value = np.sum(cash_flows * factors, axis=-1)
+            slope = np.sum(-t * cash_flows * factors, axis=-1) / (1 + rate)
+
+            # Shrink the bracket around the root
+            same_side = np.sign(value) == np.sign(f_lo)
+            lo = np.where(same_side, rate, lo)
+            f_lo = np.where(same_side, value, f_lo)
+            hi = np.where(same_side, hi, rate)
+
+            step = rate - value / slope
+            bisect = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+            new_rate = np.where(bisect, (lo + hi) / 2, step)
+
+            converged = np.abs(new_rate - rate) <= tol * np.maximum(1.0, np.abs(rate))
+            rate = new_rate
+            if np.all(converged | ~solvable):
+                break
+
+    return np.where(solvable, rate, np.nan)
+
+
+def discounted_payback_year(cash_flows, rate) -> np.ndarray:
+    """First year in which cumulative discounted cash flow turns positive (NaN if never)"""
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    cumulative = np.cumsum(cash_flows * discount_factors(rate, cash_flows.shape[-1]), axis=-1)
+    return first_positive_year(cumulative[..., 1:])
+
+
+def first_positive_year(cumulative, year=None) -> np.ndarray:
+    """Year of the first positive value along the last axis (NaN if never)"""
+    cumulative = np.asarray(cumulative)
+    year = np.arange(1, cumulative.shape[-1] + 1) if year is None else np.asarray(year)
+    positive = cumulative > 0
+    first = np.argmax(positive, axis=-1)
+    return np.where(positive.any(axis=-1), year[first], np.nan)
+
+
+def profitability_index(cash_flows, rate) -> np.ndarray:
+    """Present value of future cash flows divided by the initial investment"""
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    factors = discount_factors(rate, cash_flows.shape[-1])
+    future_value = np.sum(cash_flows[..., 1:] * factors[..., 1:], axis=-1)
+    investment = -cash_flows[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(investment > 0, future_value / investment, np.nan)
+
+
+def dcf_metrics(cash_flows, rate) -> Dict[str, np.ndarray]:
+    """NPV, IRR, discounted payback year and profitability index in one pass"""
+    return {
+        "npv": npv(cash_flows, rate),
+        "irr": irr(cash_flows),
+        "discounted_payback_year": discounted_payback_year(cash_flows, rate),
+        "profitability_index": profitability_index(cash_flows, rate)
+    }
@@ -0,0 +1,147 @@
+"""Distribusi stokastik untuk input proyek pada mode Monte Carlo.
+
+``annual_growth_rate``, ``market_risk_factor``, ``competition_impact`` dan
+setiap baris OperationalCosts bisa diganti dengan distribusi normal,
+lognormal, triangular, PERT atau empirical (bootstrap dari data historis
+CSV). Setiap distribusi ditarik sekaligus sebagai matriks (trials x years):
+nilai tiap tahun adalah draw sendiri, dan growth rate per tahun
+di-compound oleh simulasi_engine.growth_series.
+"""
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from simulasi_engine import COST_COLUMNS
+
+DISTRIBUTION_FIELDS = ["annual_growth_rate", "market_risk_factor", "competition_impact", *COST_COLUMNS]
+
+# Required parameters per distribution kind
+DISTRIBUTION_PARAMS = {
+    "normal": ("mean", "std"),
+    "lognormal": ("mean", "std"),
+    "triangular": ("low", "mode", "high"),
+    "pert": ("low", "mode", "high"),
+    "empirical": ()
+}
+
+# Weight of the mode in the PERT beta distribution
+DEFAULT_PERT_LAMBDA = 4.0
+
+
+@dataclass
+class Distribution:
+    """One input distribution; ``lower``/``upper`` optionally clip the draws"""
+    kind: str
+    params: Dict[str, float] = field(default_factory=dict)
+    values: Optional[np.ndarray] = None
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+
+    def __post_init__(self):
+        if self.kind not in DISTRIBUTION_PARAMS:
+            raise ValueError(f"Unknown distribution: {self.kind}")
+        missing = set(DISTRIBUTION_PARAMS[self.kind]) - set(self.params)
+        if missing:
+            raise ValueError(f"{self.kind} distribution needs {sorted(missing)}")
+
+        if self.kind == "empirical":
+            self.values = np.asarray(self.values, dtype=float)
+            self.values = self.values[np.isfinite(self.values)]
+            if not self.values.size:
+                raise ValueError("empirical distribution needs at least one value")
+        elif self.kind in ("normal", "lognormal"):
+            if self.params["std"] < 0:
+                raise ValueError("std must not be negative")
+            if self.kind == "lognormal" and self.params["mean"] <= 0:
+                raise ValueError("lognormal mean must be positive")
+        elif not self.params["low"] <= self.params["mode"] <= self.params["high"]:
+            raise ValueError(f"{self.kind} distribution needs low <= mode <= high")
+
+    def sample(self, rng: np.random.Generator, size) -> np.ndarray:
+        """Draw an array of shape ``size`` in one vectorized call"""
+        p = self.params
+        if self.kind == "normal":
+            draws = rng.normal(p["mean"], p["std"], size)
+        elif self.kind == "lognormal":
+            # Parameterized by the mean and standard deviation of the value itself
+            sigma2 = np.log1p((p["std"] / p["mean"]) ** 2)
+            draws = rng.lognormal(np.log(p["mean"]) - sigma2 / 2, np.sqrt(sigma2), size)
+        elif self.kind == "triangular":
+            draws = _triangular(rng, p["low"], p["mode"], p["high"], size)
+        elif self.kind == "pert":
+            draws = _pert(rng, p["low"], p["mode"], p["high"], p.get("lamb", DEFAULT_PERT_LAMBDA), size)
+        else:
+            draws = rng.choice(self.values, size=size, replace=True)
+
+        if self.lower is not None or self.upper is not None:
+            draws = np.clip(draws, self.lower, self.upper)
+        return draws
+
+    def mean(self) -> float:
+        """Analytical (or sample) mean, before clipping"""
+        p = self.params
+        if self.kind in ("normal", "lognormal"):
+            return float(p["mean"])
+        if self.kind == "triangular":
+            return (p["low"] + p["mode"] + p["high"]) / 3
+        if self.kind == "pert":
+            lamb = p.get("lamb", DEFAULT_PERT_LAMBDA)
+            return (p["low"] + lamb * p["mode"] + p["high"]) / (lamb + 2)
+        return float(self.values.mean())
+
+
+def _triangular(rng: np.random.Generator, low: float, mode: float, high: float, size) -> np.ndarray:
+    if low == high:
+        return np.full(size, float(low))
+    return rng.triangular(low, mode, high, size)
+
+
+def _pert(rng: np.random.Generator, low: float, mode: float, high: float, lamb: float, size) -> np.ndarray:
+    if low == high:
+        return np.full(size, float(low))
+    alpha = 1 + lamb * (mode - low) / (high - low)
+    beta = 1 + lamb * (high - mode) / (high - low)
+    return low + (high - low) * rng.beta(alpha, beta, size)
+
+
+def empirical_from_csv(path_or_buffer, column: Optional[str] = None, **kwargs) -> Distribution:
+    """Bootstrap distribution of one numeric CSV column (the first numeric one by default)"""
+    df = pd.read_csv(path_or_buffer)
+    if column is None:
+        numeric = df.select_dtypes("number").columns
+        if not len(numeric):
+            raise ValueError("CSV has no numeric column")
+        column = numeric[0]
+    return Distribution("empirical", values=pd.to_numeric(df[column], errors="coerce").to_numpy(), **kwargs)
+
+
+def distribution_from_spec(spec: Dict, base_dir: str = ".") -> Distribution:
+    """Build a Distribution from a JSON-style dict, e.g. {"kind": "pert", "low": .., "mode": .., "high": ..}
+
+    Empirical specs give either "values" or "csv" (relative to ``base_dir``) with an optional "column".
+    """
+    spec = dict(spec)
+    kind = spec.pop("kind")
+    bounds = {key: spec.pop(key) for key in ("lower", "upper") if key in spec}
+    if kind == "empirical":
+        if "csv" in spec:
+            return empirical_from_csv(os.path.join(base_dir, spec["csv"]), spec.get("column"), **bounds)
+        return Distribution(kind, values=spec["values"], **bounds)
+    return Distribution(kind, params={key: float(value) for key, value in spec.items()}, **bounds)
+
+
+def sample_params(params: Dict, distributions: Dict[str, Distribution], years: int, trials: int,
+                  rng: np.random.Generator) -> Dict:
+    """Copy of ``params`` with every distributed field replaced by a (trials, years) draw matrix"""
+    unknown = set(distributions) - set(DISTRIBUTION_FIELDS)
+    if unknown:
+        raise ValueError(f"Fields cannot take a distribution: {sorted(unknown)}")
+
+    sampled = dict(params)
+    for name in DISTRIBUTION_FIELDS:
+        if name in distributions:
+            sampled[name] = distributions[name].sample(rng, (trials, years))
+    return sampled
@@ -0,0 +1,366 @@
+"""Mesin simulasi berbasis array NumPy untuk simulasi3.py.
+
+Semua tahun (maksimal 50) dihitung sekaligus sebagai vektor, dan setiap
+parameter boleh berupa array dengan bentuk (..., 1) sehingga banyak proyek,
+skenario atau trial bisa disimulasikan dalam satu panggilan.
+
+Mode bulanan (maksimal 600 bulan) memakai development_months: selama masa
+development belum ada revenue, setelah launch revenue naik linear selama
+masa ramp-up, sementara biaya operasional sudah berjalan sejak bulan 1
+(burn). Revenue bulanan dijumlahkan kembali per tahun sehingga kolom hasil
+tahunan tetap sama dengan mode tahunan.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Union
+
+from simulasi_scenarios import Scenario, get_scenario, scenario_curves
+
+MAX_YEARS = 50
+MONTHS_PER_YEAR = 12
+
+# Months from launch until revenue reaches its full yearly run rate
+DEFAULT_RAMP_UP_MONTHS = 6
+
+# Naikkan setiap kali rumus model berubah, agar hasil lama di cache tidak dipakai
+MODEL_VERSION = 1
+
+# Inflasi biaya operasional (3.5% per tahun)
+COST_INFLATION_RATE = 0.035
+
+COST_COLUMNS = [
+    "personnel_cost", "infrastructure_cost", "marketing_cost", "maintenance_cost",
+    "licensing_cost", "legal_compliance_cost", "office_utilities_cost", "rd_cost"
+]
+
+# Biaya yang ikut tumbuh bersama proyek (personnel, infrastructure)
+GROWTH_SCALED_COSTS = ("personnel_cost", "infrastructure_cost")
+
+PROJECT_FIELDS = [
+    "initial_investment", "annual_revenue_year1", "annual_growth_rate", "operational_cost_rate",
+    "development_months", "market_risk_factor", "competition_impact"
+]
+
+# Inputs of each model stage; costs never touch revenue, so editing a cost
+# line only has to recompute the cost stage and the combined columns
+REVENUE_INPUTS = ["annual_revenue_year1", "annual_growth_rate", "market_risk_factor", "competition_impact"]
+MONTHLY_REVENUE_INPUTS = [*REVENUE_INPUTS, "development_months"]
+COST_INPUTS = ["annual_growth_rate", *COST_COLUMNS]
+
+MONTHLY_COLUMNS = [
+    "month", "year", "revenue", "operational_cost", *COST_COLUMNS, "investment",
+    "burn", "net_cash_flow", "cumulative_cash_flow"
+]
+
+RESULT_COLUMNS = [
+    "year", "revenue", "operational_cost", *COST_COLUMNS, "yearly_investment",
+    "net_profit", "cumulative_investment", "cumulative_revenue", "cumulative_profit",
+    "cumulative_op_cost", "roi", "payback_achieved"
+]
+
+def project_params(project, op_costs=None) -> Dict[str, float]:
+    """Extract the numeric inputs of a ProjectData (and its OperationalCosts)"""
+    op_costs = op_costs if op_costs else project.operational_costs
+    params = {field: getattr(project, field) for field in PROJECT_FIELDS}
+    params.update({column: getattr(op_costs, column) for column in COST_COLUMNS})
+    return params
+
+
+def draw_risk_factors(years: int, trials: Optional[int] = None, rng=None) -> np.ndarray:
+    """Draw the uniform(0.5, 1.5) market risk factors for every year.
+
+    Without ``rng`` the global ``np.random`` stream is used, so the draws match
+    the per-year ``np.random.uniform`` calls of the original loop.
+    """
+    rng = rng if rng is not None else np.random
+    return rng.uniform(0.5, 1.5, size=years if trials is None else (trials, years))
+
+
+def power_series(base, exponents: np.ndarray) -> np.ndarray:
+    """Compute ``base ** exponents``.
+
+    Scalar bases go through ``math.pow`` so the factors are bit-identical to the
+    scalar ``**`` of the original loop (NumPy's SIMD power can differ by 1 ulp);
+    array bases use ``np.power`` with broadcasting.
+    """
+    base = np.asarray(base, dtype=float)
+    if base.ndim == 0:
+        return np.array([math.pow(float(base), float(exponent)) for exponent in exponents])
+    return np.power(base, exponents)
+
+
+def is_year_path(value, years: int) -> bool:
+    """True for an input sampled per year, i.e. an array with ``years`` on the last axis"""
+    return years > 1 and np.ndim(value) > 0 and np.shape(value)[-1] == years
+
+
+def growth_series(base, years: int, include_current: bool) -> np.ndarray:
+    """Compounded growth factor for years 1..years.
+
+    A constant ``base`` (scalar or (..., 1)) gives ``base ** year`` (or
+    ``base ** (year - 1)`` without the current year). A per-year path of shape
+    (..., years) compounds each year's own factor instead.
+    """
+    year = np.arange(1, years + 1)
+    if not is_year_path(base, years):
+        return power_series(base, year if include_current else year - 1)
+
+    growth = np.cumprod(base, axis=-1)
+    if include_current:
+        return growth
+    return np.concatenate([np.ones_like(growth[..., :1]), growth[..., :-1]], axis=-1)
+
+
+def calculate_cost_arrays(params: Dict, years: int) -> Dict[str, np.ndarray]:
+    """Calculate every operational cost category for all years at once"""
+    year = np.arange(1, years + 1)
+    inflation_factor = power_series(1 + COST_INFLATION_RATE, year)
+    growth_factor = growth_series(1 + (np.asarray(params["annual_growth_rate"]) * 0.3), years, include_current=True)
+
+    costs = {}
+    for column in COST_COLUMNS:
+        if column in GROWTH_SCALED_COSTS:
+            costs[column] = np.asarray(params[column]) * growth_factor * inflation_factor
+        else:
+            costs[column] = np.asarray(params[column]) * inflation_factor
+
+    # Same summation order as ProjectSimulator.calculate_total_operational_cost
+    total = costs[COST_COLUMNS[0]]
+    for column in COST_COLUMNS[1:]:
+        total = total + costs[column]
+    costs["operational_cost"] = total
+    return costs
+
+
+def calculate_revenue_array(params: Dict, scenario: Union[str, Scenario], years: int,
+                            risk_draws: np.ndarray) -> np.ndarray:
+    """Calculate scenario-adjusted revenue for all years at once"""
+    scenario = get_scenario(scenario)
+
+    base_revenue = np.asarray(params["annual_revenue_year1"]) * growth_series(1 + np.asarray(params["annual_growth_rate"]), years, include_current=False)
+
+    # Market saturation and the competition ramp are lookup curves per (scenario, years)
+    saturation_factor, time_fraction = scenario_curves(scenario, years)
+    competition_factor = 1 - (np.asarray(params["competition_impact"]) * scenario.competition * time_fraction)
+    risk_factor = 1 - (np.asarray(params["market_risk_factor"]) * scenario.risk * risk_draws)
+
+    adjusted_revenue = base_revenue * scenario.growth * saturation_factor * competition_factor * np.maximum(risk_factor, 0.3)
+    return np.maximum(adjusted_revenue, base_revenue * 0.3)
+
+
+def expand_to_months(value, years: int):
+    """Repeat a per-year path (..., years) for every month; constants pass through unchanged"""
+    if is_year_path(value, years):
+        return np.repeat(value, MONTHS_PER_YEAR, axis=-1)
+    return np.asarray(value)
+
+
+def _take_years(yearly: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """Values of a (..., years) array at per-month year indices (..., months), broadcasting both"""
+    yearly, index = np.asarray(yearly), np.asarray(index)
+    shape = np.broadcast_shapes(yearly.shape[:-1], index.shape[:-1])
+    return np.take_along_axis(
+        np.broadcast_to(yearly, shape + yearly.shape[-1:]), np.broadcast_to(index, shape + index.shape[-1:]), axis=-1
+    )
+
+
+def calculate_monthly_revenue(params: Dict, scenario: Union[str, Scenario], years: int, risk_draws: np.ndarray,
+                              ramp_up_months: int = DEFAULT_RAMP_UP_MONTHS) -> np.ndarray:
+    """Scenario-adjusted revenue per month, zero until ``development_months`` have passed.
+
+    Growth and market saturation follow the operating year (counted from
+    launch), competition and the market risk draws follow calendar time.
+    Revenue then ramps up linearly over ``ramp_up_months``.
+    """
+    scenario = get_scenario(scenario)
+    months = years * MONTHS_PER_YEAR
+    month = np.arange(1, months + 1)
+
+    # Months since launch; development_months may be (..., 1) for a batch of projects
+    development = np.ceil(np.asarray(params["development_months"], dtype=float))
+    months_live = month - development
+    operating_year = np.clip((months_live - 1) // MONTHS_PER_YEAR, 0, years - 1).astype(int)
+
+    # Yearly factors are computed per year and then gathered/repeated, so only a few operations run per month
+    growth = growth_series(1 + np.asarray(params["annual_growth_rate"]), years, include_current=False)
+    saturation, _ = scenario_curves(scenario, years)
+    base_revenue = _take_years(np.asarray(params["annual_revenue_year1"]) * growth, operating_year)
+    saturation_factor = _take_years(saturation, operating_year)
+
+    competition_factor = 1 - (expand_to_months(params["competition_impact"], years) * scenario.competition * (month / months))
+    risk_factor = np.maximum(1 - (np.asarray(params["market_risk_factor"]) * scenario.risk * risk_draws), 0.3)
+
+    # Same 30% floor as the yearly model, expressed as a factor of the base revenue
+    revenue_factor = np.maximum(
+        scenario.growth * saturation_factor * competition_factor * expand_to_months(risk_factor, years), 0.3
+    )
+    ramp = np.clip(months_live / ramp_up_months, 0, 1) if ramp_up_months > 0 else (months_live > 0).astype(float)
+    return base_revenue * revenue_factor * (ramp / MONTHS_PER_YEAR)
+
+
+def rollup_months(monthly: np.ndarray, years: int) -> np.ndarray:
+    """Sum a (..., years * 12) monthly array into (..., years) yearly totals"""
+    return monthly.reshape(*monthly.shape[:-1], years, MONTHS_PER_YEAR).sum(axis=-1)
+
+
+def calculate_yearly_revenue(params: Dict, scenario: Union[str, Scenario], years: int, risk_draws: np.ndarray,
+                             ramp_up_months: Optional[int] = None) -> np.ndarray:
+    """Yearly revenue from the yearly model, or the monthly engine rolled up when ``ramp_up_months`` is set"""
+    if ramp_up_months is None:
+        return calculate_revenue_array(params, scenario, years, risk_draws)
+    return rollup_months(calculate_monthly_revenue(params, scenario, years, risk_draws, ramp_up_months), years)
+
+
+def combine_metrics(params: Dict, revenue: np.ndarray, costs: Dict[str, np.ndarray], years: int) -> Dict[str, np.ndarray]:
+    """Combine revenue and cost arrays into profit, cumulative and ROI columns"""
+    year = np.arange(1, years + 1)
+    initial_investment = np.asarray(params["initial_investment"], dtype=float)
+
+    # Additional yearly investments (maintenance, upgrades)
+    yearly_investment = np.where(year > 1, initial_investment * 0.05, 0.0)
+    operational_cost = costs["operational_cost"]
+    net_profit = revenue - operational_cost - yearly_investment
+
+    shape = np.broadcast_shapes(net_profit.shape, yearly_investment.shape)
+
+    # Year 1 carries the initial investment; keep the loop's summation order
+    investment_flow = np.array(np.broadcast_to(yearly_investment, shape))
+    investment_flow[..., :1] = initial_investment + investment_flow[..., :1]
+    profit_flow = np.array(np.broadcast_to(net_profit, shape))
+    profit_flow[..., :1] = profit_flow[..., :1] - initial_investment
+
+    cumulative_investment = np.cumsum(investment_flow, axis=-1)
+    cumulative_profit = np.cumsum(profit_flow, axis=-1)
+    cumulative_revenue = np.cumsum(revenue, axis=-1)
+    cumulative_op_cost = np.cumsum(operational_cost, axis=-1)
+
+    roi = np.divide(
+        cumulative_profit, cumulative_investment,
+        out=np.zeros(shape), where=cumulative_investment > 0
+    ) * 100
+
+    return {
+        "year": year,
+        "revenue": revenue,
+        "operational_cost": operational_cost,
+        **{column: costs[column] for column in COST_COLUMNS},
+        "yearly_investment": yearly_investment,
+        "net_profit": net_profit,
+        "cumulative_investment": cumulative_investment,
+        "cumulative_revenue": cumulative_revenue,
+        "cumulative_profit": cumulative_profit,
+        "cumulative_op_cost": cumulative_op_cost,
+        "roi": roi,
+        "payback_achieved": cumulative_profit > 0
+    }
+
+
+def simulate_arrays(params: Dict, scenario: Union[str, Scenario], years: int, risk_draws: np.ndarray,
+                    ramp_up_months: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Run the full yearly model as arrays.
+
+    Every value in ``params`` may be a scalar or an array of shape (..., 1);
+    ``risk_draws`` has shape (..., years). The result columns broadcast to the
+    common batch shape with years on the last axis. ``scenario`` is a name
+    from the scenario table or a Scenario definition. With ``ramp_up_months``
+    revenue comes from the monthly engine (development period and ramp-up)
+    rolled up per year; the columns stay the same.
+    """
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f"years must be between 1 and {MAX_YEARS}, got {years}")
+
+    revenue = calculate_yearly_revenue(params, scenario, years, risk_draws, ramp_up_months)
+    costs = calculate_cost_arrays(params, years)
+    return combine_metrics(params, revenue, costs, years)
+
+
+def simulate_monthly_arrays(params: Dict, scenario: Union[str, Scenario], years: int, risk_draws: np.ndarray,
+                            ramp_up_months: int = DEFAULT_RAMP_UP_MONTHS) -> Dict[str, np.ndarray]:
+    """Monthly cash flow (MONTHLY_COLUMNS) with months on the last axis.
+
+    Yearly costs and recurring investments are spread evenly over their 12
+    months and the initial investment falls in month 1. ``burn`` is the
+    operating cash outflow (costs plus recurring investment minus revenue),
+    so it is positive while the project consumes cash.
+    """
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f"years must be between 1 and {MAX_YEARS}, got {years}")
+
+    month = np.arange(1, years * MONTHS_PER_YEAR + 1)
+    year = (month - 1) // MONTHS_PER_YEAR + 1
+    revenue = calculate_monthly_revenue(params, scenario, years, risk_draws, ramp_up_months)
+    costs = {
+        column: np.repeat(values, MONTHS_PER_YEAR, axis=-1) / MONTHS_PER_YEAR
+        for column, values in calculate_cost_arrays(params, years).items()
+    }
+
+    initial_investment = np.asarray(params["initial_investment"], dtype=float)
+    recurring_investment = np.where(year > 1, initial_investment * 0.05, 0.0) / MONTHS_PER_YEAR
+    burn = costs["operational_cost"] + recurring_investment - revenue
+    investment = np.array(np.broadcast_to(recurring_investment, np.broadcast_shapes(recurring_investment.shape, burn.shape)))
+    investment[..., :1] = initial_investment + investment[..., :1]
+    net_cash_flow = -burn - np.where(month == 1, initial_investment, 0.0)
+
+    return {
+        "month": month,
+        "year": year,
+        "revenue": revenue,
+        **costs,
+        "investment": investment,
+        "burn": burn,
+        "net_cash_flow": net_cash_flow,
+        "cumulative_cash_flow": np.cumsum(net_cash_flow, axis=-1)
+    }
+
+
+def _first_month(condition: np.ndarray, month: np.ndarray) -> np.ndarray:
+    """First month where ``condition`` holds along the last axis, NaN if never"""
+    return np.where(condition.any(axis=-1), month[condition.argmax(axis=-1)], np.nan)
+
+
+def monthly_cash_summary(monthly: Dict[str, np.ndarray], development_months) -> Dict[str, np.ndarray]:
+    """Launch month, peak funding need and when operations and the investment break even.
+
+    ``development_months`` is a scalar or (..., 1) like the params; every
+    result drops the month axis. The launch month is NaN when development
+    lasts the whole horizon, like a break-even or payback that is never reached.
+    """
+    month = monthly["month"]
+    cumulative = monthly["cumulative_cash_flow"]
+    development = np.ceil(np.asarray(development_months, dtype=float))
+    development_burn = np.where(month <= development, monthly["burn"], 0.0).sum(axis=-1)
+    development = development[..., 0] if development.ndim else development
+    return {
+        "launch_month": np.where(development < month[-1], development + 1, np.nan),
+        "peak_funding": np.maximum(-cumulative.min(axis=-1), 0.0),
+        "peak_funding_month": month[cumulative.argmin(axis=-1)],
+        "development_burn": development_burn / np.maximum(np.minimum(development, month[-1]), 1),
+        "break_even_month": _first_month(monthly["burn"] < 0, month),
+        "payback_month": _first_month(cumulative > 0, month)
+    }
+
+
+def apply_macro_adjustments(metrics, inflation_rate: float, tax_rate: float):
+    """Deflate revenue by inflation and apply tax to profit, as shown on the dashboard.
+
+    Works on a yearly DataFrame as well as on a dict of (..., years) arrays.
+    """
+    metrics["revenue"] = metrics["revenue"] / ((1 + inflation_rate) ** metrics["year"])
+    metrics["net_profit"] = metrics["net_profit"] * (1 - tax_rate)
+    metrics["cumulative_profit"] = metrics["cumulative_profit"] * (1 - tax_rate)
+    return metrics
+
+
+def metrics_to_frame(metrics: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Build the yearly DataFrame of a single path in one go from its columns"""
+    return pd.DataFrame({column: metrics[column] for column in RESULT_COLUMNS})
+
+
+def simulate_project(project, scenario: str, years: int, op_costs=None, risk_draws: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """Simulate one project path and return the yearly metrics DataFrame"""
+    if risk_draws is None:
+        risk_draws = draw_risk_factors(years)
+    metrics = simulate_arrays(project_params(project, op_costs), scenario, years, risk_draws)
+    return metrics_to_frame(metrics)
@@ -0,0 +1,207 @@
+"""Goal seek: cari nilai satu input agar metrik proyek mencapai target.
+
+Contoh: revenue tahun 1 minimum agar Data Center Management balik modal di
+tahun 4, atau biaya SDM maksimum sebelum ROI 10 tahun menjadi negatif.
+
+Setiap iterasi mengevaluasi banyak kandidat sekaligus sebagai satu batch di
+simulasi_engine: pertama grid kandidat di rentang pencarian (diperlebar bila
+perlu) untuk menemukan bracket dengan perubahan tanda, lalu bracket itu
+dipersempit dengan grid kandidat baru plus titik secant (regula falsi) di
+setiap iterasi. Komponen risiko pasar ditangani dengan dua cara: "seed"
+memakai draw yang sama dengan single path dashboard (common random
+numbers), "median" memakai median metrik atas sekumpulan trial tetap.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from simulasi_dcf import cash_flow_matrix, first_positive_year, npv
+from simulasi_engine import COST_COLUMNS, apply_macro_adjustments, draw_risk_factors, simulate_arrays
+from simulasi_scenarios import Scenario
+
+GOAL_METRICS = ("payback_year", "roi", "npv", "cumulative_profit")
+RISK_MODES = ("seed", "median")
+
+# Inputs that actually drive the yearly model
+GOAL_SEEK_FIELDS = [
+    "initial_investment", "annual_revenue_year1", "annual_growth_rate", "market_risk_factor",
+    "competition_impact", *COST_COLUMNS
+]
+
+# Search bounds of rate inputs; money inputs search [0, base * 4] and widen upwards
+RATE_BOUNDS = {
+    "annual_growth_rate": (-0.9, 3.0),
+    "market_risk_factor": (0.0, 1.0),
+    "competition_impact": (0.0, 1.0)
+}
+
+DEFAULT_CANDIDATES = 32
+DEFAULT_GOAL_TRIALS = 256
+DEFAULT_TOLERANCE = 1e-6
+MAX_ITERATIONS = 30
+MAX_EXPANSIONS = 8
+EXPANSION_FACTOR = 4.0
+
+
+@dataclass
+class GoalSeekResult:
+    field: str
+    metric: str
+    target: float
+    value: float
+    achieved: float
+    base_value: float
+    base_achieved: float
+    converged: bool
+    iterations: int
+    evaluations: int
+    bracket: Tuple[float, float] = (np.nan, np.nan)
+
+
+def _batch_values(params: Dict[str, float], field: str, candidates: np.ndarray, years: int, scenario: Union[str, Scenario],
+                  risk_draws: np.ndarray, inflation_rate: float, tax_rate: float) -> Dict[str, np.ndarray]:
+    """Simulate every candidate value of ``field`` in one call; rows are candidates"""
+    shape = (-1, 1) if risk_draws.ndim == 1 else (-1, 1, 1)
+    batch_params = dict(params)
+    batch_params[field] = np.asarray(candidates, dtype=float).reshape(shape)
+    metrics = simulate_arrays(batch_params, scenario, years, risk_draws)
+    metrics = apply_macro_adjustments(metrics, inflation_rate, tax_rate)
+    metrics["initial_investment"] = np.asarray(batch_params["initial_investment"], dtype=float)
+    return metrics
+
+
+def _objective(metrics: Dict[str, np.ndarray], metric: str, target: float, discount_rate: float) -> np.ndarray:
+    """Signed distance to the target, positive once the target is met (per candidate and trial)"""
+    if metric == "payback_year":
+        # Paid back by year N <=> the best cumulative profit up to year N is positive
+        return metrics["cumulative_profit"][..., :int(target)].max(axis=-1)
+    if metric == "npv":
+        investment = metrics["initial_investment"]
+        investment = investment[..., 0] if investment.ndim else investment
+        return npv(cash_flow_matrix(investment, metrics["net_profit"]), discount_rate) - target
+    if metric in ("roi", "cumulative_profit"):
+        return metrics[metric][..., -1] - target
+    raise ValueError(f"Unknown goal metric: {metric}")
+
+
+def _met(objective: np.ndarray, metric: str) -> np.ndarray:
+    """Whether the target is met; paying back needs a strictly positive cumulative profit"""
+    return objective > 0 if metric == "payback_year" else objective >= 0
+
+
+def _target_met(achieved: float, metric: str, target: float) -> bool:
+    if metric == "payback_year":
+        return bool(np.isfinite(achieved) and achieved <= target)
+    return bool(achieved >= target or np.isclose(achieved, target))
+
+
+def _achieved(metrics: Dict[str, np.ndarray], metric: str, discount_rate: float) -> np.ndarray:
+    """The metric itself (payback year instead of the objective's profit margin)"""
+    if metric == "payback_year":
+        return first_positive_year(metrics["cumulative_profit"], metrics["year"])
+    return _objective(metrics, metric, 0.0, discount_rate)
+
+
+def _search_bounds(field: str, base: float, bounds: Optional[Tuple[float, float]]) -> Tuple[float, float]:
+    if bounds is not None:
+        return float(bounds[0]), float(bounds[1])
+    if field in RATE_BOUNDS:
+        return RATE_BOUNDS[field]
+    return 0.0, max(abs(base), 1.0) * EXPANSION_FACTOR
+
+
+def goal_seek(params: Dict[str, float], field: str, metric: str, target: float, scenario: Union[str, Scenario], years: int,
+              seed: int = 42, risk_mode: str = "seed", trials: int = DEFAULT_GOAL_TRIALS,
+              discount_rate: float = 0.08, inflation_rate: float = 0.0, tax_rate: float = 0.0,
+              bounds: Optional[Tuple[float, float]] = None, candidates: int = DEFAULT_CANDIDATES,
+              tolerance: float = DEFAULT_TOLERANCE, max_iterations: int = MAX_ITERATIONS) -> GoalSeekResult:
+    """Solve for the value of ``field`` at which ``metric`` reaches ``target``.
+
+    ``metric`` is "payback_year" (target = pay back by that year), "roi" (final
+    ROI in %), "npv" or "cumulative_profit" (final year, Rupiah). With
+    risk_mode "seed" the risk draws are those of the single path for
+    ``seed``; with "median" the metric is the median over ``trials`` fixed
+    draws. Money inputs widen the search upwards until a sign change is
+    found. If several crossings exist, the one closest to the current value
+    is returned, from the side where the target is met. ``converged`` is
+    False when the target is out of reach or the returned value misses it;
+    ``value`` is then the best candidate found.
+    """
+    if field not in GOAL_SEEK_FIELDS:
+        raise ValueError(f"Field cannot be goal-seeked: {field}")
+    if metric not in GOAL_METRICS:
+        raise ValueError(f"Unknown goal metric: {metric}")
+    if metric == "payback_year" and not 1 <= target <= years:
+        raise ValueError(f"Payback target must be between 1 and {years}")
+    if risk_mode == "seed":
+        risk_draws = draw_risk_factors(years, rng=np.random.RandomState(seed))
+    elif risk_mode == "median":
+        risk_draws = draw_risk_factors(years, trials, rng=np.random.default_rng(seed))
+    else:
+        raise ValueError(f"Unknown risk mode: {risk_mode}")
+
+    evaluations = 0
+
+    def evaluate(values: np.ndarray) -> np.ndarray:
+        nonlocal evaluations
+        evaluations += len(values)
+        metrics = _batch_values(params, field, values, years, scenario, risk_draws, inflation_rate, tax_rate)
+        objective = _objective(metrics, metric, target, discount_rate)
+        return np.median(objective, axis=-1) if risk_mode == "median" else objective
+
+    def achieved(value: float) -> float:
+        metrics = _batch_values(params, field, np.array([value]), years, scenario, risk_draws, inflation_rate, tax_rate)
+        result = _achieved(metrics, metric, discount_rate)[0]
+        if risk_mode == "seed":
+            return float(result)
+        if metric == "payback_year":
+            # Median payback year, counting "never" as later than any year
+            year = np.quantile(np.where(np.isnan(result), np.inf, result), 0.5, method="lower")
+            return float(year) if np.isfinite(year) else np.nan
+        return float(np.median(result))
+
+    base = float(params[field])
+    lower, upper = _search_bounds(field, base, bounds)
+    can_expand = bounds is None and field not in RATE_BOUNDS
+
+    # Phase 1: grid over the search range, widening it until the target switches between met and missed
+    for _ in range(MAX_EXPANSIONS + 1):
+        grid = np.linspace(lower, upper, candidates)
+        values = evaluate(grid)
+        met = _met(values, metric)
+        crossings = np.flatnonzero(met[:-1] != met[1:])
+        if crossings.size or not can_expand:
+            break
+        lower, upper = upper, upper * EXPANSION_FACTOR
+
+    if not crossings.size:
+        best = grid[np.argmin(np.abs(values))]
+        return GoalSeekResult(
+            field, metric, target, float(best), achieved(best), base, achieved(base),
+            converged=False, iterations=0, evaluations=evaluations
+        )
+
+    # Crossing closest to the current input value
+    index = crossings[np.argmin(np.abs((grid[crossings] + grid[crossings + 1]) / 2 - base))]
+    a, b, f_a, f_b = grid[index], grid[index + 1], values[index], values[index + 1]
+
+    # Phase 2: shrink the bracket with a candidate grid plus the secant point
+    iterations = 0
+    while iterations < max_iterations and abs(b - a) > tolerance * max(abs(a), abs(b), 1.0):
+        iterations += 1
+        secant = a - f_a * (b - a) / (f_b - f_a) if f_b != f_a else (a + b) / 2
+        points = np.unique(np.concatenate([np.linspace(a, b, candidates), [np.clip(secant, a, b)]]))
+        values = evaluate(points)
+        met = _met(values, metric)
+        crossing = np.flatnonzero(met[:-1] != met[1:])[0]
+        a, b, f_a, f_b = points[crossing], points[crossing + 1], values[crossing], values[crossing + 1]
+
+    # The root itself is only break-even; return the end of the bracket that meets the target
+    value = a if _met(np.array([f_a]), metric)[0] else b
+    value_achieved = achieved(value)
+    return GoalSeekResult(
+        field, metric, target, float(value), value_achieved, base, achieved(base),
+        converged=_target_met(value_achieved, metric, target), iterations=iterations, evaluations=evaluations,
+        bracket=(float(a), float(b))
+    )
@@ -0,0 +1,221 @@
+"""Mode Monte Carlo untuk simulasi3.py.
+
+Semua trial dijalankan sebagai satu matriks (trials x years) di atas
+simulasi_engine, dengan seed eksplisit agar hasilnya bisa direproduksi.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from simulasi_dcf import cash_flow_matrix, dcf_metrics
+from simulasi_distributions import Distribution, sample_params
+from simulasi_engine import apply_macro_adjustments, draw_risk_factors, project_params, simulate_arrays
+from simulasi_sampling import RANDOM_SAMPLER, sample_uniform
+from simulasi_scenarios import Scenario
+
+DEFAULT_TRIALS = 10_000
+DEFAULT_PERCENTILES = (5, 50, 95)
+BAND_METRICS = ("revenue", "cumulative_profit", "roi")
+
+# Adaptive runs: trials per batch (a power of two suits Sobol), stop rule defaults
+DEFAULT_BATCH_TRIALS = 512
+DEFAULT_MIN_BATCHES = 8
+DEFAULT_TOLERANCE = 0.01
+DEFAULT_CONFIDENCE_Z = 1.959964
+
+# Metrics the adaptive runner can converge on, computed from a (trials, years)
+# cumulative profit matrix; relative metrics compare the CI half-width with
+# the estimate, probabilities use the tolerance as an absolute width
+CONVERGENCE_METRICS: Dict[str, Callable[[np.ndarray], float]] = {
+    "p50_profit": lambda cumulative: float(np.percentile(cumulative[:, -1], 50)),
+    "p5_profit": lambda cumulative: float(np.percentile(cumulative[:, -1], 5)),
+    "p95_profit": lambda cumulative: float(np.percentile(cumulative[:, -1], 95)),
+    "payback_probability": lambda cumulative: float(np.mean(np.any(cumulative > 0, axis=1)))
+}
+ABSOLUTE_TOLERANCE_METRICS = ("payback_probability",)
+
+
+@dataclass
+class ConvergenceReport:
+    metric: str
+    estimate: float
+    half_width: float
+    tolerance: float
+    converged: bool
+    batches: int
+    history: List[Dict[str, float]] = field(default_factory=list)
+
+
+@dataclass
+class MonteCarloResult:
+    year: np.ndarray
+    revenue: np.ndarray
+    net_profit: np.ndarray
+    cumulative_profit: np.ndarray
+    roi: np.ndarray
+    initial_investment: float
+    seed: int
+    convergence: Optional[ConvergenceReport] = None
+
+    @property
+    def trials(self) -> int:
+        return self.revenue.shape[0]
+
+    def percentile_bands(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+        """P5/P50/P95 (or other) bands per year for revenue, cumulative profit and ROI"""
+        bands = {"year": self.year}
+        for metric in BAND_METRICS:
+            values = np.percentile(getattr(self, metric), percentiles, axis=0)
+            for percentile, row in zip(percentiles, values):
+                bands[f"{metric}_p{percentile:g}"] = row
+        return pd.DataFrame(bands)
+
+    def payback_probability(self) -> pd.Series:
+        """Probability that payback has been reached by each year"""
+        paid_back = np.logical_or.accumulate(self.cumulative_profit > 0, axis=1)
+        return pd.Series(paid_back.mean(axis=0), index=self.year, name="payback_probability")
+
+    def dcf_summary(self, discount_rate: float, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict:
+        """NPV percentiles, P(NPV > 0) and median IRR over the trials"""
+        dcf = dcf_metrics(cash_flow_matrix(self.initial_investment, self.net_profit), discount_rate)
+        finite_irr = dcf["irr"][np.isfinite(dcf["irr"])]
+        return {
+            "npv_percentiles": np.percentile(dcf["npv"], percentiles),
+            "npv_positive_probability": float(np.mean(dcf["npv"] > 0)),
+            "irr_median": float(np.median(finite_irr)) if finite_irr.size else np.nan
+        }
+
+
+def run_monte_carlo(project, scenario: Union[str, Scenario], years: int, op_costs=None, trials: int = DEFAULT_TRIALS,
+                    seed: int = 0, inflation_rate: float = 0.0, tax_rate: float = 0.0,
+                    rng: Optional[np.random.Generator] = None,
+                    distributions: Optional[Dict[str, Distribution]] = None,
+                    sampler: str = RANDOM_SAMPLER) -> MonteCarloResult:
+    """Run ``trials`` risk paths for one project as a single batched computation"""
+    return run_monte_carlo_params(
+        project_params(project, op_costs), scenario, years, trials=trials, seed=seed,
+        inflation_rate=inflation_rate, tax_rate=tax_rate, rng=rng, distributions=distributions,
+        sampler=sampler
+    )
+
+
+def run_monte_carlo_params(params: Dict, scenario: Union[str, Scenario], years: int, trials: int = DEFAULT_TRIALS,
+                           seed: int = 0, inflation_rate: float = 0.0, tax_rate: float = 0.0,
+                           rng: Optional[np.random.Generator] = None,
+                           distributions: Optional[Dict[str, Distribution]] = None,
+                           sampler: str = RANDOM_SAMPLER,
+                           ramp_up_months: Optional[int] = None) -> MonteCarloResult:
+    """Same as run_monte_carlo, starting from a ``project_params`` dict.
+
+    ``distributions`` maps input fields to a Distribution; those fields are
+    drawn per trial and year after the risk factors. ``sampler`` picks the
+    point set for the risk factors (see simulasi_sampling). ``ramp_up_months``
+    switches revenue to the monthly engine (see simulate_arrays).
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    if sampler == RANDOM_SAMPLER:
+        risk_draws = draw_risk_factors(years, trials, rng=rng)
+    else:
+        risk_draws = 0.5 + sample_uniform(sampler, trials, years, rng)
+    if distributions:
+        params = sample_params(params, distributions, years, trials, rng)
+
+    metrics = simulate_arrays(params, scenario, years, risk_draws, ramp_up_months)
+    metrics = apply_macro_adjustments(metrics, inflation_rate, tax_rate)
+
+    return MonteCarloResult(
+        year=metrics["year"],
+        revenue=metrics["revenue"],
+        net_profit=metrics["net_profit"],
+        cumulative_profit=metrics["cumulative_profit"],
+        roi=metrics["roi"],
+        initial_investment=float(params["initial_investment"]),
+        seed=seed
+    )
+
+
+def _t_quantile(z: float, dof: int) -> float:
+    """Student-t quantile from the normal one (Cornish-Fisher, good to ~1e-3 for dof >= 3)"""
+    return z + (z ** 3 + z) / (4 * dof) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+
+
+def concat_results(results: Sequence[MonteCarloResult]) -> MonteCarloResult:
+    """Stack the trials of several batches of the same project"""
+    first = results[0]
+    return MonteCarloResult(
+        year=first.year,
+        revenue=np.concatenate([result.revenue for result in results]),
+        net_profit=np.concatenate([result.net_profit for result in results]),
+        cumulative_profit=np.concatenate([result.cumulative_profit for result in results]),
+        roi=np.concatenate([result.roi for result in results]),
+        initial_investment=first.initial_investment,
+        seed=first.seed
+    )
+
+
+def run_adaptive_monte_carlo(params: Dict, scenario: Union[str, Scenario], years: int, metric: str = "p50_profit",
+                             tolerance: float = DEFAULT_TOLERANCE, max_trials: int = DEFAULT_TRIALS * 10,
+                             batch_trials: int = DEFAULT_BATCH_TRIALS, min_batches: int = DEFAULT_MIN_BATCHES,
+                             seed: int = 0, inflation_rate: float = 0.0, tax_rate: float = 0.0,
+                             distributions: Optional[Dict[str, Distribution]] = None,
+                             sampler: str = RANDOM_SAMPLER,
+                             z: float = DEFAULT_CONFIDENCE_Z,
+                             ramp_up_months: Optional[int] = None) -> MonteCarloResult:
+    """Add batches of trials until the confidence interval of ``metric`` is narrow enough.
+
+    Every batch is an independent randomization of the sampler, so the
+    spread of the per-batch estimates gives the standard error (this also
+    credits Sobol/LHS with their variance reduction). The run stops once the
+    CI half-width is below ``tolerance`` (relative to the estimate, or
+    absolute for probabilities) or ``max_trials`` is reached. Batches shrink
+    when ``max_trials`` cannot hold ``min_batches`` full batches, so the run
+    never exceeds ``max_trials``. The report is attached as
+    ``result.convergence``.
+    """
+    if metric not in CONVERGENCE_METRICS:
+        raise ValueError(f"Unknown convergence metric: {metric}")
+    if min_batches < 2:
+        raise ValueError("min_batches must be at least 2 (the CI needs two batch estimates)")
+    if max_trials < min_batches:
+        raise ValueError(f"max_trials must be at least min_batches ({min_batches})")
+    estimate_metric = CONVERGENCE_METRICS[metric]
+    batch_trials = min(batch_trials, max_trials // min_batches)
+    max_batches = max_trials // batch_trials
+
+    rng = np.random.default_rng(seed)
+    batches, batch_estimates, history = [], [], []
+    converged = False
+    for _ in range(max_batches):
+        batch = run_monte_carlo_params(
+            params, scenario, years, trials=batch_trials, seed=seed, inflation_rate=inflation_rate,
+            tax_rate=tax_rate, rng=rng, distributions=distributions, sampler=sampler,
+            ramp_up_months=ramp_up_months
+        )
+        batches.append(batch)
+        batch_estimates.append(estimate_metric(batch.cumulative_profit))
+        if len(batches) < min_batches:
+            continue
+
+        pooled = concat_results(batches)
+        estimate = estimate_metric(pooled.cumulative_profit)
+        standard_error = np.std(batch_estimates, ddof=1) / np.sqrt(len(batch_estimates))
+        half_width = float(_t_quantile(z, len(batch_estimates) - 1) * standard_error)
+        scale = 1.0 if metric in ABSOLUTE_TOLERANCE_METRICS else max(abs(estimate), 1e-12)
+        history.append({"trials": pooled.trials, "estimate": estimate, "half_width": half_width})
+        if half_width <= tolerance * scale:
+            converged = True
+            break
+
+    pooled = concat_results(batches)
+    pooled.convergence = ConvergenceReport(
+        metric=metric,
+        estimate=history[-1]["estimate"],
+        half_width=history[-1]["half_width"],
+        tolerance=tolerance,
+        converged=converged,
+        batches=len(batches),
+        history=history
+    )
+    return pooled
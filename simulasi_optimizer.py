@@ -0,0 +1,246 @@
+"""Optimasi komposisi portfolio proyek di bawah batas anggaran investasi awal.
+
+Setiap proyek bisa tidak didanai (0) atau didanai pada level ``min_funding``
+sampai 100%. Level pendanaan menskalakan investasi, revenue dan biaya secara
+proporsional, sehingga profit dan NPV per trial juga linear terhadap level
+pendanaan. Karena itu cukup satu simulasi Monte Carlo per proyek pada
+pendanaan penuh; semua kombinasi dievaluasi sebagai perkalian matriks
+(trials x proyek) @ (proyek x kandidat).
+
+Pencarian:
+1. Semua 2^n subset (n <= EXHAUSTIVE_LIMIT) dinilai sekaligus. Untuk tiap
+   subset, level pendanaan diisi seperti fractional knapsack: semua anggota
+   mendapat ``min_funding`` lalu sisa anggaran dialokasikan ke proyek dengan
+   rasio nilai/investasi tertinggi. Untuk objektif expected NPV ini optimal.
+2. Subset terbaik disempurnakan dengan random search tervektorisasi atas
+   level pendanaan kontinu (berguna untuk objektif P5 yang tidak linear).
+Untuk n yang lebih besar, kandidat subset diambil dari prefix urutan rasio
+dan variasinya, sehingga waktu tetap terkendali.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from simulasi_dcf import cash_flow_matrix, npv
+from simulasi_montecarlo import run_monte_carlo_params
+from simulasi_scenarios import Scenario
+
+OBJECTIVES = ("expected_npv", "p5_profit")
+EXHAUSTIVE_LIMIT = 16
+SUBSET_CHUNK = 4096
+DEFAULT_OPTIMIZER_TRIALS = 2_000
+REFINE_CANDIDATES = 512
+REFINE_ROUNDS = 6
+REFINE_TOP_SUBSETS = 5
+
+# Subsets are screened on the first SCREEN_TRIALS trials; the best SCREEN_KEEP
+# are re-scored on all trials before refinement
+SCREEN_TRIALS = 500
+SCREEN_KEEP = 64
+
+
+@dataclass
+class ProjectOutcomes:
+    project_keys: List[str]
+    investment: np.ndarray
+    npv: np.ndarray
+    profit: np.ndarray
+
+    def head(self, trials: int) -> "ProjectOutcomes":
+        return ProjectOutcomes(self.project_keys, self.investment, self.npv[:trials], self.profit[:trials])
+
+
+@dataclass
+class PortfolioPlan:
+    project_keys: List[str]
+    funding: np.ndarray
+    investment: float
+    expected_npv: float
+    p5_profit: float
+    loss_probability: float
+    objective: str
+
+    @property
+    def feasible(self) -> bool:
+        return bool(np.any(self.funding > 0))
+
+    def to_frame(self, outcomes: ProjectOutcomes) -> pd.DataFrame:
+        """Per-project funding table of the plan"""
+        return pd.DataFrame({
+            "project_key": self.project_keys,
+            "funding": self.funding,
+            "investment": self.funding * outcomes.investment,
+            "expected_npv": self.funding * outcomes.npv.mean(axis=0)
+        })
+
+
+def simulate_outcomes(params_by_project: Dict[str, Dict[str, float]], scenario: Union[str, Scenario], years: int,
+                      seeds: Dict[str, int], trials: int = DEFAULT_OPTIMIZER_TRIALS,
+                      discount_rate: float = 0.08, inflation_rate: float = 0.0,
+                      tax_rate: float = 0.0) -> ProjectOutcomes:
+    """Per-trial NPV and final cumulative profit of every project at full funding"""
+    keys = list(params_by_project)
+    npv_columns, profit_columns = [], []
+    for key in keys:
+        result = run_monte_carlo_params(
+            params_by_project[key], scenario, years, trials=trials, seed=seeds[key],
+            inflation_rate=inflation_rate, tax_rate=tax_rate
+        )
+        npv_columns.append(npv(cash_flow_matrix(result.initial_investment, result.net_profit), discount_rate))
+        profit_columns.append(result.cumulative_profit[:, -1])
+
+    return ProjectOutcomes(
+        project_keys=keys,
+        investment=np.array([params_by_project[key]["initial_investment"] for key in keys], dtype=float),
+        npv=np.column_stack(npv_columns),
+        profit=np.column_stack(profit_columns)
+    )
+
+
+def _subset_masks(n: int, ratio_order: np.ndarray) -> np.ndarray:
+    """All 2^n subsets, or ratio-ordered prefixes and their one-project variants for large n"""
+    if n <= EXHAUSTIVE_LIMIT:
+        codes = np.arange(1, 2 ** n)
+        return ((codes[:, None] >> np.arange(n)) & 1).astype(bool)
+
+    prefixes = np.arange(1, n + 1)[:, None] > np.argsort(ratio_order)[None, :]
+    variants = prefixes[:, None, :] ^ np.eye(n, dtype=bool)[None, :, :]
+    masks = np.concatenate([prefixes, variants.reshape(-1, n)])
+    masks = masks[masks.any(axis=1)]
+    return np.unique(masks, axis=0)
+
+
+def _knapsack_funding(masks: np.ndarray, investment: np.ndarray, value: np.ndarray,
+                      budget: float, min_funding: float) -> np.ndarray:
+    """Funding levels per subset: min_funding for every member, rest filled by value/investment ratio"""
+    funding = masks * min_funding
+    remaining = budget - funding @ investment
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(investment > 0, value / investment, np.inf)
+    for j in np.argsort(-ratio):
+        if value[j] <= 0:
+            continue
+        extra = np.minimum((1 - min_funding) * investment[j], np.maximum(remaining, 0))
+        if investment[j] > 0:
+            step = np.where(masks[:, j], extra / investment[j], 0.0)
+        else:
+            step = np.where(masks[:, j], 1 - min_funding, 0.0)
+        funding[:, j] += step
+        remaining -= step * investment[j]
+
+    funding[remaining < -1e-6 * max(budget, 1.0)] = np.nan
+    return funding
+
+
+def _p5(values: np.ndarray) -> np.ndarray:
+    """5th percentile along axis 0 via O(n) selection (lower nearest rank)"""
+    k = int(0.05 * (values.shape[0] - 1))
+    return np.partition(values, k, axis=0)[k]
+
+
+def _evaluate(outcomes: ProjectOutcomes, funding: np.ndarray, objective: str, risk_tolerance: float):
+    """Objective and loss probability for every candidate funding vector (rows)"""
+    portfolio_profit = outcomes.profit @ funding.T
+    loss_probability = np.mean(portfolio_profit < 0, axis=0)
+    if objective == "expected_npv":
+        # Linear objective: the mean of the portfolio is the sum of project means
+        score = funding @ outcomes.npv.mean(axis=0)
+    else:
+        score = _p5(portfolio_profit)
+    score = np.where(loss_probability <= risk_tolerance, score, -np.inf)
+    return score, loss_probability
+
+
+def _refine(outcomes: ProjectOutcomes, start: np.ndarray, mask: np.ndarray, budget: float,
+            min_funding: float, objective: str, risk_tolerance: float, rng: np.random.Generator):
+    """Vectorized random search over continuous funding levels of one subset"""
+    best = start.copy()
+    best_score, _ = _evaluate(outcomes, best[None, :], objective, risk_tolerance)
+    radius = 0.5 * (1 - min_funding)
+
+    for _ in range(REFINE_ROUNDS):
+        candidates = best + rng.uniform(-radius, radius, size=(REFINE_CANDIDATES, best.size))
+        candidates = np.clip(candidates, min_funding, 1.0) * mask
+
+        # Scale down over-budget candidates, then drop those pushed below min_funding
+        spend = candidates @ outcomes.investment
+        scale = np.where(spend > budget, budget / np.maximum(spend, 1e-12), 1.0)
+        candidates = candidates * scale[:, None]
+        valid = np.all((candidates >= min_funding - 1e-12) | ~mask, axis=1)
+        candidates = candidates[valid]
+        if len(candidates):
+            scores, _ = _evaluate(outcomes, candidates, objective, risk_tolerance)
+            index = int(np.argmax(scores))
+            if scores[index] > best_score[0]:
+                best, best_score = candidates[index], scores[index:index + 1]
+        radius /= 2
+
+    return best
+
+
+def optimize_portfolio(outcomes: ProjectOutcomes, budget: float, risk_tolerance: float = 1.0,
+                       objective: str = "expected_npv", min_funding: float = 0.5,
+                       seed: int = 0) -> Optional[PortfolioPlan]:
+    """Best subset and funding levels under the budget and loss-probability tolerance.
+
+    ``risk_tolerance`` is the maximum accepted probability that the portfolio's
+    final cumulative profit is negative. Returns None when no plan qualifies.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+
+    n = len(outcomes.project_keys)
+    value = outcomes.npv.mean(axis=0) if objective == "expected_npv" else _p5(outcomes.profit)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(outcomes.investment > 0, value / outcomes.investment, np.inf)
+    masks = _subset_masks(n, np.argsort(-ratio))
+
+    # Screening pass on a trial subset, with slack on the loss-probability estimate
+    screen = outcomes.head(SCREEN_TRIALS)
+    screen_tolerance = risk_tolerance + 2 * np.sqrt(0.25 / len(screen.profit))
+
+    best_scores = np.full(0, -np.inf)
+    best_funding = np.zeros((0, n))
+    for start in range(0, len(masks), SUBSET_CHUNK):
+        funding = _knapsack_funding(masks[start:start + SUBSET_CHUNK], outcomes.investment, value, budget, min_funding)
+        funding = funding[~np.isnan(funding).any(axis=1)]
+        if not len(funding):
+            continue
+        scores, _ = _evaluate(screen, funding, objective, screen_tolerance)
+
+        best_scores = np.concatenate([best_scores, scores])
+        best_funding = np.concatenate([best_funding, funding])
+        keep = np.argsort(-best_scores)[:SCREEN_KEEP]
+        best_scores, best_funding = best_scores[keep], best_funding[keep]
+
+    # Re-score the survivors on every trial and keep the top subsets for refinement
+    best_funding = best_funding[np.isfinite(best_scores)]
+    if not len(best_funding):
+        return None
+    best_scores, _ = _evaluate(outcomes, best_funding, objective, risk_tolerance)
+    keep = np.argsort(-best_scores)[:REFINE_TOP_SUBSETS]
+    best_funding = best_funding[keep][np.isfinite(best_scores[keep])]
+    if not len(best_funding):
+        return None
+
+    rng = np.random.default_rng(seed)
+    refined = np.array([
+        _refine(outcomes, funding, funding > 0, budget, min_funding, objective, risk_tolerance, rng)
+        for funding in best_funding
+    ])
+    scores, loss_probability = _evaluate(outcomes, refined, objective, risk_tolerance)
+    index = int(np.argmax(scores))
+    funding = refined[index]
+
+    return PortfolioPlan(
+        project_keys=outcomes.project_keys,
+        funding=funding,
+        investment=float(funding @ outcomes.investment),
+        expected_npv=float((outcomes.npv @ funding).mean()),
+        p5_profit=float(np.percentile(outcomes.profit @ funding, 5)),
+        loss_probability=float(loss_probability[index]),
+        objective=objective
+    )
@@ -0,0 +1,241 @@
+"""Penyimpanan run simulasi yang persisten (SQLite) dengan ID berbasis hash isi.
+
+Setiap run menyimpan input lengkap semua sel grid (parameter proyek dan
+biaya kustom, skenario, tahun, seed, inflasi, pajak, pengaturan Monte Carlo)
+beserta hasilnya: tabel tahunan setiap single path dan band P5/P50/P95 +
+probabilitas payback setiap sel Monte Carlo. ID run adalah hash dari cache
+key semua task, jadi run dengan input yang sama selalu mendapat ID yang sama
+dan hanya disimpan sekali. Run lama bisa dibuka atau dibandingkan tanpa
+simulasi ulang.
+
+Lokasi database diatur lewat SIMULASI_RUN_DB (default: simulasi_runs.db).
+"""
+import datetime
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from simulasi_batch import MONTE_CARLO_MODE, PATH_MODE, SimulationTask, TaskKey
+from simulasi_cache import input_hash, to_jsonable
+from simulasi_engine import MODEL_VERSION, RESULT_COLUMNS
+
+RUN_DB_PATH = "simulasi_runs.db"
+
+# Final-year metrics compared by diff_runs
+DIFF_METRICS = ["cumulative_revenue", "cumulative_profit", "roi"]
+
+# Final-year Monte Carlo band columns compared by diff_bands
+BAND_DIFF_COLUMNS = ["cumulative_profit_p5", "cumulative_profit_p50", "cumulative_profit_p95", "payback_probability"]
+
+# Task fields that identify a grid cell rather than being an input of it
+CELL_FIELDS = ("project_key", "scenario", "cost_label")
+
+
+def run_id_for(tasks: List[SimulationTask]) -> str:
+    """Content hash of a run: the sorted cache keys of all its tasks"""
+    return input_hash(MODEL_VERSION, sorted(task.cache_key() for task in tasks))
+
+
+class StoredBands:
+    """Saved Monte Carlo bands of one cell, with the percentile_bands/payback_probability of a live result"""
+
+    def __init__(self, bands: pd.DataFrame):
+        self.bands = bands.sort_values("year").reset_index(drop=True)
+        self.year = self.bands["year"].astype(int).to_numpy()
+
+    def percentile_bands(self) -> pd.DataFrame:
+        return self.bands.drop(columns="payback_probability", errors="ignore")
+
+    def payback_probability(self) -> pd.Series:
+        return pd.Series(self.bands["payback_probability"].to_numpy(), index=self.year, name="payback_probability")
+
+
+class RunStore:
+    """SQLite file with one row per run plus long tables of path results and Monte Carlo bands"""
+
+    def __init__(self, path: str = RUN_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    name TEXT,
+                    created_at TEXT,
+                    model_version INTEGER,
+                    inputs TEXT,
+                    settings TEXT
+                );
+                CREATE TABLE IF NOT EXISTS run_results (
+                    run_id TEXT, project_key TEXT, scenario TEXT, cost_label TEXT,
+                    %s
+                );
+                CREATE INDEX IF NOT EXISTS idx_run_results_run ON run_results(run_id);
+                CREATE TABLE IF NOT EXISTS run_bands (
+                    run_id TEXT, project_key TEXT, scenario TEXT, cost_label TEXT,
+                    year INTEGER, metric TEXT, value REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_run_bands_run ON run_bands(run_id);
+            """ % ", ".join(f"{column} REAL" for column in RESULT_COLUMNS))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection per operation, committed and closed on exit"""
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def __contains__(self, run_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
+    def save_run(self, tasks: List[SimulationTask], results: Dict[TaskKey, object], name: str = "",
+                 settings: Optional[Dict] = None) -> str:
+        """Store a run under its content hash; saving the same inputs again only renames it"""
+        run_id = run_id_for(tasks)
+        if run_id in self:
+            if name:
+                with self._connect() as conn:
+                    conn.execute("UPDATE runs SET name = ? WHERE run_id = ?", (name, run_id))
+            return run_id
+
+        path_frames, band_frames = [], []
+        for task in tasks:
+            result = results[task.key]
+            cell = dict(zip(CELL_FIELDS, task.key[:3]))
+            if task.key[3] == PATH_MODE:
+                path_frames.append(result[RESULT_COLUMNS].assign(run_id=run_id, **cell))
+                continue
+            bands = result.percentile_bands()
+            bands["payback_probability"] = result.payback_probability().to_numpy()
+            band_frames.append(
+                bands.melt(id_vars="year", var_name="metric", value_name="value").assign(run_id=run_id, **cell)
+            )
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, name or run_id[:12], datetime.datetime.now().isoformat(timespec="seconds"),
+                 MODEL_VERSION, json.dumps(to_jsonable(tasks)), json.dumps(to_jsonable(settings or {})))
+            )
+            if path_frames:
+                pd.concat(path_frames).to_sql("run_results", conn, if_exists="append", index=False)
+            if band_frames:
+                pd.concat(band_frames).to_sql("run_bands", conn, if_exists="append", index=False)
+        return run_id
+
+    def list_runs(self) -> pd.DataFrame:
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT run_id, name, created_at, model_version, settings FROM runs ORDER BY created_at DESC", conn
+            )
+
+    def load_inputs(self, run_id: str) -> Tuple[List[Dict], Dict]:
+        """Task inputs (one dict per grid cell) and display settings of a run"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT inputs, settings FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown run: {run_id}")
+        return json.loads(row[0]), json.loads(row[1])
+
+    def load_results(self, run_id: str) -> Dict[Tuple[str, str, str], pd.DataFrame]:
+        """Yearly path frames keyed by (project_key, scenario, cost_label)"""
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                "SELECT * FROM run_results WHERE run_id = ? ORDER BY project_key, scenario, cost_label, year",
+                conn, params=(run_id,)
+            )
+        df["year"] = df["year"].astype(int)
+        df["payback_achieved"] = df["payback_achieved"].astype(bool)
+        return {
+            cell: group[RESULT_COLUMNS].reset_index(drop=True)
+            for cell, group in df.groupby(list(CELL_FIELDS), sort=False)
+        }
+
+    def load_bands(self, run_id: str) -> Dict[Tuple[str, str, str], pd.DataFrame]:
+        """Monte Carlo bands (year x metric) keyed by (project_key, scenario, cost_label)"""
+        with self._connect() as conn:
+            df = pd.read_sql_query("SELECT * FROM run_bands WHERE run_id = ?", conn, params=(run_id,))
+        return {
+            cell: group.pivot(index="year", columns="metric", values="value").sort_index().reset_index()
+            .rename_axis(columns=None)
+            for cell, group in df.groupby(list(CELL_FIELDS), sort=False)
+        }
+
+
+def _flatten_inputs(inputs: List[Dict]) -> Dict[str, Dict[str, object]]:
+    """{cell: {field: value}} with project params expanded into their own fields"""
+    flat = {}
+    for task in inputs:
+        mode = MONTE_CARLO_MODE if task.get("trials") else PATH_MODE
+        cell = " | ".join([*(str(task[field]) for field in CELL_FIELDS), mode])
+        fields = flat.setdefault(cell, {})
+        for field, value in task.items():
+            if field == "params":
+                fields.update(value)
+            elif field not in CELL_FIELDS:
+                fields[field] = json.dumps(value, sort_keys=True) if isinstance(value, (dict, list)) else value
+    return flat
+
+
+def diff_inputs(inputs_a: List[Dict], inputs_b: List[Dict]) -> pd.DataFrame:
+    """Input fields that differ between two runs; a cell present in only one run is a single row"""
+    flat_a, flat_b = _flatten_inputs(inputs_a), _flatten_inputs(inputs_b)
+    rows = []
+    for cell in sorted(set(flat_a) | set(flat_b)):
+        if cell not in flat_a or cell not in flat_b:
+            rows.append({"cell": cell, "field": "-", "run_a": cell in flat_a, "run_b": cell in flat_b})
+            continue
+        fields_a, fields_b = flat_a[cell], flat_b[cell]
+        for field in sorted(set(fields_a) | set(fields_b)):
+            if fields_a.get(field) != fields_b.get(field):
+                rows.append({"cell": cell, "field": field, "run_a": fields_a.get(field), "run_b": fields_b.get(field)})
+    return pd.DataFrame(rows, columns=["cell", "field", "run_a", "run_b"])
+
+
+def diff_results(results_a: Dict, results_b: Dict) -> pd.DataFrame:
+    """Final-year metrics and payback year of every path cell side by side, with the change"""
+    rows = []
+    for cell in sorted(set(results_a) | set(results_b)):
+        row = dict(zip(CELL_FIELDS, cell))
+        for label, results in (("a", results_a), ("b", results_b)):
+            df = results.get(cell)
+            for metric in DIFF_METRICS:
+                row[f"{metric}_{label}"] = df[metric].iloc[-1] if df is not None else np.nan
+            paid = df["payback_achieved"].to_numpy() if df is not None else np.zeros(0, dtype=bool)
+            row[f"payback_year_{label}"] = df["year"].iloc[paid.argmax()] if paid.any() else np.nan
+        for metric in [*DIFF_METRICS, "payback_year"]:
+            row[f"{metric}_change"] = row[f"{metric}_b"] - row[f"{metric}_a"]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def diff_bands(bands_a: Dict, bands_b: Dict) -> pd.DataFrame:
+    """Final-year P5/P50/P95 cumulative profit and payback probability of every Monte Carlo cell side by side"""
+    rows = []
+    for cell in sorted(set(bands_a) | set(bands_b)):
+        row = dict(zip(CELL_FIELDS, cell))
+        for label, bands in (("a", bands_a), ("b", bands_b)):
+            df = bands.get(cell)
+            for column in BAND_DIFF_COLUMNS:
+                row[f"{column}_{label}"] = df[column].iloc[-1] if df is not None and column in df else np.nan
+        for column in BAND_DIFF_COLUMNS:
+            row[f"{column}_change"] = row[f"{column}_b"] - row[f"{column}_a"]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def diff_runs(store: RunStore, run_a: str, run_b: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(input differences, result comparison) of two stored runs, without resimulating"""
+    inputs_a, _ = store.load_inputs(run_a)
+    inputs_b, _ = store.load_inputs(run_b)
+    return (
+        diff_inputs(inputs_a, inputs_b),
+        diff_results(store.load_results(run_a), store.load_results(run_b))
+    )
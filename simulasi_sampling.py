@@ -0,0 +1,86 @@
+"""Sampling uniform untuk faktor risiko: pseudo-random, Latin hypercube, Sobol, Halton.
+
+Setiap tahun simulasi adalah satu dimensi, jadi satu trial adalah satu titik
+di [0, 1)^years. Semua metode di-randomisasi (LHS acak, Sobol ter-scramble,
+Halton dengan random shift) sehingga beberapa batch independen bisa dipakai
+untuk menaksir interval kepercayaan (lihat run_adaptive_monte_carlo).
+
+Sobol memakai scipy.stats.qmc dan hanya tersedia jika scipy terpasang;
+Latin hypercube dan Halton diimplementasikan langsung dengan NumPy.
+"""
+from typing import List
+
+import numpy as np
+
+RANDOM_SAMPLER = "random"
+SAMPLERS = (RANDOM_SAMPLER, "latin_hypercube", "sobol", "halton")
+
+
+def _primes(count: int) -> List[int]:
+    primes = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+def sobol_available() -> bool:
+    try:
+        from scipy.stats import qmc  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_samplers() -> List[str]:
+    return [sampler for sampler in SAMPLERS if sampler != "sobol" or sobol_available()]
+
+
+def latin_hypercube(trials: int, dims: int, rng: np.random.Generator) -> np.ndarray:
+    """One point per stratum in every dimension, strata shuffled independently per dimension"""
+    strata = rng.permuted(np.tile(np.arange(trials), (dims, 1)), axis=1).T
+    return (strata + rng.random((trials, dims))) / trials
+
+
+def halton(trials: int, dims: int, rng: np.random.Generator) -> np.ndarray:
+    """Halton points (radical inverse in the first ``dims`` primes) with a random shift modulo 1"""
+    index = np.arange(1, trials + 1)
+    points = np.empty((trials, dims))
+    for dim, base in enumerate(_primes(dims)):
+        value = np.zeros(trials)
+        factor = 1.0 / base
+        remaining = index.copy()
+        while np.any(remaining):
+            value += factor * (remaining % base)
+            remaining //= base
+            factor /= base
+        points[:, dim] = value
+    return (points + rng.random(dims)) % 1.0
+
+
+def sobol(trials: int, dims: int, rng: np.random.Generator) -> np.ndarray:
+    """Scrambled Sobol points (needs scipy); power-of-two trial counts keep the balance properties"""
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        raise ImportError("Sobol sampling needs scipy (pip install scipy); use latin_hypercube or halton")
+
+    engine = qmc.Sobol(d=dims, scramble=True, seed=int(rng.integers(2 ** 32)))
+    if trials & (trials - 1) == 0:
+        return engine.random_base2(int(np.log2(trials)))
+    return engine.random(trials)
+
+
+def sample_uniform(sampler: str, trials: int, dims: int, rng: np.random.Generator) -> np.ndarray:
+    """(trials, dims) points in [0, 1) from the chosen sampler"""
+    if sampler == RANDOM_SAMPLER:
+        return rng.random((trials, dims))
+    if sampler == "latin_hypercube":
+        return latin_hypercube(trials, dims, rng)
+    if sampler == "halton":
+        return halton(trials, dims, rng)
+    if sampler == "sobol":
+        return sobol(trials, dims, rng)
+    raise ValueError(f"Unknown sampler: {sampler}")
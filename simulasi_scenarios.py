@@ -0,0 +1,110 @@
+"""Tabel skenario simulasi yang dibaca dari file konfigurasi (scenarios.json).
+
+Setiap skenario adalah satu baris data: multiplier growth, risk dan
+competition, plus kurva saturasi pasar (turun ``saturation_rate`` per tahun,
+minimal ``saturation_floor``). Skenario baru cukup ditambahkan ke file
+konfigurasi (atau didaftarkan saat runtime lewat register_scenario) tanpa
+mengubah kode. File lain bisa dipakai lewat SIMULASI_SCENARIOS.
+
+Tabel ini dipakai bersama oleh semua sesi dalam satu proses, jadi hanya CLI
+yang mendaftarkan skenario ke sini. Skenario yang dibuat pengguna dashboard
+disimpan di sesinya sendiri dan diteruskan sebagai objek Scenario (lihat
+SimulationTask.scenario_spec).
+
+Kurva per tahun (saturasi dan porsi waktu year / years untuk kompetisi)
+dihitung sekali per (skenario, years) lalu dipakai ulang oleh semua proyek
+dan semua panggilan simulasi.
+"""
+import dataclasses
+import functools
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+SCENARIO_FILE = os.environ.get(
+    "SIMULASI_SCENARIOS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios.json")
+)
+DEFAULT_SATURATION_RATE = 0.05
+DEFAULT_SATURATION_FLOOR = 0.6
+CURVE_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    label: str
+    growth: float
+    risk: float
+    competition: float
+    saturation_rate: float = DEFAULT_SATURATION_RATE
+    saturation_floor: float = DEFAULT_SATURATION_FLOOR
+
+
+def scenario_from_dict(name: str, spec: Dict) -> Scenario:
+    """Build a Scenario from one config entry, e.g. {"label": .., "growth": .., "risk": .., "competition": ..}"""
+    fields = {field.name for field in dataclasses.fields(Scenario)} - {"name"}
+    unknown = set(spec) - fields
+    if unknown:
+        raise ValueError(f"Unknown fields for scenario {name}: {sorted(unknown)}")
+    missing = {"growth", "risk", "competition"} - set(spec)
+    if missing:
+        raise ValueError(f"Scenario {name} needs {sorted(missing)}")
+    numbers = {key: float(value) for key, value in spec.items() if key != "label"}
+    if numbers["growth"] < 0 or numbers["risk"] < 0 or numbers["competition"] < 0:
+        raise ValueError(f"Scenario {name}: multipliers must not be negative")
+    if not 0 <= numbers.get("saturation_floor", DEFAULT_SATURATION_FLOOR) <= 1:
+        raise ValueError(f"Scenario {name}: saturation_floor must be between 0 and 1")
+    return Scenario(name=name, label=str(spec.get("label", name)), **numbers)
+
+
+def load_scenarios(path: str = SCENARIO_FILE) -> Dict[str, Scenario]:
+    with open(path, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    return {name: scenario_from_dict(name, spec) for name, spec in table.items()}
+
+
+def save_scenarios(path: str = SCENARIO_FILE):
+    """Write the current table, including scenarios registered at runtime, back to the config file"""
+    table = {
+        name: {key: value for key, value in dataclasses.asdict(scenario).items() if key != "name"}
+        for name, scenario in _SCENARIOS.items()
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(table, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+_SCENARIOS: Dict[str, Scenario] = load_scenarios()
+
+
+def scenario_names() -> List[str]:
+    return list(_SCENARIOS)
+
+
+def get_scenario(scenario: Union[str, Scenario]) -> Scenario:
+    """Scenario by name (a Scenario passes through unchanged)"""
+    if isinstance(scenario, Scenario):
+        return scenario
+    if scenario not in _SCENARIOS:
+        raise ValueError(f"Unknown scenario: {scenario}")
+    return _SCENARIOS[scenario]
+
+
+def register_scenario(scenario: Scenario):
+    """Add or replace a scenario for this whole process (CLI use; the dashboard keeps its own per session)"""
+    _SCENARIOS[scenario.name] = scenario
+
+
+@functools.lru_cache(maxsize=CURVE_CACHE_SIZE)
+def scenario_curves(scenario: Scenario, years: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Saturation factor and elapsed-time fraction (year / years) for years 1..years, read-only"""
+    year = np.arange(1, years + 1)
+    saturation = np.maximum(1 - (year * scenario.saturation_rate), scenario.saturation_floor)
+    time_fraction = year / years
+    saturation.flags.writeable = False
+    time_fraction.flags.writeable = False
+    return saturation, time_fraction
@@ -0,0 +1,309 @@
+"""Penyimpanan hasil Monte Carlo yang hemat memori (float32, kolumnar, memory-mapped).
+
+Hanya kolom primitif yang disimpan per (tahun, trial): ``revenue`` dan
+``net_profit`` (setelah inflasi/pajak), ditambah skalar investasi awal dan
+tarif pajak per entry. Kolom turunan dihitung saat dibaca:
+
+    cumulative_profit     = cumsum(net_profit) - initial_investment * (1 - tax_rate)
+    cumulative_investment = initial_investment * (1 + 0.05 * (year - 1))
+    roi                   = cumulative_profit / (1 - tax_rate) / cumulative_investment * 100
+
+(ROI dashboard dihitung sebelum pajak, sama seperti simulasi_engine.)
+
+Data ditulis per chunk trial ke file spill (.npy memory-mapped, atau Arrow IPC
+dengan satu kolom per tahun) dan ringkasan dihitung per blok tahun, sehingga
+run 100 proyek x 50 tahun x 10k trial tetap di bawah anggaran RAM yang tetap.
+"""
+import json
+import os
+import re
+from typing import Dict, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from simulasi_batch import SimulationTask
+from simulasi_distributions import Distribution
+from simulasi_montecarlo import DEFAULT_PERCENTILES, MonteCarloResult, run_monte_carlo_params
+from simulasi_sampling import RANDOM_SAMPLER
+from simulasi_scenarios import Scenario, get_scenario
+
+PRIMITIVE_COLUMNS = ("revenue", "net_profit")
+DERIVED_COLUMNS = ("cumulative_profit", "cumulative_investment", "roi")
+SPILL_FORMATS = ("npy", "arrow")
+DEFAULT_DTYPE = "float32"
+DEFAULT_RAM_BUDGET = 256 * 1024 ** 2
+METADATA_SUFFIX = ".meta.json"
+
+# Rough number of (trials x years) float64 arrays alive inside one engine call
+ENGINE_WORKING_ARRAYS = 24
+
+
+def chunk_trials_for_budget(years: int, ram_budget: int = DEFAULT_RAM_BUDGET) -> int:
+    """Trials per simulation chunk that keep the engine's working set under ``ram_budget``"""
+    return max(int(ram_budget // (years * 8 * ENGINE_WORKING_ARRAYS)), 1)
+
+
+class CompactResultStore:
+    """Directory of spill files, one entry (key) per simulated cell.
+
+    Arrays are laid out year-major (years x trials) so per-year reductions
+    read contiguous memory. Every entry has its own metadata file, so
+    separate processes can write different entries into the same directory.
+    """
+
+    def __init__(self, directory: str, dtype: str = DEFAULT_DTYPE, spill_format: str = "npy",
+                 ram_budget: int = DEFAULT_RAM_BUDGET):
+        if spill_format not in SPILL_FORMATS:
+            raise ValueError(f"Unknown spill format: {spill_format}")
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.spill_format = spill_format
+        self.ram_budget = ram_budget
+        os.makedirs(directory, exist_ok=True)
+
+        self.manifest: Dict[str, Dict] = {}
+        self.refresh()
+
+    def refresh(self):
+        """Reload entry metadata, e.g. after other processes wrote entries"""
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(METADATA_SUFFIX):
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                self.manifest[entry["key"]] = entry
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.manifest
+
+    def keys(self):
+        return list(self.manifest)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_.-]", "_", key) + suffix)
+
+    def _column_path(self, key: str, column: str, spill_format: str) -> str:
+        return self._path(key, f".{column}.{spill_format}")
+
+    def _save_entry(self, key: str, entry: Dict):
+        # Metadata is written last and atomically: an entry is visible only once complete
+        self.manifest[key] = entry
+        path = self._path(key, METADATA_SUFFIX)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def nbytes(self, key: Optional[str] = None) -> int:
+        """Size of the spill files on disk"""
+        total = 0
+        for entry_key, entry in self.manifest.items():
+            if key is None or entry_key == key:
+                for column in PRIMITIVE_COLUMNS:
+                    total += os.path.getsize(self._column_path(entry_key, column, entry["format"]))
+        return total
+
+    # Writing
+
+    def writer(self, key: str, trials: int, years: int, initial_investment: float,
+               tax_rate: float = 0.0) -> "StoreWriter":
+        return StoreWriter(self, key, trials, years, initial_investment, tax_rate)
+
+    def add_result(self, key: str, result: MonteCarloResult, tax_rate: float = 0.0):
+        """Store an in-memory MonteCarloResult (its tax rate must be passed along)"""
+        writer = self.writer(key, result.trials, len(result.year), result.initial_investment, tax_rate)
+        chunk = chunk_trials_for_budget(len(result.year), self.ram_budget)
+        for start in range(0, result.trials, chunk):
+            writer.write(result.revenue[start:start + chunk], result.net_profit[start:start + chunk])
+        writer.close()
+
+    # Reading
+
+    def _read_primitive(self, key: str, column: str, years: slice) -> np.ndarray:
+        entry = self.manifest[key]
+        path = self._column_path(key, column, entry["format"])
+        if entry["format"] == "npy":
+            return np.load(path, mmap_mode="r")[years]
+
+        import pyarrow as pa
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            return np.stack([
+                table.column(f"y{year}").to_numpy() for year in range(entry["years"])[years]
+            ])
+
+    def iter_year_blocks(self, key: str, columns: Sequence[str] = PRIMITIVE_COLUMNS + DERIVED_COLUMNS,
+                         block_years: Optional[int] = None) -> Iterator[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+        """Yield (year numbers, {column: (block_years, trials) float64}) blocks in year order.
+
+        Derived columns are rebuilt on the fly; the running cumulative sum is
+        carried between blocks, so only one block is in memory at a time.
+        """
+        entry = self.manifest[key]
+        trials, years = entry["trials"], entry["years"]
+        block_years = block_years or max(int(self.ram_budget // (trials * 8 * (len(columns) + 2))), 1)
+        initial = entry["initial_investment"]
+
+        carry = np.zeros(trials)
+        for start in range(0, years, block_years):
+            span = slice(start, min(start + block_years, years))
+            year = np.arange(span.start + 1, span.stop + 1)
+            revenue = self._read_primitive(key, "revenue", span).astype(float)
+            net_profit = self._read_primitive(key, "net_profit", span).astype(float)
+
+            cumulative_profit = carry + np.cumsum(net_profit, axis=0) - initial * (1 - entry["tax_rate"])
+            carry = carry + net_profit.sum(axis=0)
+            cumulative_investment = initial * (1 + 0.05 * (year - 1))[:, None]
+
+            block = {"revenue": revenue, "net_profit": net_profit, "cumulative_profit": cumulative_profit}
+            if "cumulative_investment" in columns or "roi" in columns:
+                block["cumulative_investment"] = np.broadcast_to(cumulative_investment, revenue.shape)
+                # ROI is a pre-tax figure in the engine
+                pre_tax_profit = cumulative_profit / (1 - entry["tax_rate"]) if entry["tax_rate"] < 1 else np.nan
+                block["roi"] = np.divide(
+                    pre_tax_profit, cumulative_investment,
+                    out=np.zeros_like(cumulative_profit), where=cumulative_investment > 0
+                ) * 100
+            yield year, {column: block[column] for column in columns}
+
+    def column(self, key: str, column: str) -> np.ndarray:
+        """Whole (trials, years) matrix of one column; materializes it in RAM"""
+        blocks = [block[column] for _, block in self.iter_year_blocks(key, [column])]
+        return np.concatenate(blocks, axis=0).T
+
+    def to_result(self, key: str) -> MonteCarloResult:
+        """Load an entry back as a MonteCarloResult (float64, in RAM)"""
+        entry = self.manifest[key]
+        columns = ["revenue", "net_profit", "cumulative_profit", "roi"]
+        blocks = list(self.iter_year_blocks(key, columns))
+        data = {column: np.concatenate([block[column] for _, block in blocks], axis=0).T for column in columns}
+        return MonteCarloResult(
+            year=np.arange(1, entry["years"] + 1),
+            initial_investment=entry["initial_investment"],
+            seed=entry.get("seed", 0),
+            **data
+        )
+
+    def year_summary(self, key: str, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+        """Percentile bands, mean/std and payback probability per year via chunked reductions.
+
+        Same band columns as MonteCarloResult.percentile_bands.
+        """
+        rows = []
+        paid_back = None
+        for year, block in self.iter_year_blocks(key, ["revenue", "cumulative_profit", "roi"]):
+            for offset, year_number in enumerate(year):
+                row = {"year": year_number}
+                for column in ("revenue", "cumulative_profit", "roi"):
+                    values = block[column][offset]
+                    for percentile, value in zip(percentiles, np.percentile(values, percentiles)):
+                        row[f"{column}_p{percentile:g}"] = value
+                    row[f"{column}_mean"] = values.mean()
+                    row[f"{column}_std"] = values.std()
+                positive = block["cumulative_profit"][offset] > 0
+                paid_back = positive if paid_back is None else paid_back | positive
+                row["payback_probability"] = paid_back.mean()
+                rows.append(row)
+        return pd.DataFrame(rows)
+
+
+class StoreWriter:
+    """Appends trial chunks of one entry to its spill files"""
+
+    def __init__(self, store: CompactResultStore, key: str, trials: int, years: int,
+                 initial_investment: float, tax_rate: float):
+        self.store = store
+        self.key = key
+        self.trials = trials
+        self.years = years
+        self.written = 0
+        self.entry = {
+            "key": key,
+            "trials": trials,
+            "years": years,
+            "initial_investment": float(initial_investment),
+            "tax_rate": float(tax_rate),
+            "dtype": store.dtype.name,
+            "format": store.spill_format
+        }
+
+        self._arrays = {}
+        self._writers = {}
+        for column in PRIMITIVE_COLUMNS:
+            path = store._column_path(key, column, store.spill_format)
+            if store.spill_format == "npy":
+                self._arrays[column] = np.lib.format.open_memmap(
+                    path, mode="w+", dtype=store.dtype, shape=(years, trials)
+                )
+            else:
+                import pyarrow as pa
+                schema = pa.schema([(f"y{year}", pa.from_numpy_dtype(store.dtype)) for year in range(years)])
+                self._writers[column] = pa.ipc.new_file(path, schema)
+
+    def write(self, revenue: np.ndarray, net_profit: np.ndarray):
+        """Append a (chunk_trials, years) block of both primitive columns"""
+        rows = revenue.shape[0]
+        if self.written + rows > self.trials:
+            raise ValueError(f"{self.key}: more than {self.trials} trials written")
+
+        for column, values in zip(PRIMITIVE_COLUMNS, (revenue, net_profit)):
+            values = np.asarray(values).astype(self.store.dtype)
+            if column in self._arrays:
+                self._arrays[column][:, self.written:self.written + rows] = values.T
+            else:
+                import pyarrow as pa
+                batch = pa.record_batch(list(values.T), names=[f"y{year}" for year in range(self.years)])
+                self._writers[column].write_batch(batch)
+        self.written += rows
+
+    def close(self, **metadata):
+        if self.written != self.trials:
+            raise ValueError(f"{self.key}: {self.written} of {self.trials} trials written")
+        for array in self._arrays.values():
+            array.flush()
+        for writer in self._writers.values():
+            writer.close()
+        self._arrays, self._writers = {}, {}
+
+        self.store._save_entry(self.key, {**self.entry, **metadata})
+
+
+def run_monte_carlo_to_store(store: CompactResultStore, key: str, params: Dict, scenario: Union[str, Scenario],
+                             years: int, trials: int, seed: int = 0, inflation_rate: float = 0.0, tax_rate: float = 0.0,
+                             distributions: Optional[Dict[str, Distribution]] = None,
+                             sampler: str = RANDOM_SAMPLER, ramp_up_months: Optional[int] = None) -> str:
+    """Simulate ``trials`` paths in RAM-budgeted chunks, streaming each chunk to the store"""
+    scenario = get_scenario(scenario)
+    rng = np.random.default_rng(seed)
+    chunk = chunk_trials_for_budget(years, store.ram_budget)
+    writer = store.writer(key, trials, years, float(params["initial_investment"]), tax_rate)
+    for start in range(0, trials, chunk):
+        result = run_monte_carlo_params(
+            params, scenario, years, trials=min(chunk, trials - start), seed=seed,
+            inflation_rate=inflation_rate, tax_rate=tax_rate, rng=rng,
+            distributions=distributions, sampler=sampler, ramp_up_months=ramp_up_months
+        )
+        writer.write(result.revenue, result.net_profit)
+    writer.close(seed=seed, scenario=scenario.name)
+    return key
+
+
+def store_key(task: SimulationTask) -> str:
+    """Entry key of a grid cell: project|scenario|cost_label"""
+    return "|".join(task.key[:3])
+
+
+def run_task_to_store(task: SimulationTask, directory: str, dtype: str = DEFAULT_DTYPE,
+                      spill_format: str = "npy", ram_budget: int = DEFAULT_RAM_BUDGET) -> str:
+    """Stream one Monte Carlo grid task into the store at ``directory`` (usable as a run_grid runner).
+
+    Each worker process opens the store itself and writes its own entry; the
+    RAM budget applies per process. Adaptive stopping is not used here, the
+    task's ``trials`` are always run in full.
+    """
+    store = CompactResultStore(directory, dtype, spill_format, ram_budget)
+    return run_monte_carlo_to_store(
+        store, store_key(task), task.params, task.scenario_model, task.years, task.trials, seed=task.seed,
+        inflation_rate=task.inflation_rate, tax_rate=task.tax_rate, distributions=task.distributions,
+        sampler=task.sampler, ramp_up_months=task.ramp_up_months
+    )
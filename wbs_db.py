@@ -0,0 +1,384 @@
+"""Akses database SQLite untuk app2.py (WBS interaktif).
+
+Semua sesi Streamlit dalam satu proses memakai pool koneksi yang sama
+(dibuat sekali lewat st.cache_resource di app2.py), jadi rerun tidak lagi
+membuka dan menutup file database. Database memakai journal WAL: pembaca
+tidak menunggu penulis dan sebaliknya, sementara penulis yang bertabrakan
+menunggu lewat busy_timeout alih-alih langsung gagal dengan "database is
+locked". Skema dibuat sekali saat pool dibuat, bukan di setiap rerun, lewat
+migrasi berurutan (PRAGMA user_version) yang juga menambah index untuk
+pengurutan, filter dan agregasi halaman analisis. Tanggal disimpan sebagai
+teks ISO (yyyy-mm-dd) sehingga urutan teks sama dengan urutan kronologis.
+
+Data tugas disimpan sekali per proses (TableSync), bukan satu salinan per
+sesi; milestone yang jumlahnya kecil dibaca langsung lewat index
+tanggalnya. Setiap sinkronisasi hanya mengambil baris dengan id di atas id
+terakhir yang sudah dimuat, dan baris yang baru di-insert langsung
+ditambahkan tanpa query ulang. Penghapusan menaikkan counter generasi di
+tabel sync_state sehingga semua proses memuat ulang tabel itu secara penuh.
+
+Lokasi database diatur lewat WBS_DB (default: wbs_database.db).
+"""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+DB_PATH = "wbs_database.db"
+
+# Connections kept per process; sessions beyond this wait for a free one
+DEFAULT_POOL_SIZE = 4
+POOL_TIMEOUT_SECONDS = 30
+
+# Applied to every pooled connection (journal_mode=WAL is stored in the file itself)
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+)
+
+TASK_COLUMNS = [
+    "section", "wbs_id", "task_name", "description", "personnel_role", "personnel_count", "start_date", "end_date"
+]
+
+DEFAULT_PAGE_SIZE = 50
+
+# Position in the task explorer: the (section, wbs_id, id) of the last row shown
+TaskCursor = Tuple[str, str, int]
+
+# Schema migrations in order; PRAGMA user_version records how many have been applied
+MIGRATIONS = [
+    [
+        """CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            section TEXT,
+            wbs_id TEXT,
+            task_name TEXT,
+            description TEXT,
+            personnel_role TEXT,
+            personnel_count INTEGER,
+            start_date TEXT,
+            end_date TEXT
+        )""",
+        """CREATE TABLE IF NOT EXISTS milestones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            wbs_id TEXT,
+            milestone_name TEXT,
+            milestone_date TEXT
+        )""",
+        "CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, generation INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO sync_state VALUES ('tasks', 0), ('milestones', 0)",
+    ],
+    [
+        # Dates as ISO yyyy-mm-dd text, which sorts and compares chronologically
+        *(
+            f"UPDATE {table} SET {column} = date({column}) WHERE date({column}) IS NOT NULL AND {column} != date({column})"
+            for table, column in (("tasks", "start_date"), ("tasks", "end_date"), ("milestones", "milestone_date"))
+        ),
+        "CREATE INDEX IF NOT EXISTS idx_tasks_section_wbs ON tasks(section, wbs_id)",
+        # Covering index: the per-role personnel sum never touches the table rows
+        "CREATE INDEX IF NOT EXISTS idx_tasks_role ON tasks(personnel_role, personnel_count)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_dates ON tasks(start_date, end_date)",
+        "CREATE INDEX IF NOT EXISTS idx_milestones_date ON milestones(milestone_date)",
+    ],
+    [
+        # Keyset pages seek on the full (section, wbs_id, id) key, with or without a role filter,
+        # instead of sorting every matching row in a temp b-tree
+        "CREATE INDEX IF NOT EXISTS idx_tasks_section_wbs_id ON tasks(section, wbs_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_role_section_wbs_id ON tasks(personnel_role, section, wbs_id, id)",
+        "DROP INDEX IF EXISTS idx_tasks_section_wbs",
+    ],
+]
+
+
+def task_filter(section: Optional[str] = None, role: Optional[str] = None, start_date=None, end_date=None,
+                wbs_prefix: Optional[str] = None) -> Tuple[List[str], List]:
+    """WHERE conditions and parameters of the task explorer filters (None = no filter).
+
+    The date range keeps tasks overlapping [start_date, end_date]; a WBS
+    prefix such as "5.1" or "5.1.*" keeps 5.1 itself and everything below it.
+    """
+    where, params = [], []
+    if section is not None:
+        where.append("section = ?")
+        params.append(section)
+    if role is not None:
+        where.append("personnel_role = ?")
+        params.append(role)
+    if start_date is not None:
+        where.append("end_date >= ?")
+        params.append(start_date.strftime("%Y-%m-%d"))
+    if end_date is not None:
+        where.append("start_date <= ?")
+        params.append(end_date.strftime("%Y-%m-%d"))
+    prefix = (wbs_prefix or "").strip().rstrip("*").rstrip(".")
+    if prefix:
+        where.append("(wbs_id = ? OR substr(wbs_id, 1, ?) = ?)")
+        params.extend([prefix, len(prefix) + 1, prefix + "."])
+    return where, params
+
+
+def _where_clause(where: List[str]) -> str:
+    return f"WHERE {' AND '.join(where)}" if where else ""
+
+
+class TableSync:
+    """Process-wide in-memory copy of one table, extended by pulling only rows with id > last_id"""
+
+    def __init__(self, table: str, columns: Sequence[str]):
+        self.table = table
+        self.columns = ["id", *columns]
+        self.last_id = 0
+        self.generation: Optional[int] = None
+        self._chunks: List[pd.DataFrame] = []
+        self._frame: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+    def sync(self, conn: sqlite3.Connection):
+        """Pull rows added since the last sync (everything again after a delete)"""
+        generation = conn.execute("SELECT generation FROM sync_state WHERE name = ?", (self.table,)).fetchone()[0]
+        with self._lock:
+            if generation != self.generation:
+                self.generation, self.last_id, self._chunks, self._frame = generation, 0, [], None
+            new_rows = pd.read_sql_query(
+                f"SELECT * FROM {self.table} WHERE id > ? ORDER BY id", conn, params=(self.last_id,)
+            )
+            if len(new_rows):
+                self._append(new_rows)
+
+    def add(self, row_id: int, values: Tuple):
+        """Append a row this process just inserted; a gap in the ids is left to the next sync"""
+        with self._lock:
+            if self.generation is not None and row_id == self.last_id + 1:
+                self._append(pd.DataFrame([(row_id, *values)], columns=self.columns))
+
+    def _append(self, rows: pd.DataFrame):
+        self._chunks.append(rows)
+        self.last_id = int(rows["id"].iloc[-1])
+        self._frame = None
+
+    def frame(self) -> pd.DataFrame:
+        """All rows in id order; shared between sessions, so callers must not modify it"""
+        with self._lock:
+            if self._frame is None:
+                self._frame = (
+                    pd.concat(self._chunks, ignore_index=True) if self._chunks else pd.DataFrame(columns=self.columns)
+                )
+                self._chunks = [self._frame] if self._chunks else []
+            return self._frame
+
+
+class WbsDatabase:
+    """Thread-safe pool of WAL-mode connections to the WBS database"""
+
+    def __init__(self, path: str = DB_PATH, pool_size: int = DEFAULT_POOL_SIZE):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._tasks = TableSync("tasks", TASK_COLUMNS)
+        with self.connection() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < len(MIGRATIONS):
+            self.migrate()
+
+    def _open(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are only the explicit ones opened by transaction()
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection, opening a new one while the pool is below its size"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.pool_size
+                self._opened += can_open
+            conn = self._open() if can_open else self._pool.get(timeout=POOL_TIMEOUT_SECONDS)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction that takes the write lock up front (BEGIN IMMEDIATE) and commits on exit.
+
+        Writers of this process queue on a thread lock instead of SQLite's
+        sleeping busy handler; busy_timeout still covers other processes.
+        """
+        with self._write_lock, self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def migrate(self):
+        """Apply pending migrations in one transaction (another process may have applied them meanwhile)"""
+        with self.transaction() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for statements in MIGRATIONS[version:]:
+                for statement in statements:
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+
+    def close(self):
+        """Close every idle pooled connection"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._opened -= 1
+
+    def tasks(self) -> pd.DataFrame:
+        """Current tasks (read-only shared frame), after pulling rows added since the last call"""
+        with self.connection() as conn:
+            self._tasks.sync(conn)
+        return self._tasks.frame()
+
+    def query(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        with self.connection() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def task_page(self, after: Optional[TaskCursor] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                  **filters) -> pd.DataFrame:
+        """Up to ``page_size`` tasks following ``after`` in (section, wbs_id, id) order.
+
+        Keyset pagination: the next page starts from the last row's key instead
+        of an OFFSET, so every page is a seek along idx_tasks_section_wbs_id
+        (idx_tasks_role_section_wbs_id with a role filter) no matter how deep
+        it is. ``filters`` are those of task_filter.
+        """
+        where, params = task_filter(**filters)
+        if after is not None and filters.get("section") is not None:
+            # The section is fixed, so comparing (wbs_id, id) keeps the seek going past section = ?
+            where.append("(wbs_id, id) > (?, ?)")
+            params.extend(after[1:])
+        elif after is not None:
+            where.append("(section, wbs_id, id) > (?, ?, ?)")
+            params.extend(after)
+        return self.query(
+            f"SELECT * FROM tasks {_where_clause(where)} ORDER BY section, wbs_id, id LIMIT ?", [*params, page_size]
+        )
+
+    def task_count(self, **filters) -> int:
+        where, params = task_filter(**filters)
+        with self.connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM tasks {_where_clause(where)}", params).fetchone()[0]
+
+    def milestones_by_date(self) -> pd.DataFrame:
+        return self.query("SELECT * FROM milestones ORDER BY milestone_date")
+
+    def personnel_by_role(self) -> pd.DataFrame:
+        """Total personnel per role, one row per role"""
+        return self.query(
+            "SELECT personnel_role, SUM(personnel_count) AS personnel_count FROM tasks "
+            "WHERE personnel_role IS NOT NULL GROUP BY personnel_role"
+        )
+
+    def task_count_by_section(self) -> pd.DataFrame:
+        """Number of tasks per section, largest first"""
+        return self.query(
+            'SELECT section AS "Section", COUNT(*) AS "Number of Tasks" FROM tasks '
+            'WHERE section IS NOT NULL GROUP BY section ORDER BY COUNT(*) DESC'
+        )
+
+    def task_timeline_by_wbs(self, **filters) -> pd.DataFrame:
+        """One Gantt row per (section, wbs_id): its first start, last end, task and personnel totals.
+
+        The row count is bounded by the WBS structure, not by the number of
+        tasks. ``filters`` are those of task_filter.
+        """
+        where, params = task_filter(**filters)
+        return self.query(
+            "SELECT section, wbs_id, MIN(start_date) AS start_date, MAX(end_date) AS end_date, "
+            "COUNT(*) AS task_count, SUM(personnel_count) AS personnel_count "
+            f"FROM tasks {_where_clause(where)} GROUP BY section, wbs_id ORDER BY section, wbs_id",
+            params
+        )
+
+    def save_task(self, task: Dict) -> int:
+        """Insert a task and return its id"""
+        values = (
+            task["section"], task["wbs_id"], task["task_name"], task["description"], task["personnel_role"],
+            task["personnel_count"], task["start_date"].strftime("%Y-%m-%d"), task["end_date"].strftime("%Y-%m-%d")
+        )
+        with self.transaction() as conn:
+            task_id = conn.execute(
+                f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' * len(TASK_COLUMNS))})", values
+            ).lastrowid
+        self._tasks.add(task_id, values)
+        return task_id
+
+    def save_tasks(self, tasks: pd.DataFrame) -> Dict[str, Tuple[int, int]]:
+        """Insert validated task rows (plus milestones where milestone_name is set) in one transaction.
+
+        Rows are in the form produced by wbs_import: TASK_COLUMNS with ISO
+        dates, and optional milestone_name/milestone_date columns. Returns the
+        (first, last) id range written to each table; the write lock is held
+        throughout, so every id in the range is one of these rows. Other
+        processes pick the rows up on their next sync.
+        """
+        task_rows = list(tasks[TASK_COLUMNS].astype(object).itertuples(index=False, name=None))
+        milestone_rows = []
+        if "milestone_name" in tasks.columns:
+            milestones = tasks[tasks["milestone_name"].notna()]
+            milestone_rows = list(
+                milestones[["wbs_id", "milestone_name", "milestone_date"]].astype(object).itertuples(index=False, name=None)
+            )
+        inserts = (
+            ("tasks", f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' * len(TASK_COLUMNS))})",
+             task_rows),
+            ("milestones", "INSERT INTO milestones (wbs_id, milestone_name, milestone_date) VALUES (?, ?, ?)",
+             milestone_rows)
+        )
+        id_ranges = {}
+        with self.transaction() as conn:
+            for table, sql, rows in inserts:
+                before = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                conn.executemany(sql, rows)
+                id_ranges[table] = (before + 1, conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0])
+        return id_ranges
+
+    def delete_id_ranges(self, id_ranges: Sequence[Tuple[str, int, int]]):
+        """Delete the (table, first id, last id) ranges in one transaction; every process reloads those tables"""
+        with self.transaction() as conn:
+            for table, first, last in id_ranges:
+                conn.execute(f"DELETE FROM {table} WHERE id BETWEEN ? AND ?", (first, last))
+            for table in {table for table, _, _ in id_ranges}:
+                conn.execute("UPDATE sync_state SET generation = generation + 1 WHERE name = ?", (table,))
+
+    def save_milestone(self, wbs_id: str, milestone_name: str, milestone_date) -> int:
+        """Insert a milestone and return its id"""
+        values = (wbs_id, milestone_name, milestone_date.strftime("%Y-%m-%d"))
+        with self.transaction() as conn:
+            milestone_id = conn.execute(
+                "INSERT INTO milestones (wbs_id, milestone_name, milestone_date) VALUES (?, ?, ?)", values
+            ).lastrowid
+        return milestone_id
+
+    def delete_all(self):
+        """Remove every task and milestone in one transaction; every process reloads on its next sync"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM tasks")
+            conn.execute("DELETE FROM milestones")
+            conn.execute("UPDATE sync_state SET generation = generation + 1")
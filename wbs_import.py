@@ -0,0 +1,157 @@
+"""Impor massal tugas (dan milestone opsional) dari CSV/Excel untuk app2.py.
+
+Setiap baris divalidasi terhadap struktur WBS (bagian dan WBS ID) dan daftar
+peran personil per bagian, per potongan baris sehingga progres bisa
+ditampilkan. Baris yang lolos disimpan per potongan lewat
+WbsDatabase.save_tasks: satu executemany dalam satu transaksi pendek per
+potongan, jadi kunci tulis database tidak ditahan selama seluruh file. Bila
+satu potongan gagal, potongan yang sudah tersimpan dihapus lagi sehingga
+impor tetap semua-atau-tidak-sama-sekali dan file bisa diunggah ulang
+tanpa duplikasi.
+
+Kolom wajib: section, wbs_id, personnel_role, personnel_count, start_date,
+end_date. Kolom opsional: task_name dan description (default: nama dan
+uraian WBS), milestone_name dan milestone_date. Tanggal harus berformat ISO
+yyyy-mm-dd; format lain (misal 06/01/2025) ditolak karena ambigu antara
+hari-bulan dan bulan-hari. File Excel membutuhkan openpyxl.
+"""
+from typing import Dict, Iterator, List, Tuple
+
+import pandas as pd
+
+from wbs_db import TASK_COLUMNS, WbsDatabase
+
+REQUIRED_COLUMNS = ["section", "wbs_id", "personnel_role", "personnel_count", "start_date", "end_date"]
+OPTIONAL_COLUMNS = ["task_name", "description", "milestone_name", "milestone_date"]
+IMPORT_COLUMNS = [*TASK_COLUMNS, "milestone_name", "milestone_date"]
+
+# Rows validated and inserted per step (one write transaction per chunk)
+IMPORT_CHUNK_SIZE = 500
+
+# First data row of a file is line 2 (after the header)
+FIRST_DATA_LINE = 2
+
+
+class TaskImportError(Exception):
+    """A bulk import failed; ``committed`` task rows of it are still in the database (0 once undone)"""
+
+    def __init__(self, message: str, committed: int):
+        super().__init__(message)
+        self.committed = committed
+
+
+def excel_available() -> bool:
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def read_task_file(file, name: str) -> pd.DataFrame:
+    """Every column as text (validation does the parsing), empty cells as NaN"""
+    extension = name.rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        df = pd.read_csv(file, dtype=str, skipinitialspace=True)
+    elif extension == "xlsx":
+        if not excel_available():
+            raise ImportError("Excel import needs openpyxl (pip install openpyxl); or save the sheet as CSV")
+        df = pd.read_excel(file, dtype=str)
+    else:
+        raise ValueError(f"Unsupported file type: {name}")
+    df.columns = df.columns.str.strip().str.lower()
+    df = df.apply(lambda column: column.str.strip())
+    return df.where(df != "")
+
+
+def missing_columns(df: pd.DataFrame) -> List[str]:
+    return [column for column in REQUIRED_COLUMNS if column not in df.columns]
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """ISO yyyy-mm-dd only (06/01/2025 is ambiguous between locales); anything else becomes NaT.
+
+    Excel date cells read as text carry a midnight time, which is dropped.
+    """
+    return pd.to_datetime(values.str.replace(r" 00:00:00$", "", regex=True), errors="coerce", format="%Y-%m-%d")
+
+
+def validate_chunk(chunk: pd.DataFrame, wbs_structure: Dict[str, List[Dict]],
+                   personnel_roles: Dict[str, List[str]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(valid rows in IMPORT_COLUMNS form, one error row per failed check) of a slice of the file"""
+    chunk = chunk.reindex(columns=[*REQUIRED_COLUMNS, *OPTIONAL_COLUMNS])
+    wbs_entries = {
+        (section, entry["id"]): entry for section, entries in wbs_structure.items() for entry in entries
+    }
+    role_pairs = {(section, role) for section, roles in personnel_roles.items() for role in roles}
+    keys = list(zip(chunk["section"], chunk["wbs_id"]))
+
+    count = pd.to_numeric(chunk["personnel_count"], errors="coerce")
+    start, end = _parse_dates(chunk["start_date"]), _parse_dates(chunk["end_date"])
+    milestone_date = _parse_dates(chunk["milestone_date"])
+    has_milestone = chunk["milestone_name"].notna()
+
+    checks = [
+        (chunk[REQUIRED_COLUMNS].isna().any(axis=1), "kolom wajib kosong"),
+        (~chunk["section"].isin(list(wbs_structure)), "bagian tidak dikenal"),
+        (pd.Series([key not in wbs_entries for key in keys], index=chunk.index), "WBS ID tidak ada di bagian ini"),
+        (pd.Series([key not in role_pairs for key in zip(chunk["section"], chunk["personnel_role"])],
+                   index=chunk.index), "peran tidak ada di bagian ini"),
+        (~((count >= 1) & (count % 1 == 0)), "jumlah personil harus bilangan bulat >= 1"),
+        (start.isna() | end.isna(), "tanggal tidak valid"),
+        (start > end, "tanggal selesai sebelum tanggal mulai"),
+        (has_milestone & milestone_date.isna(), "tanggal milestone tidak valid")
+    ]
+    failed = pd.Series(False, index=chunk.index)
+    errors = [pd.DataFrame({"row": pd.Series(dtype=int), "error": pd.Series(dtype=str)})]
+    for mask, message in checks:
+        mask = mask.fillna(False).astype(bool)
+        if mask.any():
+            failed |= mask
+            errors.append(pd.DataFrame({"row": chunk.index[mask] + FIRST_DATA_LINE, "error": message}))
+
+    valid = chunk[~failed]
+    entries = [wbs_entries[key] for key, ok in zip(keys, ~failed) if ok]
+    valid = valid.assign(
+        task_name=valid["task_name"].fillna(pd.Series([entry["name"] for entry in entries], index=valid.index)),
+        description=valid["description"].fillna(pd.Series([entry["desc"] for entry in entries], index=valid.index)),
+        personnel_count=count[~failed].astype(int),
+        start_date=start[~failed].dt.strftime("%Y-%m-%d"),
+        end_date=end[~failed].dt.strftime("%Y-%m-%d"),
+        milestone_date=milestone_date[~failed].dt.strftime("%Y-%m-%d").where(has_milestone[~failed])
+    )
+    return valid[IMPORT_COLUMNS], pd.concat(errors, ignore_index=True).sort_values("row", kind="stable")
+
+
+def validate_tasks(df: pd.DataFrame, wbs_structure: Dict[str, List[Dict]], personnel_roles: Dict[str, List[str]],
+                   chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[Tuple[int, pd.DataFrame, pd.DataFrame]]:
+    """Validate ``df`` chunk by chunk, yielding (rows done, valid rows, errors) after each"""
+    for start in range(0, len(df), chunk_size):
+        valid, errors = validate_chunk(df.iloc[start:start + chunk_size], wbs_structure, personnel_roles)
+        yield min(start + chunk_size, len(df)), valid, errors
+
+
+def import_tasks(db: WbsDatabase, tasks: pd.DataFrame, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[int]:
+    """Insert validated rows one transaction per chunk, yielding the number of tasks stored so far.
+
+    If a chunk fails (or the caller abandons the import), the chunks already
+    committed are deleted again and TaskImportError reports how many rows
+    could not be removed.
+    """
+    id_ranges = []
+    stored = 0
+    try:
+        for start in range(0, len(tasks), chunk_size):
+            chunk_ranges = db.save_tasks(tasks.iloc[start:start + chunk_size])
+            id_ranges.extend((table, first, last) for table, (first, last) in chunk_ranges.items() if first <= last)
+            stored += min(chunk_size, len(tasks) - start)
+            yield stored
+    except (Exception, GeneratorExit) as e:
+        try:
+            if id_ranges:
+                db.delete_id_ranges(id_ranges)
+        except Exception as undo_error:
+            raise TaskImportError(f"{e} (undo failed: {undo_error})", committed=stored) from e
+        if isinstance(e, GeneratorExit):
+            raise
+        raise TaskImportError(str(e), committed=0) from e